@@ -0,0 +1,154 @@
+"""Per-process admission control for read requests
+
+At most ADMISSION_MAX_CONCURRENCY reads run at once; up to
+ADMISSION_MAX_QUEUE more wait in FIFO order for at most
+ADMISSION_QUEUE_TIMEOUT seconds. Anything beyond that is answered right away
+with 503 and Retry-After, so during a spike the admitted requests keep their
+normal latency and the rest retry (or go to another pod) instead of every
+request slowing down together.
+"""
+import os
+import asyncio
+import logging
+from collections import deque
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Admission settings (overridable from the environment)
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "32"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+ADMISSION_METHODS = {
+    method.strip().upper() for method in os.getenv("ADMISSION_METHODS", "GET,HEAD").split(",") if method.strip()
+}
+# Probes, scrapes and static files are cheap and must keep answering under load
+EXEMPT_PREFIXES = ("/health", "/metrics", "/static")
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded FIFO queue; a released slot goes straight to the next waiter"""
+
+    def __init__(self, limit, queue_size, timeout):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "timeout": 0}
+        # Set while requests are being shed, so an overload is logged once rather than per request
+        self.shedding = False
+        self._waiters = deque()
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    async def acquire(self):
+        """True once a slot is held (call release() afterwards), False if the request is shed"""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            self.shedding = False
+            return True
+        if len(self._waiters) >= self.queue_size:
+            self.rejected["queue_full"] += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+        except asyncio.TimeoutError:
+            if self._abandon(waiter):
+                self.rejected["timeout"] += 1
+                return False
+        except asyncio.CancelledError:
+            # Client went away while queued; hand back a slot that was granted meanwhile
+            if not self._abandon(waiter):
+                self.release()
+            raise
+        self.admitted += 1
+        return True
+
+    def _abandon(self, waiter):
+        """Leave the queue; False when the slot had already been handed over"""
+        if waiter.done():
+            return False
+        waiter.cancel()
+        self._waiters.remove(waiter)
+        return True
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot passes to the waiter, so active stays the same
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self):
+        return {
+            "enabled": ADMISSION_ENABLED,
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "queue_timeout_seconds": self.timeout,
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
+
+
+controller = AdmissionController(ADMISSION_MAX_CONCURRENCY, ADMISSION_MAX_QUEUE, ADMISSION_QUEUE_TIMEOUT)
+
+
+class AdmissionMiddleware:
+    """ASGI middleware shedding read requests beyond the controller's limit with 503 + Retry-After"""
+
+    def __init__(self, app, controller=controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not ADMISSION_ENABLED
+            or scope["type"] != "http"
+            or scope["method"] not in ADMISSION_METHODS
+            or scope["path"].startswith(EXEMPT_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.controller.acquire():
+            if not self.controller.shedding:
+                self.controller.shedding = True
+                logger.warning(
+                    "⚠️ Overloaded, shedding reads with 503: %s active, %s queued",
+                    self.controller.active, self.controller.queued
+                )
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry shortly"},
+                status_code=503,
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER)}
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+
+def metrics_samples():
+    """Admission gauges and counters for the /metrics endpoint"""
+    return [
+        ("http_admission_active", "gauge", "Requests holding an admission slot", [({}, controller.active)]),
+        ("http_admission_queued", "gauge", "Requests waiting for an admission slot", [({}, controller.queued)]),
+        ("http_admission_admitted_total", "counter", "Requests admitted", [({}, controller.admitted)]),
+        ("http_admission_rejected_total", "counter", "Requests shed with 503",
+         [({"reason": reason}, count) for reason, count in controller.rejected.items()]),
+    ]
@@ -0,0 +1,172 @@
+"""Fingerprinted, precompressed static assets
+
+Every file under app/static is read once at startup, hashed and (when
+compressible) gzip/brotli encoded in memory. Templates link to the hashed
+name through ``asset_url()``; those URLs never change content, so they are
+served with ``Cache-Control: immutable`` and browsers stop re-requesting
+them. ``url()`` references inside CSS (fonts, images) are rewritten to
+hashed names too. Unhashed paths still work but must be revalidated.
+"""
+import os
+import re
+import gzip
+import hashlib
+import logging
+import mimetypes
+import posixpath
+from starlette.responses import Response
+from app.compression import accepted_encodings
+from app.conditional import etag_matches
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip variants are always built
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = os.getenv("STATIC_DIR", "app/static")
+STATIC_URL = "/static"
+ASSET_GZIP_LEVEL = int(os.getenv("ASSET_GZIP_LEVEL", "9"))
+ASSET_BROTLI_QUALITY = int(os.getenv("ASSET_BROTLI_QUALITY", "11"))
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# woff2 and images are already compressed
+COMPRESSIBLE = {".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".ttf", ".otf"}
+MEDIA_TYPES = {".woff2": "font/woff2", ".woff": "font/woff", ".mjs": "text/javascript"}
+
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+class Asset:
+    """One static file with its hashed name and encoded variants"""
+
+    def __init__(self, name, body):
+        self.name = name
+        root, ext = posixpath.splitext(name)
+        self.digest = hashlib.sha256(body).hexdigest()[:12]
+        self.hashed_name = f"{root}.{self.digest}{ext}"
+        self.media_type = MEDIA_TYPES.get(ext) or mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.variants = {"identity": body}
+        if ext in COMPRESSIBLE:
+            self._add_variant("gzip", gzip.compress(body, compresslevel=ASSET_GZIP_LEVEL, mtime=0))
+            if brotli is not None:
+                self._add_variant("br", brotli.compress(body, quality=ASSET_BROTLI_QUALITY))
+
+    def _add_variant(self, encoding, body):
+        # Keep an encoding only when it actually saves bytes
+        if len(body) < len(self.variants["identity"]):
+            self.variants[encoding] = body
+
+    def pick(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and encoding in accepted:
+                return encoding
+        return "identity"
+
+
+class AssetManifest:
+    """Logical name -> Asset, plus hashed name -> Asset for serving"""
+
+    def __init__(self, directory=STATIC_DIR, url_prefix=STATIC_URL):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.assets = {}
+        self.hashed = {}
+        self.build()
+
+    def _files(self):
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, self.directory).replace(os.sep, "/"), path
+
+    def build(self):
+        files = sorted(self._files())
+        # Stylesheets last, so the files they reference already have hashed names
+        for name, path in sorted(files, key=lambda item: item[0].endswith(".css")):
+            with open(path, "rb") as f:
+                body = f.read()
+            if name.endswith(".css"):
+                body = self._rewrite_css(name, body.decode("utf-8")).encode("utf-8")
+            asset = Asset(name, body)
+            self.assets[name] = asset
+            self.hashed[asset.hashed_name] = asset
+        logger.info("✅ Built %s static assets (brotli %s)", len(self.assets), "on" if brotli else "off")
+
+    def _rewrite_css(self, name, css):
+        base = posixpath.dirname(name)
+
+        def replace(match):
+            reference = match.group(2).strip()
+            if reference.startswith(("data:", "http:", "https:", "//", "#", "/")):
+                return match.group(0)
+            path, suffix = re.match(r"([^?#]*)(.*)", reference).groups()
+            target = self.assets.get(posixpath.normpath(posixpath.join(base, path)))
+            if target is None:
+                return match.group(0)
+            return f'url("{self.url_prefix}/{target.hashed_name}{suffix}")'
+
+        return CSS_URL.sub(replace, css)
+
+    def url(self, name):
+        """Hashed URL for a logical asset name (the plain path if the file is unknown)"""
+        asset = self.assets.get(name)
+        return f"{self.url_prefix}/{asset.hashed_name if asset else name}"
+
+    def lookup(self, path):
+        """Return (asset, immutable) for a request path relative to the mount"""
+        asset = self.hashed.get(path)
+        if asset is not None:
+            return asset, True
+        return self.assets.get(path), False
+
+
+class StaticAssets:
+    """ASGI app serving an AssetManifest from memory"""
+
+    def __init__(self, manifest):
+        self.manifest = manifest
+
+    async def __call__(self, scope, receive, send):
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        asset, immutable = self.manifest.lookup(path.lstrip("/"))
+
+        headers = dict(
+            (key.decode("latin-1"), value.decode("latin-1")) for key, value in scope.get("headers", [])
+        )
+        if scope["method"] not in ("GET", "HEAD"):
+            response = Response(status_code=405, headers={"Allow": "GET, HEAD"})
+        elif asset is None:
+            response = Response("Not Found", status_code=404, media_type="text/plain")
+        else:
+            response = self._asset_response(asset, immutable, headers)
+        await response(scope, receive, send)
+
+    @staticmethod
+    def _asset_response(asset, immutable, headers):
+        encoding = asset.pick(headers.get("accept-encoding"))
+        etag = f'"{asset.digest}"' if encoding == "identity" else f'"{asset.digest}-{encoding}"'
+        response_headers = {
+            "Cache-Control": IMMUTABLE if immutable else REVALIDATE,
+            "ETag": etag,
+        }
+        if len(asset.variants) > 1:
+            response_headers["Vary"] = "Accept-Encoding"
+        if etag_matches(headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=response_headers)
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        return Response(asset.variants[encoding], headers=response_headers, media_type=asset.media_type)
+
+
+manifest = AssetManifest()
+
+
+def asset_url(name):
+    return manifest.url(name)
@@ -0,0 +1,54 @@
+import os
+import logging
+from datetime import datetime
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Number of ids sent to the server per round trip
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def bulk_update(collection, update_data, ids=None, query=None, chunk_size=None):
+    """Apply one $set patch (bumping each version) to a list of ids (chunked bulk_write) or to a filter (update_many)"""
+    update_data = {**update_data, "updated_at": datetime.utcnow()}
+    update = {"$set": update_data, "$inc": {"version": 1}}
+    matched = modified = chunks = 0
+
+    if ids is not None:
+        for chunk in chunked(ids, chunk_size or BULK_CHUNK_SIZE):
+            result = await collection.bulk_write(
+                [UpdateOne({"_id": video_id}, update) for video_id in chunk],
+                ordered=False
+            )
+            matched += result.matched_count
+            modified += result.modified_count
+            chunks += 1
+    else:
+        result = await collection.update_many(query, update)
+        matched, modified, chunks = result.matched_count, result.modified_count, 1
+
+    logger.info("Bulk update finished: %s matched, %s modified in %s round trips", matched, modified, chunks)
+    return {"matched": matched, "modified": modified, "chunks": chunks}
+
+
+async def bulk_delete(collection, ids=None, query=None, chunk_size=None):
+    """Delete a list of ids (chunked delete_many) or everything matching a filter"""
+    deleted = chunks = 0
+
+    if ids is not None:
+        for chunk in chunked(ids, chunk_size or BULK_CHUNK_SIZE):
+            result = await collection.delete_many({"_id": {"$in": chunk}})
+            deleted += result.deleted_count
+            chunks += 1
+    else:
+        result = await collection.delete_many(query)
+        deleted, chunks = result.deleted_count, 1
+
+    logger.info("Bulk delete finished: %s deleted in %s round trips", deleted, chunks)
+    return {"deleted": deleted, "chunks": chunks}
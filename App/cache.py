@@ -0,0 +1,243 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from pymongo.errors import OperationFailure, PyMongoError
+from app.pagination import clamp_page_size
+
+logger = logging.getLogger(__name__)
+
+# Cache settings (overridable from the environment)
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+CACHE_MAX_PAGES = int(os.getenv("CACHE_MAX_PAGES", "256"))
+CACHE_MAX_VIDEOS = int(os.getenv("CACHE_MAX_VIDEOS", "2048"))
+CACHE_MAX_FRAGMENTS = int(os.getenv("CACHE_MAX_FRAGMENTS", "4096"))
+CACHE_FRAGMENT_TTL_SECONDS = float(os.getenv("CACHE_FRAGMENT_TTL_SECONDS", "3600"))
+CACHE_CHANGE_STREAM = os.getenv("CACHE_CHANGE_STREAM", "false").lower() in ("1", "true", "yes")
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after a fixed TTL
+
+    ``generation`` is bumped on every invalidation so a read that started
+    before a write cannot store its (now stale) result afterwards.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, generation=None):
+        if generation is not None and generation != self.generation:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def pop(self, key):
+        self.generation += 1
+        self._data.pop(key, None)
+
+    def clear(self):
+        self.generation += 1
+        self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one in-flight call and its result
+
+    Callers include the cache generation in the key, so a read that starts
+    after a write never joins a query that began before it.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._inflight = {}
+
+    async def do(self, key, function):
+        future = self._inflight.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(function())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.shared += 1
+        # Shielded so a caller that disconnects does not cancel the query for the others
+        return await asyncio.shield(future)
+
+    def __len__(self):
+        return len(self._inflight)
+
+    def stats(self):
+        return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._inflight)}
+
+
+# List pages keyed by (after, before, limit, projection, search), stored with their collection ETag;
+# single videos keyed by _id
+page_cache = TTLCache(CACHE_MAX_PAGES, CACHE_TTL_SECONDS)
+video_cache = TTLCache(CACHE_MAX_VIDEOS, CACHE_TTL_SECONDS)
+# Rendered list rows keyed by (_id, updated_at); a write changes the key, so no invalidation is needed
+fragment_cache = TTLCache(CACHE_MAX_FRAGMENTS, CACHE_FRAGMENT_TTL_SECONDS)
+# Collection-level ETag for conditional GETs of list pages
+version_cache = TTLCache(1, CACHE_TTL_SECONDS)
+# Identical cache misses arriving together (e.g. after a deploy refreshes every dashboard) run one query
+inflight_reads = SingleFlight()
+
+
+def invalidate_videos(*video_ids):
+    """Drop cached reads after a write; without ids every cached video is dropped"""
+    page_cache.clear()
+    version_cache.clear()
+    if video_ids:
+        for video_id in video_ids:
+            video_cache.pop(video_id)
+    else:
+        video_cache.clear()
+
+
+def cache_stats():
+    return {
+        "enabled": CACHE_ENABLED,
+        "change_stream": CACHE_CHANGE_STREAM,
+        "pages": page_cache.stats(),
+        "videos": video_cache.stats(),
+        "fragments": fragment_cache.stats(),
+        "coalesced": inflight_reads.stats(),
+    }
+
+
+def metrics_samples():
+    """Cache counters for the /metrics endpoint"""
+    caches = {"pages": page_cache, "videos": video_cache, "fragments": fragment_cache}
+    return [
+        ("videos_cache_hits_total", "counter", "Read cache hits",
+         [({"cache": name}, cache.hits) for name, cache in caches.items()]),
+        ("videos_cache_misses_total", "counter", "Read cache misses",
+         [({"cache": name}, cache.misses) for name, cache in caches.items()]),
+        ("videos_cache_evictions_total", "counter", "Read cache LRU evictions",
+         [({"cache": name}, cache.evictions) for name, cache in caches.items()]),
+        ("videos_cache_entries", "gauge", "Entries currently cached",
+         [({"cache": name}, len(cache)) for name, cache in caches.items()]),
+        ("videos_reads_coalesced_total", "counter", "Reads that joined an identical in-flight query",
+         [({}, inflight_reads.shared)]),
+    ]
+
+
+async def cached_page(repository, after=None, before=None, limit=None, projection=None, search=None, etag=None):
+    """repository.list_page through the page cache, with concurrent misses coalesced
+
+    ``etag`` is the collection ETag read before the page: a cached page is
+    only served for the ETag it was stored with, so a write made by another
+    replica (which this process cannot invalidate for) is never answered with
+    the new ETag and the old body.
+    """
+    key = (
+        after,
+        before,
+        clamp_page_size(limit),
+        tuple(sorted(projection)) if projection else None,
+        search.key() if search is not None else None,
+    )
+    cached = page_cache.get(key) if CACHE_ENABLED else None
+    if cached is not None and cached[0] == etag:
+        return cached[1]
+    generation = page_cache.generation
+    page = await inflight_reads.do(
+        ("page", generation, etag) + key,
+        lambda: repository.list_page(search, after=after, before=before, limit=limit, projection=projection)
+    )
+    if CACHE_ENABLED:
+        page_cache.set(key, (etag, page), generation)
+    return page
+
+
+async def cached_video(repository, video_id, projection):
+    """Look up one full video document through the cache, then apply the projection"""
+    video = video_cache.get(video_id) if CACHE_ENABLED else None
+    if video is None:
+        generation = video_cache.generation
+        video = await inflight_reads.do(("video", generation, video_id), lambda: repository.get(video_id))
+        if video is None:
+            return None
+        if CACHE_ENABLED:
+            video_cache.set(video_id, video, generation)
+    if not projection:
+        return video
+    projected = {name: video[name] for name in projection if name in video}
+    projected["_id"] = video["_id"]
+    return projected
+
+
+async def watch_video_changes(collection):
+    """Invalidate local caches from the collection's change stream
+
+    Keeps replicas coherent with writes made by other pods. Resumes from the
+    last seen token after transient errors.
+    """
+    resume_token = None
+    retry_delay = 1
+    while True:
+        try:
+            async with collection.watch(resume_after=resume_token) as stream:
+                logger.info("✅ Watching video changes for cache invalidation")
+                retry_delay = 1
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    video_id = change.get("documentKey", {}).get("_id")
+                    if video_id is not None:
+                        invalidate_videos(video_id)
+                    else:
+                        invalidate_videos()
+        except asyncio.CancelledError:
+            raise
+        except PyMongoError as e:
+            logger.warning("⚠️ Change stream interrupted: %s; retrying in %ss", e, retry_delay)
+            if isinstance(e, OperationFailure):
+                # The resume point may have fallen off the oplog; start fresh
+                resume_token = None
+            # Anything may have changed while we were not watching
+            invalidate_videos()
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, 30)
@@ -0,0 +1,103 @@
+import os
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Response
+from app.cache import CACHE_CHANGE_STREAM, CACHE_ENABLED, inflight_reads, version_cache
+
+# The marker is only cached when the change stream invalidates it for writes made by other replicas
+CACHE_COLLECTION_ETAG = CACHE_ENABLED and CACHE_CHANGE_STREAM
+
+
+def _source_digest():
+    """Short hash of the application's code, templates and static files"""
+    digest = hashlib.sha256()
+    root = os.path.dirname(os.path.abspath(__file__))
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = sorted(name for name in subdirectories if name != "__pycache__")
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            digest.update(os.path.relpath(path, root).encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:10]
+
+
+# Part of every list ETag, so a deploy that changes how lists render is not answered with 304
+BUILD_ID = os.getenv("BUILD_ID") or _source_digest()
+
+
+async def _read_collection_version(repository):
+    count, updated_at = await repository.change_marker()
+    stamp = int(updated_at.replace(tzinfo=timezone.utc).timestamp() * 1000) if updated_at else 0
+    return f'W/"{BUILD_ID}-{count}-{stamp}"'
+
+
+async def collection_etag(repository):
+    """Cheap validator for list responses that changes whenever any video changes
+
+    Read it before running the list query: a write racing in between then
+    only costs the client one extra full response, never a missed update.
+    Without the change stream another replica's write would not invalidate a
+    cached marker, so it is read from the database every time (concurrent
+    reads still share one query).
+    """
+    etag = version_cache.get("videos") if CACHE_COLLECTION_ETAG else None
+    if etag is None:
+        generation = version_cache.generation
+        etag = await inflight_reads.do(("etag", generation), lambda: _read_collection_version(repository))
+        if CACHE_COLLECTION_ETAG:
+            version_cache.set("videos", etag, generation)
+    return etag
+
+
+def _opaque(tag):
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against the current ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in if_none_match.split(",")}
+
+
+def http_date(value):
+    """Format a naive UTC datetime for Last-Modified"""
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def not_modified_since(if_modified_since, last_modified):
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have one second resolution
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def is_not_modified(request, etag, last_modified=None):
+    """RFC 9110 evaluation: If-None-Match wins, If-Modified-Since only applies without it"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    return not_modified_since(request.headers.get("if-modified-since"), last_modified)
+
+
+def validator_headers(etag, last_modified=None):
+    # no-cache: clients may store the response but must revalidate before reusing it
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified_response(etag, last_modified=None):
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
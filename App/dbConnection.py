@@ -1,81 +1,213 @@
 import os
+import time
+import random
 import asyncio
 import logging
+from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, PyMongoError
 from dotenv import load_dotenv
+from app.indexes import reconcile_in_background
+from app.dbMonitoring import command_monitor, pool_monitor
+from app.repositories.mongo import MongoVideoRepository
+from app.logconfig import configure_logging
 
 # Load environment variables from .env
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (queue-backed, so log calls never block the event loop)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Database connection variables
 client = None
 db = None
 video_collection = None
+video_repository = None
 
-async def connect_to_database():
-    """Establish connection to MongoDB Atlas with error handling and retry logic"""
-    global client, db, video_collection
-    
+# Storage backend: "mongodb" (default) or "sqlite" for single-node and edge deployments
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongodb").lower()
+
+# Connection pool settings: environment variable -> MongoClient option
+POOL_SETTINGS = (
+    ("MONGO_MAX_POOL_SIZE", "maxPoolSize"),
+    ("MONGO_MIN_POOL_SIZE", "minPoolSize"),
+    ("MONGO_MAX_IDLE_TIME_MS", "maxIdleTimeMS"),
+    ("MONGO_WAIT_QUEUE_TIMEOUT_MS", "waitQueueTimeoutMS"),
+    ("MONGO_MAX_CONNECTING", "maxConnecting"),
+)
+
+def get_client_options():
+    """Build Motor client options from the environment (unset values keep driver defaults)"""
+    options = {
+        "serverSelectionTimeoutMS": 5000,  # 5 second timeout
+        "connectTimeoutMS": 10000,         # 10 second connection timeout
+        "socketTimeoutMS": 10000,          # 10 second socket timeout
+        "event_listeners": [pool_monitor, command_monitor],
+    }
+    for env_name, option in POOL_SETTINGS:
+        value = os.getenv(env_name)
+        if value:
+            options[option] = int(value)
+    # Wire compression, e.g. "zstd,snappy,zlib" (first one the server supports wins)
+    compressors = os.getenv("MONGO_COMPRESSORS")
+    if compressors:
+        options["compressors"] = compressors
+        zlib_level = os.getenv("MONGO_ZLIB_COMPRESSION_LEVEL")
+        if zlib_level:
+            options["zlibCompressionLevel"] = int(zlib_level)
+    return options
+
+# Startup maintenance running in the background (kept referenced so it is not garbage collected)
+maintenance_task = None
+
+# Supervisor settings (overridable from the environment)
+DB_HEARTBEAT_INTERVAL = float(os.getenv("DB_HEARTBEAT_INTERVAL", "10"))
+DB_HEARTBEAT_TIMEOUT = float(os.getenv("DB_HEARTBEAT_TIMEOUT", "5"))
+DB_RECONNECT_MAX_DELAY = float(os.getenv("DB_RECONNECT_MAX_DELAY", "30"))
+# Consecutive failed heartbeats before the pod reports itself not ready
+DB_UNHEALTHY_AFTER = int(os.getenv("DB_UNHEALTHY_AFTER", "3"))
+
+# Supervisor task and the connection state it maintains (read by /health/ready)
+supervisor_task = None
+db_state = {
+    "status": "starting",
+    "ready": False,
+    "connected_at": None,
+    "last_heartbeat": None,
+    "heartbeat_ms": None,
+    "consecutive_failures": 0,
+    "last_error": None,
+}
+
+# Coroutine functions called with the collection once the first connection succeeds
+connect_listeners = []
+
+def get_mongo_uri():
     mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
-    
     if not mongo_uri or mongo_uri == "mongodb://localhost:27017/":
+        return None
+    return mongo_uri
+
+async def connect_to_database():
+    """Make one connection attempt to MongoDB Atlas; the supervisor retries on failure"""
+    global client, db, video_collection, video_repository
+    
+    mongo_uri = get_mongo_uri()
+    if mongo_uri is None:
         logger.error("❌ MONGO_URI not found in environment variables")
         return False
     
-    max_retries = 3
-    retry_delay = 2
+    try:
+        # The driver reconnects on its own once a client exists, so it is created only once
+        if client is None:
+            client = AsyncIOMotorClient(mongo_uri, **get_client_options())
+        
+        # Test the connection
+        await asyncio.wait_for(client.admin.command('ping'), DB_HEARTBEAT_TIMEOUT)
+        
+        # Set up database and collection
+        db = client["ytmanager"]
+        video_collection = db["videos"]
+        video_repository = MongoVideoRepository(video_collection, db["video_stats"])
+        
+        logger.info("✅ Database connected successfully!")
+        return True
+        
+    except (ConnectionFailure, ServerSelectionTimeoutError, asyncio.TimeoutError) as e:
+        logger.warning("⚠️ Database connection attempt failed: %r", e)
+        return False
+    except Exception as e:
+        logger.error("❌ Unexpected database connection error: %s", e)
+        return False
+
+async def heartbeat():
+    """Ping the server and record the result in db_state"""
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(client.admin.command('ping'), DB_HEARTBEAT_TIMEOUT)
+    except (PyMongoError, asyncio.TimeoutError) as e:
+        db_state["consecutive_failures"] += 1
+        db_state["last_error"] = repr(e)
+        if db_state["consecutive_failures"] >= DB_UNHEALTHY_AFTER and db_state["ready"]:
+            logger.error("❌ Database heartbeat failing (%s in a row): %r", db_state["consecutive_failures"], e)
+            db_state.update(status="degraded", ready=False)
+        return False
     
-    for attempt in range(max_retries):
+    if not db_state["ready"]:
+        logger.info("✅ Database heartbeat recovered")
+    db_state.update(
+        status="connected",
+        ready=True,
+        last_heartbeat=datetime.utcnow(),
+        heartbeat_ms=round((time.perf_counter() - started) * 1000, 3),
+        consecutive_failures=0,
+        last_error=None,
+    )
+    return True
+
+async def _on_first_connect():
+    start_database_maintenance()
+    for listener in connect_listeners:
         try:
-            # Create client with timeout settings
-            client = AsyncIOMotorClient(
-                mongo_uri,
-                serverSelectionTimeoutMS=5000,  # 5 second timeout
-                connectTimeoutMS=10000,         # 10 second connection timeout
-                socketTimeoutMS=10000           # 10 second socket timeout
-            )
-            
-            # Test the connection
-            await client.admin.command('ping')
-            
-            # Set up database and collection
-            db = client["ytmanager"]
-            video_collection = db["videos"]
-            
-            logger.info("✅ Database connected successfully!")
-            return True
-            
-        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
-            logger.warning(f"⚠️ Database connection attempt {attempt + 1} failed: {e}")
-            if attempt < max_retries - 1:
-                logger.info(f"🔄 Retrying in {retry_delay} seconds...")
-                await asyncio.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                logger.error("❌ All database connection attempts failed")
-                return False
+            await listener(video_collection)
         except Exception as e:
-            logger.error(f"❌ Unexpected database connection error: {e}")
-            return False
+            logger.error("❌ Database connect listener failed: %s", e)
+
+async def supervise_database():
+    """Connect in the background, retrying with capped backoff, then heartbeat forever"""
+    if get_mongo_uri() is None:
+        logger.error("❌ MONGO_URI not found in environment variables")
+        db_state.update(status="unconfigured", last_error="MONGO_URI is not set")
+        return
+    
+    retry_delay = 1
+    while video_collection is None:
+        db_state["status"] = "connecting"
+        if await connect_to_database():
+            break
+        db_state["consecutive_failures"] += 1
+        db_state["last_error"] = "connection attempt failed"
+        # Jitter keeps replicas from retrying in lockstep
+        delay = retry_delay * random.uniform(0.5, 1.0)
+        logger.info("🔄 Retrying database connection in %.1f seconds...", delay)
+        await asyncio.sleep(delay)
+        retry_delay = min(retry_delay * 2, DB_RECONNECT_MAX_DELAY)
     
-    return False
+    db_state.update(status="connected", ready=True, connected_at=datetime.utcnow(), consecutive_failures=0)
+    await _on_first_connect()
+    while True:
+        await heartbeat()
+        await asyncio.sleep(DB_HEARTBEAT_INTERVAL)
 
 async def check_database_health():
     """Check if database connection is healthy"""
     try:
-        if client is None:
+        if video_repository is None:
             return False
-        await client.admin.command('ping')
+        await video_repository.ping()
         return True
     except Exception as e:
-        logger.error(f"❌ Database health check failed: {e}")
+        logger.error("❌ Database health check failed: %s", e)
         return False
 
+def get_database_state():
+    """Supervisor view of the connection for health endpoints"""
+    return dict(db_state)
+
+def get_pool_stats():
+    """Connection pool and per-command latency counters from the driver listeners"""
+    options = get_client_options()
+    return {
+        "settings": {
+            option: options[option]
+            for _, option in POOL_SETTINGS + (("", "compressors"),)
+            if option in options
+        },
+        "pool": pool_monitor.stats(),
+        "commands": command_monitor.stats(),
+    }
+
 def get_video_collection():
     """Get video collection with connection check"""
     if video_collection is None:
@@ -83,10 +215,84 @@ def get_video_collection():
         return None
     return video_collection
 
+def get_video_repository():
+    """Get the storage backend for videos, or None while it is not connected"""
+    return video_repository
+
+def get_stats_collection():
+    """Get the collection holding the incrementally maintained video statistics"""
+    if db is None:
+        return None
+    return db["video_stats"]
+
+def get_enrichment_collection():
+    """Get the persisted queue of URL enrichment jobs (None unless MongoDB is connected)"""
+    if db is None:
+        return None
+    return db["enrichment_jobs"]
+
+async def backfill_search_fields():
+    """Populate title_lower on documents written before prefix search existed"""
+    if video_collection is None:
+        return 0
+    try:
+        # Runs server-side as a single update with an aggregation pipeline
+        result = await video_collection.update_many(
+            {"title_lower": {"$exists": False}, "title": {"$type": "string"}},
+            [{"$set": {"title_lower": {"$toLower": "$title"}}}]
+        )
+        if result.modified_count:
+            logger.info("✅ Backfilled title_lower on %s videos", result.modified_count)
+        return result.modified_count
+    except PyMongoError as e:
+        logger.warning("⚠️ Failed to backfill search fields: %s", e)
+        return 0
+
+async def run_database_maintenance():
+    """Reconcile the declared indexes, then backfill derived fields"""
+    await reconcile_in_background(video_collection)
+    await backfill_search_fields()
+
+def start_database_maintenance():
+    """Kick off index reconciliation without blocking startup on long index builds"""
+    global maintenance_task
+    if maintenance_task is None or maintenance_task.done():
+        maintenance_task = asyncio.create_task(run_database_maintenance())
+    return maintenance_task
+
+async def open_sqlite_storage():
+    """Open the embedded SQLite backend (local file, so startup simply waits for it)"""
+    global video_repository
+    from app.repositories.sqlite import SQLiteVideoRepository
+    try:
+        video_repository = await SQLiteVideoRepository.open()
+    except Exception as e:
+        logger.error("❌ Failed to open SQLite storage: %s", e)
+        db_state.update(status="unavailable", ready=False, last_error=repr(e))
+        return
+    db_state.update(status="connected", ready=True, connected_at=datetime.utcnow(), last_error=None)
+
 # Initialize connection (will be called from main.py)
 async def initialize_database():
-    """Initialize database connection on startup"""
-    success = await connect_to_database()
-    if not success:
-        logger.warning("⚠️ Application starting without database connection")
-    return success
+    """Start the connection supervisor; startup does not wait for the database"""
+    global supervisor_task
+    if STORAGE_BACKEND == "sqlite":
+        await open_sqlite_storage()
+        return None
+    if supervisor_task is None or supervisor_task.done():
+        supervisor_task = asyncio.create_task(supervise_database())
+    return supervisor_task
+
+async def close_database():
+    """Stop the supervisor and close the client on shutdown"""
+    global client, video_repository
+    for task in (supervisor_task, maintenance_task):
+        if task is not None and not task.done():
+            task.cancel()
+    if video_repository is not None:
+        await video_repository.close()
+        video_repository = None
+    if client is not None:
+        client.close()
+        client = None
+    db_state.update(status="stopped", ready=False)
@@ -0,0 +1,170 @@
+import time
+import threading
+from pymongo import monitoring
+from app.metrics import (
+    mongodb_command_duration,
+    mongodb_command_failures,
+    mongodb_pool_checkout_wait,
+    record_db_time,
+)
+
+
+class LatencyStats:
+    """Count, total and max of a latency series, in milliseconds"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms):
+        self.count += 1
+        self.total_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "total_ms": round(self.total_ms, 3),
+        }
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks pool size, connections in use and checkout wait time
+
+    Listeners are called on the driver's executor threads, so counters are
+    updated under a lock. Checkouts happen synchronously on the calling
+    thread, which lets a thread-local carry the start time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.open_connections = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+        self.checkout_wait = LatencyStats()
+
+    def _finish_wait(self):
+        started = getattr(self._local, "checkout_started", None)
+        self._local.checkout_started = None
+        if started is not None:
+            waited = time.perf_counter() - started
+            self.checkout_wait.observe(waited * 1000)
+            mongodb_pool_checkout_wait.observe(value=waited)
+
+    def connection_check_out_started(self, event):
+        self._local.checkout_started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self._finish_wait()
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._finish_wait()
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections = max(0, self.open_connections - 1)
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "open_connections": self.open_connections,
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "pool_clears": self.pool_clears,
+                "checkout_wait": self.checkout_wait.as_dict(),
+            }
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """Per-command latency and failure counts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}
+        self.failures = {}
+
+    def _observe(self, event):
+        stats = self.latency.get(event.command_name)
+        if stats is None:
+            stats = self.latency[event.command_name] = LatencyStats()
+        stats.observe(event.duration_micros / 1000)
+        seconds = event.duration_micros / 1_000_000
+        mongodb_command_duration.observe(event.command_name, value=seconds)
+        # Attribute the time to the request that issued the command
+        record_db_time(seconds)
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        with self._lock:
+            self._observe(event)
+
+    def failed(self, event):
+        with self._lock:
+            self._observe(event)
+            self.failures[event.command_name] = self.failures.get(event.command_name, 0) + 1
+        mongodb_command_failures.inc(event.command_name)
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {**stats.as_dict(), "failures": self.failures.get(name, 0)}
+                for name, stats in sorted(self.latency.items())
+            }
+
+
+# Shared listener instances registered on the Motor client
+pool_monitor = PoolMonitor()
+command_monitor = CommandMonitor()
+
+
+def metrics_samples():
+    """Current pool gauges for the /metrics endpoint"""
+    stats = pool_monitor.stats()
+    return [
+        ("mongodb_pool_open_connections", "gauge", "Open pooled connections", [({}, stats["open_connections"])]),
+        ("mongodb_pool_connections_in_use", "gauge", "Connections checked out of the pool", [({}, stats["in_use"])]),
+        ("mongodb_pool_checkout_failures_total", "counter", "Failed pool checkouts", [({}, stats["checkout_failures"])]),
+        ("mongodb_pool_clears_total", "counter", "Times the pool was cleared", [({}, stats["pool_clears"])]),
+    ]
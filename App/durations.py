@@ -0,0 +1,60 @@
+import re
+
+# Unit spellings accepted in "1h 5m 30s" style durations, in seconds
+UNITS = {
+    "h": 3600, "hr": 3600, "hrs": 3600, "hour": 3600, "hours": 3600,
+    "m": 60, "min": 60, "mins": 60, "minute": 60, "minutes": 60,
+    "s": 1, "sec": 1, "secs": 1, "second": 1, "seconds": 1,
+}
+
+CLOCK = re.compile(r"^(?:(\d+):)?(\d+):(\d{1,2})$")
+ISO_8601 = re.compile(r"^PT(?:(\d+(?:\.\d+)?)H)?(?:(\d+(?:\.\d+)?)M)?(?:(\d+(?:\.\d+)?)S)?$", re.IGNORECASE)
+UNIT_PART = re.compile(r"(\d+(?:\.\d+)?)\s*([a-z]+)")
+NUMBER = re.compile(r"^\d+(?:\.\d+)?$")
+
+
+def is_bare_number(text):
+    """Whether parse_duration reads text as a bare number of minutes (e.g. "45")"""
+    return isinstance(text, str) and bool(NUMBER.match(text.strip()))
+
+
+def parse_duration(text):
+    """Parse a free-text video duration into whole seconds, or None if it is not understood
+
+    Accepts clock times ("12:30", "1:05:30"), unit lists ("1h 5m", "90s",
+    "2 hours 10 mins"), ISO 8601 ("PT1H5M") and bare numbers, which are
+    read as minutes ("45").
+    """
+    if not isinstance(text, str):
+        return None
+    value = text.strip().lower()
+    if not value:
+        return None
+
+    clock = CLOCK.match(value)
+    if clock:
+        hours, minutes, seconds = (int(part) if part else 0 for part in clock.groups())
+        # With hours present, minutes are a clock field too
+        if seconds >= 60 or (clock.group(1) is not None and minutes >= 60):
+            return None
+        return hours * 3600 + minutes * 60 + seconds
+
+    iso = ISO_8601.match(value)
+    if iso and any(iso.groups()):
+        hours, minutes, seconds = (float(part) if part else 0 for part in iso.groups())
+        return round(hours * 3600 + minutes * 60 + seconds)
+
+    if NUMBER.match(value):
+        return round(float(value) * 60)
+
+    parts = UNIT_PART.findall(value)
+    # Everything in the string must be "<number><unit>" pairs (separators aside)
+    leftover = UNIT_PART.sub("", value).replace(",", "").replace("and", "").strip()
+    if not parts or leftover:
+        return None
+    total = 0.0
+    for number, unit in parts:
+        if unit not in UNITS:
+            return None
+        total += float(number) * UNITS[unit]
+    return round(total)
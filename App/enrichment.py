@@ -0,0 +1,310 @@
+"""Background enrichment of video URLs (canonical URL, thumbnail, page metadata)
+
+Work is queued as one document per video in the ``enrichment_jobs``
+collection, written before the request that caused it returns, so nothing
+is lost when a pod restarts. A pool of ENRICHMENT_WORKERS tasks per process
+claims due jobs with an atomic find-and-modify that takes a lease; a job
+whose worker died becomes claimable again once the lease runs out, and
+failed fetches are retried with capped exponential backoff until
+ENRICHMENT_MAX_ATTEMPTS. Results land in the video's ``enrichment`` field.
+
+Enrichment needs MongoDB; with STORAGE_BACKEND=sqlite enqueueing is a no-op.
+
+To queue every video that has no enrichment yet (e.g. after enabling it):
+    python -m app.enrichment enqueue-missing
+"""
+import os
+import sys
+import uuid
+import random
+import asyncio
+import logging
+import argparse
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import PyMongoError
+from app.cache import invalidate_videos
+from app.fetcher import FetchError, HttpFetcher
+
+logger = logging.getLogger(__name__)
+
+# Enrichment settings (overridable from the environment)
+# Off unless asked for: it fetches user-supplied URLs from the server
+ENRICHMENT_ENABLED = os.getenv("ENRICHMENT_ENABLED", "false").lower() in ("1", "true", "yes")
+ENRICHMENT_WORKERS = int(os.getenv("ENRICHMENT_WORKERS", "4"))
+ENRICHMENT_MAX_ATTEMPTS = int(os.getenv("ENRICHMENT_MAX_ATTEMPTS", "6"))
+ENRICHMENT_RETRY_BASE_SECONDS = float(os.getenv("ENRICHMENT_RETRY_BASE_SECONDS", "30"))
+ENRICHMENT_RETRY_MAX_SECONDS = float(os.getenv("ENRICHMENT_RETRY_MAX_SECONDS", "3600"))
+# A claimed job returns to the queue if its worker has not finished it by then
+ENRICHMENT_LEASE_SECONDS = float(os.getenv("ENRICHMENT_LEASE_SECONDS", "120"))
+# Idle workers look for due retries (and jobs queued by other pods) this often
+ENRICHMENT_POLL_INTERVAL = float(os.getenv("ENRICHMENT_POLL_INTERVAL", "5"))
+
+JOBS_COLLECTION = "enrichment_jobs"
+# Identifies this process in claimed jobs (useful when inspecting stuck work)
+WORKER_ID = f"{os.getenv('HOSTNAME', 'local')}:{os.getpid()}"
+
+# Outcomes of processed jobs, exported as enrichment_jobs_total
+outcomes = {"enriched": 0, "retried": 0, "failed": 0, "gone": 0}
+
+# Workers running in this process (None when enrichment is off or not started)
+workers = None
+
+
+def _jobs():
+    from app.dbConnection import get_enrichment_collection
+    return get_enrichment_collection() if ENRICHMENT_ENABLED else None
+
+
+def _job_update(url, now):
+    """Upsert (re)queueing a video; a new URL replaces any pending or running job for it"""
+    return {
+        "$set": {
+            "url": url,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "updated_at": now,
+        },
+        "$unset": {"lease": "", "locked_until": "", "worker": "", "last_error": ""},
+        "$setOnInsert": {"created_at": now},
+    }
+
+
+async def enqueue_enrichment(video_id, url):
+    """Queue one video for enrichment; never fails the calling request"""
+    jobs = _jobs()
+    if jobs is None or not url:
+        return False
+    try:
+        await jobs.update_one({"_id": video_id}, _job_update(url, datetime.utcnow()), upsert=True)
+    except PyMongoError as e:
+        logger.warning("⚠️ Failed to queue enrichment for %s: %s", video_id, e)
+        return False
+    if workers is not None:
+        workers.notify()
+    return True
+
+
+async def enqueue_many(videos):
+    """Queue (video_id, url) pairs with one unordered bulk write; returns how many were queued"""
+    jobs = _jobs()
+    now = datetime.utcnow()
+    requests = [
+        UpdateOne({"_id": video_id}, _job_update(url, now), upsert=True) for video_id, url in videos if url
+    ]
+    if jobs is None or not requests:
+        return 0
+    try:
+        await jobs.bulk_write(requests, ordered=False)
+    except PyMongoError as e:
+        logger.warning("⚠️ Failed to queue enrichment for %s videos: %s", len(requests), e)
+        return 0
+    if workers is not None:
+        workers.notify()
+    return len(requests)
+
+
+async def ensure_job_indexes(jobs):
+    await jobs.create_index([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt")
+    await jobs.create_index([("status", ASCENDING), ("locked_until", ASCENDING)], name="status_locked_until")
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt: doubles per attempt, capped, with jitter"""
+    delay = min(ENRICHMENT_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), ENRICHMENT_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class EnrichmentWorkers:
+    """A fixed number of worker tasks draining the job collection"""
+
+    def __init__(self, jobs, videos, fetcher, concurrency=None):
+        self.jobs = jobs
+        self.videos = videos
+        self.fetcher = fetcher
+        self.concurrency = concurrency or ENRICHMENT_WORKERS
+        self.busy = 0
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+        logger.info("✅ Started %s enrichment workers", self.concurrency)
+
+    async def stop(self):
+        """Cancel the workers; jobs they held are picked up again when the lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers because new work was queued"""
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                job = await self._claim()
+            except PyMongoError as e:
+                logger.warning("⚠️ Failed to claim enrichment job: %s", e)
+                job = None
+                await asyncio.sleep(ENRICHMENT_POLL_INTERVAL)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), ENRICHMENT_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.busy += 1
+            try:
+                await self._process(job)
+            except PyMongoError as e:
+                # The lease expires and another attempt is made
+                logger.warning("⚠️ Failed to record enrichment result for %s: %s", job["_id"], e)
+            finally:
+                self.busy -= 1
+
+    async def _claim(self):
+        now = datetime.utcnow()
+        return await self.jobs.find_one_and_update(
+            {"$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {"status": "running", "locked_until": {"$lte": now}},
+            ]},
+            {
+                "$set": {
+                    "status": "running",
+                    "lease": uuid.uuid4().hex,
+                    "locked_until": now + timedelta(seconds=ENRICHMENT_LEASE_SECONDS),
+                    "worker": WORKER_ID,
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("next_attempt_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _process(self, job):
+        # Filtering on the lease leaves the job alone if it was re-queued meanwhile (e.g. the URL changed)
+        claimed = {"_id": job["_id"], "lease": job["lease"]}
+        try:
+            metadata = await self.fetcher.fetch(job["url"])
+        except FetchError as e:
+            await self._failed(job, claimed, str(e), e.retryable)
+            return
+        except Exception as e:
+            logger.error("❌ Unexpected enrichment error for %s: %r", job["url"], e)
+            await self._failed(job, claimed, repr(e), True)
+            return
+
+        # Only the system-owned field is written: version and updated_at belong to user edits,
+        # so an If-Match taken before enrichment landed still applies (see versioning.etag_for)
+        result = await self.videos.update_one(
+            {"_id": job["_id"], "url": job["url"]},
+            {"$set": {"enrichment": {**metadata, "fetched_at": datetime.utcnow()}}},
+        )
+        await self.jobs.delete_one(claimed)
+        if result.matched_count:
+            invalidate_videos(job["_id"])
+            outcomes["enriched"] += 1
+        else:
+            # Deleted, or its URL changed after the job was claimed
+            outcomes["gone"] += 1
+
+    async def _failed(self, job, claimed, error, retryable):
+        now = datetime.utcnow()
+        if retryable and job["attempts"] < ENRICHMENT_MAX_ATTEMPTS:
+            delay = retry_delay(job["attempts"])
+            update = {"status": "pending", "next_attempt_at": now + timedelta(seconds=delay)}
+            outcomes["retried"] += 1
+            logger.info("🔄 Enrichment of %s failed (%s), retrying in %.0f seconds", job["url"], error, delay)
+        else:
+            update = {"status": "failed"}
+            outcomes["failed"] += 1
+            logger.warning("⚠️ Giving up enrichment of %s after %s attempts: %s", job["url"], job["attempts"], error)
+        await self.jobs.update_one(
+            claimed,
+            {"$set": {**update, "last_error": error, "updated_at": now}, "$unset": {"lease": "", "locked_until": ""}},
+        )
+
+
+async def start_enrichment(videos, fetcher=None):
+    """Start this process's workers (called once the database is connected)"""
+    global workers
+    jobs = _jobs()
+    if jobs is None or workers is not None:
+        return None
+    try:
+        await ensure_job_indexes(jobs)
+    except PyMongoError as e:
+        logger.warning("⚠️ Failed to create enrichment job indexes: %s", e)
+    workers = EnrichmentWorkers(jobs, videos, fetcher or HttpFetcher())
+    workers.start()
+    return workers
+
+
+async def stop_enrichment():
+    global workers
+    if workers is None:
+        return
+    running, workers = workers, None
+    await running.stop()
+    await running.fetcher.close()
+
+
+def metrics_samples():
+    """Enrichment worker gauges and job counters for the /metrics endpoint"""
+    busy = workers.busy if workers is not None else 0
+    return [
+        ("enrichment_workers_busy", "gauge", "Enrichment workers processing a job", [({}, busy)]),
+        ("enrichment_jobs_total", "counter", "Enrichment jobs processed, by outcome",
+         [({"outcome": outcome}, count) for outcome, count in outcomes.items()]),
+    ]
+
+
+async def enqueue_missing(videos, batch_size=1000):
+    """Queue every video that has a URL but no enrichment yet"""
+    queued = 0
+    batch = []
+    async for video in videos.find({"enrichment": {"$exists": False}, "url": {"$type": "string"}}, {"url": 1}):
+        batch.append((video["_id"], video["url"]))
+        if len(batch) >= batch_size:
+            queued += await enqueue_many(batch)
+            batch = []
+    if batch:
+        queued += await enqueue_many(batch)
+    return queued
+
+
+async def retry_failed(jobs):
+    """Put jobs that ran out of attempts back in the queue"""
+    result = await jobs.update_many(
+        {"status": "failed"},
+        {"$set": {"status": "pending", "attempts": 0, "next_attempt_at": datetime.utcnow()}},
+    )
+    return result.modified_count
+
+
+async def _main(argv):
+    from app import dbConnection
+
+    parser = argparse.ArgumentParser(prog="python -m app.enrichment")
+    parser.add_argument("command", choices=["enqueue-missing", "retry-failed"])
+    args = parser.parse_args(argv)
+
+    if not await dbConnection.connect_to_database():
+        print("❌ Could not connect to the database (is MONGO_URI set?)")
+        return 2
+    if args.command == "enqueue-missing":
+        print(f"{await enqueue_missing(dbConnection.get_video_collection())} videos queued")
+    else:
+        print(f"{await retry_failed(dbConnection.get_enrichment_collection())} failed jobs queued again")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,92 @@
+"""Streaming export of videos as NDJSON or CSV
+
+Videos arrive from VideoRepository.iter_batches one batch at a time and each
+batch is encoded into a single chunk, so memory stays at one batch however
+many videos are exported. CSV output uses the same columns the importer
+reads, so an export can be imported back.
+"""
+import io
+import os
+import csv
+import zlib
+import logging
+import anyio
+import orjson
+from datetime import datetime, timezone
+from app.compression import COMPRESSION_GZIP_LEVEL, COMPRESSION_THREAD_THRESHOLD
+from app.repositories import StorageError
+from app.serialization import dumps_lines
+
+logger = logging.getLogger(__name__)
+
+# Export settings (overridable from the environment)
+DEFAULT_EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+MAX_EXPORT_BATCH_SIZE = 10000
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def clamp_batch_size(batch_size):
+    return max(1, min(batch_size or DEFAULT_EXPORT_BATCH_SIZE, MAX_EXPORT_BATCH_SIZE))
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=timezone.utc).isoformat()
+    if isinstance(value, dict):
+        # Nested fields (enrichment) become one JSON cell
+        return orjson.dumps(value).decode()
+    return value
+
+
+def csv_chunk(batch, columns, header=False):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(columns)
+    writer.writerows([_csv_value(document.get(name)) for name in columns] for document in batch)
+    return buffer.getvalue().encode("utf-8")
+
+
+async def export_chunks(first_batch, batches, format, fields):
+    """Encoded chunks for an export whose first batch was already fetched
+
+    The status line is sent before the rest is read, so a storage failure part
+    way through is logged and re-raised, which aborts the transfer instead of
+    ending it cleanly: clients see a truncated download, not a short export.
+    """
+    columns = ["_id", *fields]
+    exported = 0
+    try:
+        if format == "csv":
+            yield csv_chunk(first_batch or [], columns, header=True)
+        elif first_batch:
+            yield dumps_lines(first_batch)
+        exported += len(first_batch or [])
+        if first_batch is None:
+            return
+        async for batch in batches:
+            yield csv_chunk(batch, columns) if format == "csv" else dumps_lines(batch)
+            exported += len(batch)
+    except StorageError as e:
+        logger.error("❌ Export aborted after %s videos: %s", exported, e)
+        raise
+    logger.info("Export finished: %s videos as %s", exported, format)
+
+
+async def gzip_chunks(chunks):
+    """Gzip a chunk stream into one .gz file (no per-chunk flush, unlike HTTP compression)"""
+    compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        if len(chunk) >= COMPRESSION_THREAD_THRESHOLD:
+            data = await anyio.to_thread.run_sync(compressor.compress, chunk)
+        else:
+            data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,247 @@
+"""Fetch page metadata (canonical URL, thumbnail, title, duration) for video URLs
+
+HttpFetcher shares one pooled httpx client across all enrichment workers and
+allows at most ENRICHMENT_PER_HOST_LIMIT requests to the same host at once,
+so a slow or rate-limiting site cannot take every worker. Only the start of
+the page (up to ENRICHMENT_MAX_BYTES) is read; the metadata lives in <head>.
+
+URLs are user input, so every connection (redirects included) resolves the
+host itself, refuses it unless all its addresses are globally routable and
+connects to the address it checked; TLS still verifies the original name.
+Resolving once for the check and again for the connection would let a
+DNS-rebinding host pass the check and then point at the cluster network.
+
+Anything with an async ``fetch(url)`` returning the same dict shape can be
+used instead, e.g. HttpFetcher(client=httpx.AsyncClient(transport=...)) or a
+plain stub in tests.
+"""
+import os
+import ssl
+import socket
+import asyncio
+import logging
+import ipaddress
+import weakref
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+import certifi
+import httpcore
+import httpx
+from app.durations import parse_duration
+
+logger = logging.getLogger(__name__)
+
+# Fetcher settings (overridable from the environment)
+ENRICHMENT_TIMEOUT = float(os.getenv("ENRICHMENT_TIMEOUT", "10"))
+ENRICHMENT_MAX_CONNECTIONS = int(os.getenv("ENRICHMENT_MAX_CONNECTIONS", "20"))
+ENRICHMENT_PER_HOST_LIMIT = int(os.getenv("ENRICHMENT_PER_HOST_LIMIT", "2"))
+ENRICHMENT_MAX_BYTES = int(os.getenv("ENRICHMENT_MAX_BYTES", str(512 * 1024)))
+ENRICHMENT_USER_AGENT = os.getenv("ENRICHMENT_USER_AGENT", "VideoManager/2.0 (+metadata fetcher)")
+# User-entered URLs must not reach into the cluster network unless explicitly allowed (e.g. a local stub)
+ENRICHMENT_ALLOW_PRIVATE = os.getenv("ENRICHMENT_ALLOW_PRIVATE", "false").lower() in ("1", "true", "yes")
+
+# 408 and 429 are worth retrying later, like server errors; other 4xx are final
+RETRYABLE_STATUSES = {408, 425, 429}
+
+
+class FetchError(Exception):
+    """Fetching a URL failed; ``retryable`` says whether a later attempt may succeed"""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class _HeadParser(HTMLParser):
+    """Collect <title>, <meta> and <link rel=canonical> until the <head> ends"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta = {}
+        self.canonical = None
+        self.title = None
+        self.done = False
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        attrs = {name: value for name, value in attrs if value is not None}
+        if tag == "meta":
+            key = (attrs.get("property") or attrs.get("name") or attrs.get("itemprop") or "").lower()
+            if key and "content" in attrs:
+                self.meta.setdefault(key, attrs["content"].strip())
+        elif tag == "link" and "canonical" in attrs.get("rel", "").lower().split() and attrs.get("href"):
+            self.canonical = self.canonical or attrs["href"].strip()
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "body":
+            self.done = True
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        elif tag == "head":
+            self.done = True
+
+    def handle_data(self, data):
+        if self._in_title and not self.done:
+            self.title = ((self.title or "") + data).strip()
+
+
+def _duration(meta):
+    # Open Graph durations are seconds; schema.org's itemprop is ISO 8601 (PT4M13S)
+    for key in ("og:video:duration", "video:duration"):
+        value = meta.get(key)
+        if value and value.isdigit():
+            return int(value)
+    iso = meta.get("duration")
+    return parse_duration(iso) if iso and iso.upper().startswith("P") else None
+
+
+def parse_metadata(html, base_url):
+    """Metadata dict from the head of an HTML page (relative URLs resolved against base_url)"""
+    parser = _HeadParser()
+    parser.feed(html)
+    meta = parser.meta
+    canonical = parser.canonical or meta.get("og:url")
+    thumbnail = meta.get("og:image") or meta.get("og:image:url") or meta.get("twitter:image")
+    return {
+        "canonical_url": urljoin(base_url, canonical) if canonical else base_url,
+        "thumbnail_url": urljoin(base_url, thumbnail) if thumbnail else None,
+        "title": meta.get("og:title") or parser.title,
+        "site_name": meta.get("og:site_name"),
+        "duration_seconds": _duration(meta),
+    }
+
+
+def _is_public(address):
+    ip = ipaddress.ip_address(address)
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    # is_global also excludes shared address space (100.64.0.0/10), which some pod networks use;
+    # it counts multicast as global, though
+    return ip.is_global and not ip.is_multicast
+
+
+async def _resolve(host, port):
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return list(dict.fromkeys(info[4][0] for info in infos))
+
+
+async def public_addresses(host, port):
+    """Addresses to connect to for host, or FetchError unless every one of them is public"""
+    try:
+        addresses = await _resolve(host, port)
+    except socket.gaierror as e:
+        raise FetchError(f"Cannot resolve {host}: {e}", retryable=True)
+    if not addresses or not all(_is_public(address) for address in addresses):
+        raise FetchError(f"Refusing to fetch private address for {host}", retryable=False)
+    return addresses
+
+
+class _PublicOnlyBackend(httpcore.AsyncNetworkBackend):
+    """Network backend connecting only to the public addresses it resolved itself"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        error = None
+        for address in await public_addresses(host, port):
+            try:
+                return await self.backend.connect_tcp(
+                    address, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        raise error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        raise FetchError("Refusing to fetch through a unix socket", retryable=False)
+
+    async def sleep(self, seconds):
+        await self.backend.sleep(seconds)
+
+
+class _PublicOnlyTransport(httpx.AsyncHTTPTransport):
+    """httpx transport whose connection pool uses _PublicOnlyBackend
+
+    The host name stays in the URL, so the Host header, SNI and certificate
+    check use it while the socket goes to the checked address.
+    """
+
+    def __init__(self, limits, network_backend=None):
+        # trust_env=False: an environment proxy would resolve the host itself, unchecked
+        super().__init__(limits=limits, trust_env=False)
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=ssl.create_default_context(cafile=certifi.where()),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=_PublicOnlyBackend(network_backend),
+        )
+
+
+class HttpFetcher:
+    """Pooled HTTP fetcher with per-host concurrency limits"""
+
+    def __init__(self, client=None, per_host_limit=None, max_bytes=None):
+        if client is None:
+            limits = httpx.Limits(
+                max_connections=ENRICHMENT_MAX_CONNECTIONS,
+                max_keepalive_connections=ENRICHMENT_MAX_CONNECTIONS,
+            )
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(ENRICHMENT_TIMEOUT),
+                limits=limits,
+                transport=None if ENRICHMENT_ALLOW_PRIVATE else _PublicOnlyTransport(limits),
+                follow_redirects=True,
+                max_redirects=5,
+                headers={"User-Agent": ENRICHMENT_USER_AGENT, "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.5"},
+            )
+        self.client = client
+        self.per_host_limit = per_host_limit or ENRICHMENT_PER_HOST_LIMIT
+        self.max_bytes = max_bytes or ENRICHMENT_MAX_BYTES
+        # Semaphores live only while some request to that host holds or waits on one
+        self._hosts = weakref.WeakValueDictionary()
+
+    def _host_limit(self, host):
+        semaphore = self._hosts.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_limit)
+            self._hosts[host] = semaphore
+        return semaphore
+
+    async def fetch(self, url):
+        host = urlsplit(url).hostname
+        if not host:
+            raise FetchError(f"Not an absolute URL: {url}", retryable=False)
+        async with self._host_limit(host):
+            try:
+                async with self.client.stream("GET", url) as response:
+                    if response.status_code >= 400:
+                        retryable = response.status_code >= 500 or response.status_code in RETRYABLE_STATUSES
+                        raise FetchError(f"HTTP {response.status_code}", retryable=retryable)
+                    final_url = str(response.url)
+                    if "html" not in response.headers.get("content-type", ""):
+                        return {"canonical_url": final_url}
+                    body = bytearray()
+                    async for chunk in response.aiter_bytes():
+                        body.extend(chunk)
+                        if len(body) >= self.max_bytes:
+                            break
+                    encoding = response.charset_encoding or "utf-8"
+            except httpx.TooManyRedirects as e:
+                raise FetchError(f"Too many redirects: {e}", retryable=False)
+            except httpx.HTTPError as e:
+                # Timeouts, connection failures and protocol errors
+                raise FetchError(f"{type(e).__name__}: {e}", retryable=True)
+        try:
+            html = bytes(body).decode(encoding, errors="replace")
+        except LookupError:
+            html = bytes(body).decode("utf-8", errors="replace")
+        return parse_metadata(html, final_url)
+
+    async def close(self):
+        await self.client.aclose()
@@ -0,0 +1,234 @@
+import os
+import csv
+import codecs
+import logging
+import orjson
+from pydantic import ValidationError
+from app.enrichment import enqueue_many
+from app.routes.video_routes import VideoCreate, build_video_document
+
+logger = logging.getLogger(__name__)
+
+# Import settings (overridable from the environment)
+DEFAULT_IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+MAX_IMPORT_BATCH_SIZE = 10000
+MAX_REPORTED_ERRORS = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", "1000"))
+
+IMPORT_FIELDS = ("title", "description", "time", "url")
+
+# A longer line is reported as an error row instead of being buffered
+MAX_LINE_BYTES = int(os.getenv("IMPORT_MAX_LINE_BYTES", str(1024 * 1024)))
+# A quoted CSV record larger than this is treated as malformed
+MAX_CSV_RECORD_CHARS = 64 * 1024
+
+# Yielded by iter_lines in place of a line longer than MAX_LINE_BYTES
+LINE_TOO_LONG = object()
+
+
+class _LineBuffer:
+    """The line being read, as pieces; feed() returns the lines a piece of text completes"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.parts = []
+        self.size = 0
+        self.oversized = False
+
+    def _add(self, piece):
+        if self.oversized:
+            return
+        self.size += len(piece.encode())
+        if self.size > self.limit:
+            # Keep reading to the end of the line, but not its text
+            self.oversized = True
+            self.parts = []
+        else:
+            self.parts.append(piece)
+
+    def _take(self):
+        line = LINE_TOO_LONG if self.oversized else "".join(self.parts).rstrip("\r")
+        self.parts, self.size, self.oversized = [], 0, False
+        return line
+
+    def feed(self, text):
+        lines = []
+        start = 0
+        end = text.find("\n")
+        while end >= 0:
+            self._add(text[start:end])
+            lines.append(self._take())
+            start = end + 1
+            end = text.find("\n", start)
+        self._add(text[start:])
+        return lines
+
+    def finish(self):
+        return [self._take()] if self.size or self.oversized else []
+
+
+async def iter_lines(chunks, max_line_bytes=None):
+    """Split a stream of byte chunks into text lines without buffering the whole body
+
+    Only newly decoded text is searched for line breaks, so the work stays
+    linear in the body size, and a line over max_line_bytes (MAX_LINE_BYTES)
+    comes out as LINE_TOO_LONG rather than being held in memory.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = _LineBuffer(max_line_bytes or MAX_LINE_BYTES)
+    async for chunk in chunks:
+        for line in buffer.feed(decoder.decode(chunk)):
+            yield line
+    for line in buffer.feed(decoder.decode(b"", final=True)) + buffer.finish():
+        yield line
+
+
+def _too_long():
+    return f"Line longer than {MAX_LINE_BYTES} bytes"
+
+
+async def iter_ndjson_records(lines):
+    """Yield (row number, record or error message) for each non-blank NDJSON line"""
+    row = 0
+    async for line in lines:
+        row += 1
+        if line is LINE_TOO_LONG:
+            yield row, _too_long()
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield row, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row, "Expected a JSON object"
+            continue
+        yield row, record
+
+
+async def iter_csv_records(lines):
+    """Yield (row number, record or error message) for each CSV record after the header
+
+    Quoted fields may span several lines; a record is complete once its
+    quotes are balanced.
+    """
+    header = None
+    record_lines = []
+    row = 0
+    start_row = 0
+    # Kept per line so a long quoted record is not re-joined and re-scanned for every line
+    quotes = length = 0
+    async for line in lines:
+        row += 1
+        if not record_lines:
+            start_row = row
+            quotes = length = 0
+        if line is LINE_TOO_LONG:
+            # The record it belongs to is lost; parsing restarts on the next line
+            record_lines = []
+            yield start_row, _too_long()
+            continue
+        record_lines.append(line)
+        quotes += line.count('"')
+        length += len(line) + 1
+        if quotes % 2:
+            if length - 1 > MAX_CSV_RECORD_CHARS:
+                record_lines = []
+                yield start_row, "Record too large or unterminated quoted field"
+            continue
+        text = "\n".join(record_lines)
+        record_lines = []
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start_row, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield start_row, dict(zip(header, values))
+    if record_lines:
+        yield start_row, "Unterminated quoted field"
+
+
+def _format_error(error):
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+        )
+    return str(error)
+
+
+class ImportReport:
+    """Running totals and per-row errors for one import"""
+
+    def __init__(self, max_errors=MAX_REPORTED_ERRORS):
+        self.max_errors = max_errors
+        self.inserted = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors = []
+
+    def add_error(self, row, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "error": message})
+
+    def as_dict(self):
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "batches": self.batches,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+async def _flush(repository, batch, report):
+    """Insert one batch unordered, recording rows the store rejected"""
+    rows = [row for row, _ in batch]
+    documents = [document for _, document in batch]
+    report.batches += 1
+    inserted, errors = await repository.insert_many(documents)
+    report.inserted += inserted
+    for index, message in errors:
+        report.add_error(rows[index], message)
+    rejected = {index for index, _ in errors}
+    await enqueue_many(
+        (document["_id"], document.get("url"))
+        for index, document in enumerate(documents)
+        if index not in rejected and "_id" in document
+    )
+
+
+async def import_videos(repository, records, batch_size=None, report=None):
+    """Validate streamed records with VideoCreate and insert them in unordered batches
+
+    Pass in an ImportReport to keep the partial totals if the import fails.
+    """
+    batch_size = max(1, min(batch_size or DEFAULT_IMPORT_BATCH_SIZE, MAX_IMPORT_BATCH_SIZE))
+    if report is None:
+        report = ImportReport()
+    batch = []
+    async for row, record in records:
+        if isinstance(record, str):
+            report.add_error(row, record)
+            continue
+        try:
+            video_data = VideoCreate(**{name: record.get(name) for name in IMPORT_FIELDS})
+        except (ValidationError, ValueError, TypeError) as e:
+            report.add_error(row, _format_error(e))
+            continue
+        batch.append((row, build_video_document(video_data)))
+        if len(batch) >= batch_size:
+            await _flush(repository, batch, report)
+            batch = []
+    if batch:
+        await _flush(repository, batch, report)
+
+    logger.info(
+        "Import finished: %s inserted, %s failed in %s batches", report.inserted, report.failed, report.batches
+    )
+    return report
@@ -0,0 +1,176 @@
+"""Declarative index registry for the videos collection
+
+Every index the app's queries depend on is declared here. Once the database
+supervisor first connects they are reconciled in the background; to build
+them ahead of a deploy run:
+
+    python -m app.indexes            # create missing indexes
+    python -m app.indexes --dry-run  # only report what would change
+"""
+import sys
+import asyncio
+import logging
+from pymongo import IndexModel
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class IndexSpec:
+    """One required index: key pattern, name and creation options"""
+
+    def __init__(self, name, keys, purpose, **options):
+        self.name = name
+        self.keys = keys
+        self.purpose = purpose
+        self.options = options
+
+    @property
+    def is_text(self):
+        return any(direction == "text" for _, direction in self.keys)
+
+    def expected_key(self):
+        # The server stores text indexes under a synthetic key pattern
+        if self.is_text:
+            return [("_fts", "text"), ("_ftsx", 1)]
+        return list(self.keys)
+
+    def to_model(self):
+        return IndexModel(self.keys, name=self.name, **self.options)
+
+
+# Keyset pagination order for /videos and /api/videos
+LIST_SORT_INDEX = [("created_at", -1), ("_id", -1)]
+
+# Full-text search; title matches count three times as much
+TEXT_INDEX = [("title", "text"), ("description", "text")]
+TEXT_INDEX_WEIGHTS = {"title": 3, "description": 1}
+
+# Typeahead matches an anchored prefix of the lower-cased title
+PREFIX_INDEX = [("title_lower", 1)]
+
+# updated_at date range filters
+UPDATED_AT_INDEX = [("updated_at", -1)]
+
+# "Longest first" keyset pagination and duration range filters
+DURATION_INDEX = [("duration_seconds", -1), ("_id", -1)]
+
+# Newest enrichment, part of the list ETag (enrichment does not touch updated_at)
+ENRICHED_AT_INDEX = [("enrichment.fetched_at", -1)]
+
+VIDEO_INDEXES = [
+    IndexSpec("created_at_-1__id_-1", LIST_SORT_INDEX, "keyset pagination"),
+    IndexSpec(
+        "title_description_text", TEXT_INDEX, "full-text search", weights=TEXT_INDEX_WEIGHTS
+    ),
+    IndexSpec("title_lower_1", PREFIX_INDEX, "title prefix search"),
+    IndexSpec("updated_at_-1", UPDATED_AT_INDEX, "updated date filters"),
+    IndexSpec("duration_seconds_-1__id_-1", DURATION_INDEX, "duration sort and filters"),
+    IndexSpec("enrichment.fetched_at_-1", ENRICHED_AT_INDEX, "list validators after enrichment"),
+]
+
+
+def _normalize_key(key):
+    normalized = []
+    for field, direction in key.items() if hasattr(key, "items") else key:
+        if isinstance(direction, float) and direction.is_integer():
+            direction = int(direction)
+        normalized.append((field, direction))
+    return normalized
+
+
+def _differences(spec, existing):
+    differences = {}
+    actual_key = _normalize_key(existing["key"])
+    if actual_key != spec.expected_key():
+        differences["key"] = {"expected": spec.expected_key(), "actual": actual_key}
+    for option, expected in spec.options.items():
+        actual = existing.get(option)
+        if actual != expected:
+            differences[option] = {"expected": expected, "actual": actual}
+    return differences
+
+
+async def reconcile_indexes(collection, specs=None, dry_run=False):
+    """Create missing indexes and report drifted or unmanaged ones
+
+    Drifted indexes (same name or key pattern, different definition) are
+    only reported, never dropped, since rebuilding an index on a large
+    collection is a decision for an operator.
+    """
+    specs = VIDEO_INDEXES if specs is None else specs
+    report = {"created": [], "present": [], "drifted": [], "unmanaged": []}
+
+    existing = {}
+    async for index in collection.list_indexes():
+        existing[index["name"]] = index
+    by_key = {tuple(_normalize_key(index["key"])): name for name, index in existing.items()}
+
+    missing = []
+    for spec in specs:
+        current = existing.get(spec.name)
+        if current is None:
+            other_name = by_key.get(tuple(spec.expected_key()))
+            if other_name is not None:
+                report["drifted"].append({
+                    "name": spec.name,
+                    "differences": {"name": {"expected": spec.name, "actual": other_name}},
+                })
+            else:
+                missing.append(spec)
+            continue
+        differences = _differences(spec, current)
+        if differences:
+            report["drifted"].append({"name": spec.name, "differences": differences})
+        else:
+            report["present"].append(spec.name)
+
+    declared = {spec.name for spec in specs}
+    report["unmanaged"] = sorted(name for name in existing if name != "_id_" and name not in declared)
+
+    if missing and not dry_run:
+        # Index builds do not block reads or writes on MongoDB 4.2+
+        report["created"] = await collection.create_indexes([spec.to_model() for spec in missing])
+    elif missing:
+        report["created"] = [spec.name for spec in missing]
+
+    if report["created"]:
+        verb = "Would create" if dry_run else "Created"
+        logger.info("✅ %s indexes: %s", verb, ", ".join(report["created"]))
+    for drift in report["drifted"]:
+        logger.warning("⚠️ Index %s differs from its declaration: %s", drift["name"], drift["differences"])
+    if report["unmanaged"]:
+        logger.info("Indexes not declared in the registry: %s", ", ".join(report["unmanaged"]))
+    return report
+
+
+async def reconcile_in_background(collection):
+    """Reconcile indexes without ever failing or blocking the caller"""
+    try:
+        return await reconcile_indexes(collection)
+    except PyMongoError as e:
+        logger.warning("⚠️ Index reconciliation failed: %s", e)
+        return None
+
+
+async def _main(argv):
+    from app.dbConnection import connect_to_database, get_video_collection
+
+    dry_run = "--dry-run" in argv
+    if not await connect_to_database():
+        print("❌ Could not connect to the database (is MONGO_URI set?)")
+        return 2
+    report = await reconcile_indexes(get_video_collection(), dry_run=dry_run)
+    for name in report["present"]:
+        print(f"  ok       {name}")
+    for name in report["created"]:
+        print(f"  {'missing' if dry_run else 'created'}  {name}")
+    for drift in report["drifted"]:
+        print(f"  drifted  {drift['name']}: {drift['differences']}")
+    for name in report["unmanaged"]:
+        print(f"  extra    {name}")
+    return 1 if report["drifted"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
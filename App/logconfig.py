@@ -0,0 +1,83 @@
+"""Non-blocking logging for the event loop
+
+Handlers write to stderr synchronously, which stalls every request on the
+loop whenever the output pipe is slow. configure_logging() puts a queue in
+front of them instead: logging a record only appends it to an in-process
+queue, and a background thread formats and writes it. Records are queued
+unformatted (nothing is pickled, so lazy %-style arguments are rendered on
+the writer thread), and when the writer falls LOG_QUEUE_SIZE records behind
+new records are dropped and counted rather than blocking the caller.
+"""
+import os
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+# Logging settings (overridable from the environment)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", logging.BASIC_FORMAT)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+_listener = None
+_handler = None
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Queue records as they are and drop them when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The listener formats the record later on its own thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging():
+    """Route the root logger through the queue (idempotent; called by every worker process)"""
+    global _listener, _handler
+    if _listener is not None:
+        return
+    root = logging.getLogger()
+    # Handlers configured earlier keep working, just behind the queue
+    handlers = list(root.handlers)
+    if not handlers:
+        stream = logging.StreamHandler()
+        stream.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers = [stream]
+    for handler in handlers:
+        root.removeHandler(handler)
+
+    _handler = _NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    root.addHandler(_handler)
+    root.setLevel(LOG_LEVEL)
+    _listener = QueueListener(_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def metrics_samples():
+    """Log queue gauges and counters for the /metrics endpoint"""
+    if _handler is None:
+        return []
+    return [
+        ("log_queue_records", "gauge", "Log records waiting to be written", [({}, _handler.queue.qsize())]),
+        ("log_records_dropped_total", "counter", "Log records dropped because the queue was full",
+         [({}, _handler.dropped)]),
+    ]
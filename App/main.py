@@ -1,20 +1,65 @@
 from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
+import asyncio
 import os
-from app.routes import video_routes
-from app.dbConnection import initialize_database
+from app.routes import video_routes, api_routes
+from app.dbConnection import (
+    STORAGE_BACKEND,
+    close_database,
+    connect_listeners,
+    get_database_state,
+    get_pool_stats,
+    get_stats_collection,
+    initialize_database,
+)
+from app.stats import dashboard_stats, reconcile_periodically
+from app.enrichment import ENRICHMENT_ENABLED, start_enrichment, stop_enrichment
+from app.cache import CACHE_CHANGE_STREAM, cache_stats, watch_video_changes
+from app import admission, cache, dbMonitoring, enrichment, logconfig, profiling
+from app.metrics import MetricsMiddleware, registry
+from app.compression import CompressionMiddleware
+from app.admission import AdmissionMiddleware
+from app.profiling import ProfilingMiddleware
+from app.templating import precompile_templates, templates
+from app.assets import StaticAssets, manifest
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Starting Video Manager Application...")
+    # Compile templates now (or load them from the bytecode cache) rather than on first request
+    precompile_templates()
+    background_tasks = []
+    
+    async def watch_changes(collection):
+        # Keep this replica's caches in sync with writes made by other pods
+        background_tasks.append(asyncio.create_task(watch_video_changes(collection)))
+    
+    async def reconcile_stats(collection):
+        # Recompute the statistics summary now and periodically to repair drift
+        background_tasks.append(asyncio.create_task(reconcile_periodically(collection, get_stats_collection())))
+
+    async def enrich_videos(collection):
+        # Workers resolving canonical URLs and page metadata for queued videos
+        await start_enrichment(collection)
+
+    if CACHE_CHANGE_STREAM:
+        connect_listeners.append(watch_changes)
+    connect_listeners.append(reconcile_stats)
+    if ENRICHMENT_ENABLED:
+        connect_listeners.append(enrich_videos)
+    # Connects (and keeps reconnecting) in the background; requests are served right away
     await initialize_database()
     print("✅ Application startup complete!")
     yield
     # Shutdown (cleanup if needed)
     print("🛑 Shutting down Video Manager Application...")
+    for task in background_tasks:
+        task.cancel()
+    await stop_enrichment()
+    await close_database()
 
 # FastAPI app with enhanced metadata
 app = FastAPI(
@@ -50,11 +95,23 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# Static files (CSS/JS)
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Response compression (zstd/brotli/gzip, negotiated per request)
+app.add_middleware(CompressionMiddleware)
+# Opt-in sampling profiler for slow /videos requests (inside admission, so queueing time is not profiled)
+app.add_middleware(ProfilingMiddleware)
+# Admission control: bounded concurrent reads plus a short queue, excess shed with 503 before any work
+app.add_middleware(AdmissionMiddleware)
+# Request metrics (latency histograms, status codes, in-flight requests); outermost so it includes compression
+app.add_middleware(MetricsMiddleware)
+registry.add_collector(cache.metrics_samples)
+registry.add_collector(dbMonitoring.metrics_samples)
+registry.add_collector(admission.metrics_samples)
+registry.add_collector(enrichment.metrics_samples)
+registry.add_collector(logconfig.metrics_samples)
+registry.add_collector(profiling.metrics_samples)
 
-# Templates
-templates = Jinja2Templates(directory="app/templates")
+# Static files (CSS/JS/fonts): hashed URLs are immutable, encodings precomputed
+app.mount("/static", StaticAssets(manifest), name="static")
 
 # Health check endpoint for Docker
 @app.get("/health")
@@ -63,13 +120,48 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "Video Manager Dashboard",
-        "version": "2.0.0"
+        "version": "2.0.0",
+        "database": get_database_state()["status"],
+        "storage": STORAGE_BACKEND
     }
 
+# Liveness: the process and its event loop are responsive (never touches the database)
+@app.get("/health/live")
+async def liveness():
+    return {"status": "alive"}
+
+# Readiness: the connection supervisor has a healthy database connection
+@app.get("/health/ready")
+async def readiness():
+    state = get_database_state()
+    return JSONResponse(
+        jsonable_encoder({"status": "ready" if state["ready"] else "not_ready", "database": state}),
+        status_code=200 if state["ready"] else 503
+    )
+
+# Prometheus metrics in text exposition format
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Cache statistics (hit/miss counters for sizing the read cache)
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Read-through cache counters"""
+    return cache_stats()
+
+# Database pool and command latency statistics (for tuning pool sizes)
+@app.get("/db/stats")
+async def get_db_stats():
+    """Connection pool and per-command latency counters"""
+    return get_pool_stats()
+
 # Index route
 @app.get("/")
 async def home(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return templates.TemplateResponse("index.html", {"request": request, "stats": await dashboard_stats()})
 
 # Include video routes
 app.include_router(video_routes.router)
+app.include_router(api_routes.router)
@@ -0,0 +1,253 @@
+import time
+import threading
+import contextvars
+from bisect import bisect_left
+from jinja2 import Template
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Per-request DB and template time, accumulated while the request runs
+request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        # Some metrics are updated from the driver's executor threads
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            items = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self._values.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = ("le", _format_value(float(bound)))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            inf = ("le", "+Inf")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, inf)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    """Holds metrics plus collectors that produce samples at scrape time"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """collector() returns an iterable of (name, type, help, [(labels dict, value), ...])"""
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, metric_type, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    names = tuple(labels)
+                    lines.append(
+                        f"{name}{_format_labels(names, tuple(labels[n] for n in names))} {_format_value(value)}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status code",
+    ("method", "route", "status"),
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route"),
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ("method",),
+))
+http_request_db_duration = registry.register(Histogram(
+    "http_request_db_seconds", "Time spent in MongoDB commands per request",
+    ("method", "route"),
+))
+http_request_render_duration = registry.register(Histogram(
+    "http_request_render_seconds", "Time spent rendering templates per request",
+    ("method", "route"),
+))
+template_render_duration = registry.register(Histogram(
+    "template_render_seconds", "Template render time by template", ("template",),
+))
+mongodb_command_duration = registry.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by command name", ("command",),
+))
+mongodb_command_failures = registry.register(Counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands by command name", ("command",),
+))
+mongodb_pool_checkout_wait = registry.register(Histogram(
+    "mongodb_pool_checkout_wait_seconds", "Time spent waiting to check out a pooled connection",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+))
+
+
+def record_db_time(seconds):
+    """Called by the command listener (on driver threads) for each finished command"""
+    timings = request_timings.get()
+    if timings is not None:
+        timings["db"] += seconds
+
+
+class TimedTemplate(Template):
+    """Jinja template that records its render time"""
+
+    def render(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            template_render_duration.observe(self.name or "<string>", value=elapsed)
+            timings = request_timings.get()
+            if timings is not None:
+                timings["render"] += elapsed
+
+
+def instrument_templates(templates):
+    """Make a Jinja2Templates instance record render times (call before any template is loaded)"""
+    templates.env.template_class = TimedTemplate
+    return templates
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status codes and in-flight requests per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        root_path = scope.get("root_path", "")
+        status = {"code": 500}
+        timings = {"db": 0.0, "render": 0.0}
+        token = request_timings.set(timings)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec(method)
+            request_timings.reset(token)
+            route = self._route_label(scope, root_path)
+            http_requests_total.inc(method, route, str(status["code"]))
+            http_request_duration.observe(method, route, value=elapsed)
+            http_request_db_duration.observe(method, route, value=timings["db"])
+            http_request_render_duration.observe(method, route, value=timings["render"])
+
+    @staticmethod
+    def _route_label(scope, root_path):
+        # Route templates keep label cardinality bounded (/api/videos/{video_id}, not every id)
+        route = scope.get("route")
+        if route is not None and getattr(route, "path", None):
+            return route.path
+        # Mounted apps (e.g. /static) only extend root_path
+        mounted = scope.get("root_path", "")
+        if mounted and mounted != root_path:
+            return mounted
+        return "<unmatched>"
@@ -0,0 +1,162 @@
+"""Resumable, batched data migrations
+
+Migrations walk the collection in _id order, a batch per round trip, and
+checkpoint their position in the ``migrations`` collection after every
+batch. An interrupted run picks up from the last checkpoint. Run with:
+
+    python -m app.migrations durations                  # backfill duration_seconds
+    python -m app.migrations durations --batch-size 500
+    python -m app.migrations durations --restart        # ignore the checkpoint
+"""
+import os
+import sys
+import asyncio
+import argparse
+import logging
+from datetime import datetime
+from pymongo import UpdateOne
+from app.durations import is_bare_number, parse_duration
+from app.stats import reconcile_stats
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "1000"))
+# Unparseable (and bare-number) rows kept in the checkpoint document for review
+MIGRATION_MAX_REPORTED = int(os.getenv("MIGRATION_MAX_REPORTED", "100"))
+
+DURATIONS = "duration_seconds"
+
+
+def _new_state(name):
+    return {
+        "_id": name,
+        "status": "running",
+        "last_id": None,
+        "processed": 0,
+        "updated": 0,
+        "unparsed": 0,
+        "unparsed_rows": [],
+        "ambiguous": 0,
+        "ambiguous_rows": [],
+        "started_at": datetime.utcnow(),
+        "finished_at": None,
+    }
+
+
+def _report(state, kind, doc):
+    state[kind] += 1
+    if len(state[f"{kind}_rows"]) < MIGRATION_MAX_REPORTED:
+        state[f"{kind}_rows"].append({"_id": doc["_id"], "time": doc.get("time")})
+
+
+async def backfill_durations(collection, migrations, batch_size=None, restart=False, summary=None):
+    """Parse ``time`` into ``duration_seconds`` for existing videos
+
+    Returns the final checkpoint document. Rows whose time cannot be parsed
+    get ``duration_seconds: null``; bare numbers are read as minutes, like
+    the write path does, but may have meant seconds. Both are listed (up to
+    a cap) in the report. Changed rows get a new ``updated_at`` and
+    ``version`` like any other write, so their ETags and the list ETag change
+    and cached pages are not revalidated with 304. The bulk writes bypass the
+    stats deltas, so a run that changed rows ends with a stats reconcile (when
+    ``summary`` is given).
+    """
+    batch_size = batch_size or MIGRATION_BATCH_SIZE
+    state = None if restart else await migrations.find_one({"_id": DURATIONS})
+    if state is not None and state.get("status") == "done":
+        logger.info("✅ Migration %s already finished; use --restart to run it again", DURATIONS)
+        return state
+    if state is None:
+        state = _new_state(DURATIONS)
+    # Checkpoints saved before bare numbers were reported
+    state.setdefault("ambiguous", 0)
+    state.setdefault("ambiguous_rows", [])
+    total = await collection.estimated_document_count()
+
+    while True:
+        query = {"_id": {"$gt": state["last_id"]}} if state["last_id"] is not None else {}
+        batch = await collection.find(
+            query, {"time": 1, "duration_seconds": 1}
+        ).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+
+        updates = []
+        now = datetime.utcnow()
+        for doc in batch:
+            seconds = parse_duration(doc.get("time"))
+            if seconds is None:
+                _report(state, "unparsed", doc)
+            elif is_bare_number(doc.get("time")):
+                _report(state, "ambiguous", doc)
+            if "duration_seconds" in doc and doc["duration_seconds"] == seconds:
+                continue
+            # Matching on time leaves rows edited since the read to the write path
+            updates.append(UpdateOne(
+                {"_id": doc["_id"], "time": doc.get("time")},
+                {"$set": {"duration_seconds": seconds, "updated_at": now}, "$inc": {"version": 1}}
+            ))
+        if updates:
+            result = await collection.bulk_write(updates, ordered=False)
+            state["updated"] += result.modified_count
+
+        state["processed"] += len(batch)
+        state["last_id"] = batch[-1]["_id"]
+        state["updated_at"] = datetime.utcnow()
+        await migrations.replace_one({"_id": DURATIONS}, state, upsert=True)
+        percent = min(100.0, state["processed"] * 100 / total) if total else 100.0
+        logger.info(
+            "🔄 %s: %s/%s (%.1f%%), %s updated, %s unparsed",
+            DURATIONS, state["processed"], total, percent, state["updated"], state["unparsed"]
+        )
+
+    state["status"] = "done"
+    state["finished_at"] = datetime.utcnow()
+    await migrations.replace_one({"_id": DURATIONS}, state, upsert=True)
+    logger.info(
+        "✅ Migration %s finished: %s rows, %s unparsed, %s bare numbers read as minutes",
+        DURATIONS, state["processed"], state["unparsed"], state["ambiguous"]
+    )
+    if state["updated"] and summary is not None:
+        # Duration totals moved without deltas; this is expected, not drift
+        await reconcile_stats(collection, summary, report_drift=False)
+    return state
+
+
+MIGRATIONS = {"durations": backfill_durations}
+
+
+async def _main(argv):
+    from app import dbConnection
+
+    parser = argparse.ArgumentParser(prog="python -m app.migrations")
+    parser.add_argument("migration", choices=sorted(MIGRATIONS))
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    args = parser.parse_args(argv)
+
+    if not await dbConnection.connect_to_database():
+        print("❌ Could not connect to the database (is MONGO_URI set?)")
+        return 2
+    state = await MIGRATIONS[args.migration](
+        dbConnection.get_video_collection(),
+        dbConnection.db["migrations"],
+        batch_size=args.batch_size,
+        restart=args.restart,
+        summary=dbConnection.get_stats_collection(),
+    )
+    for kind, label in (("unparsed", "unparsed "), ("ambiguous", "minutes? ")):
+        rows = state.get(f"{kind}_rows", [])
+        for row in rows:
+            print(f"  {label} {row['_id']}: {row['time']!r}")
+        if state.get(kind, 0) > len(rows):
+            print(f"  ... and {state[kind] - len(rows)} more")
+    print(
+        f"{state['processed']} processed, {state['updated']} updated, {state['unparsed']} unparsed, "
+        f"{state.get('ambiguous', 0)} bare numbers read as minutes"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,279 @@
+import os
+import json
+import base64
+import logging
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import PyMongoError
+from app.repositories.base import StorageError
+
+logger = logging.getLogger(__name__)
+
+# Page size settings (overridable from the environment)
+DEFAULT_PAGE_SIZE = int(os.getenv("VIDEOS_PAGE_SIZE", "25"))
+MAX_PAGE_SIZE = int(os.getenv("VIDEOS_MAX_PAGE_SIZE", "100"))
+STREAM_BATCH_SIZE = int(os.getenv("VIDEOS_STREAM_BATCH_SIZE", "50"))
+
+# Only the fields list_videos.html renders (updated_at keys the row fragment cache)
+LIST_PROJECTION = {
+    "title": 1,
+    "description": 1,
+    "time": 1,
+    "url": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination token cannot be decoded"""
+
+
+class Page:
+    """One page of keyset-paginated results"""
+
+    error = None
+
+    def __init__(self, items, limit, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.limit = limit
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def clamp_page_size(limit):
+    """Keep a requested page size within the configured bounds"""
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def _page_query(after, before, filters, sort_field):
+    forward = before is None
+    cursor_filter = None
+    if after is not None or before is not None:
+        value, video_id = decode_cursor(after if forward else before)
+        cursor_filter = keyset_filter(value, video_id, sort_field, forward)
+    return _combine(filters, cursor_filter), forward
+
+
+def _page_projection(projection, sort_field):
+    if projection is None:
+        projection = LIST_PROJECTION
+    if projection and sort_field not in projection:
+        projection = {**projection, sort_field: 1}
+    return projection
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"t": "dt", "v": value.isoformat()}
+    return {"t": "raw", "v": value}
+
+
+def _decode_value(data):
+    if data.get("t") == "dt":
+        return datetime.fromisoformat(data["v"])
+    return data.get("v")
+
+
+def encode_cursor(doc, sort_field="created_at"):
+    """Build an opaque token pointing at a document's position in the sort order"""
+    payload = {"k": _encode_value(doc.get(sort_field)), "id": str(doc["_id"])}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Decode a token produced by encode_cursor into (sort value, ObjectId)"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return _decode_value(payload["k"]), ObjectId(payload["id"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise InvalidCursor("Invalid page cursor") from e
+
+
+def keyset_filter(value, video_id, sort_field="created_at", forward=True):
+    """Filter matching documents strictly past (value, _id) in descending order
+
+    forward=True walks towards older entries (the "after" direction),
+    forward=False walks back towards newer ones (the "before" direction).
+    """
+    op = "$lt" if forward else "$gt"
+    return {
+        "$or": [
+            {sort_field: {op: value}},
+            {sort_field: value, "_id": {op: video_id}},
+        ]
+    }
+
+
+def _combine(*filters):
+    parts = [f for f in filters if f]
+    if not parts:
+        return {}
+    if len(parts) == 1:
+        return parts[0]
+    return {"$and": parts}
+
+
+async def fetch_page(
+    collection,
+    after=None,
+    before=None,
+    limit=None,
+    projection=None,
+    filters=None,
+    sort_field="created_at",
+):
+    """Fetch one page sorted by (sort_field, _id) descending using keyset pagination
+
+    Each page is a single bounded index range scan, so the cost of a page does
+    not grow with how deep into the collection it sits.
+    """
+    limit = clamp_page_size(limit)
+    projection = _page_projection(projection, sort_field)
+    query, forward = _page_query(after, before, filters, sort_field)
+
+    direction = -1 if forward else 1
+    cursor = (
+        collection.find(query, projection)
+        .sort([(sort_field, direction), ("_id", direction)])
+        .limit(limit + 1)
+    )
+    items = await cursor.to_list(limit + 1)
+    return build_page(items, limit, forward, after, sort_field)
+
+
+async def fetch_text_page(
+    collection,
+    text,
+    after=None,
+    before=None,
+    limit=None,
+    projection=None,
+    filters=None,
+):
+    """Fetch one page of $text matches ranked by relevance, keyset-paginated over (score, _id)
+
+    $text has to sit in the first $match, so the keyset condition on the
+    computed score is applied in a second $match after $addFields.
+    """
+    limit = clamp_page_size(limit)
+    projection = _page_projection(projection, "score")
+    cursor_filter, forward = _page_query(after, before, None, "score")
+    direction = -1 if forward else 1
+
+    pipeline = [
+        {"$match": _combine({"$text": {"$search": text}}, filters)},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+    ]
+    if cursor_filter:
+        pipeline.append({"$match": cursor_filter})
+    pipeline += [
+        {"$sort": {"score": direction, "_id": direction}},
+        {"$limit": limit + 1},
+        {"$project": projection},
+    ]
+    items = await collection.aggregate(pipeline).to_list(limit + 1)
+    return build_page(items, limit, forward, after, "score")
+
+
+def build_page(items, limit, forward, after, sort_field):
+    has_more = len(items) > limit
+    items = items[:limit]
+    if not forward:
+        items.reverse()
+
+    next_cursor = prev_cursor = None
+    if items:
+        if (forward and has_more) or not forward:
+            next_cursor = encode_cursor(items[-1], sort_field)
+        if (not forward and has_more) or (forward and after is not None):
+            prev_cursor = encode_cursor(items[0], sort_field)
+
+    return Page(items, limit, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+
+class StreamingPage:
+    """A forward page whose rows are pulled from a live cursor while it is rendered
+
+    The first row is fetched up front by open_stream_page so empty pages and
+    early failures are known before the response starts. Failures after that
+    are recorded on ``error`` instead of raised, because the status line has
+    already gone out by then.
+    """
+
+    prev_cursor = None
+    next_cursor = None
+    error = None
+
+    def __init__(self, cursor, limit, after=None, sort_field="created_at"):
+        self._cursor = cursor
+        self._after = after
+        self._sort_field = sort_field
+        self._first = None
+        self.limit = limit
+
+    async def _fetch(self):
+        try:
+            return await self._cursor.next()
+        except StopAsyncIteration:
+            return None
+        except PyMongoError as e:
+            raise StorageError(str(e)) from e
+
+    async def prime(self):
+        self._first = await self._fetch()
+        if self._first is not None and self._after is not None:
+            self.prev_cursor = encode_cursor(self._first, self._sort_field)
+        return self
+
+    def __bool__(self):
+        return self._first is not None
+
+    async def __aiter__(self):
+        doc = self._first
+        last = None
+        count = 0
+        try:
+            while doc is not None and count < self.limit:
+                yield doc
+                last = doc
+                count += 1
+                doc = await self._fetch()
+            if doc is not None and last is not None:
+                self.next_cursor = encode_cursor(last, self._sort_field)
+        except StorageError as e:
+            logger.error("Database error while streaming videos: %s", e)
+            self.error = "Failed to load the remaining videos"
+
+
+async def open_stream_page(
+    collection,
+    after=None,
+    limit=None,
+    projection=None,
+    filters=None,
+    sort_field="created_at",
+    batch_size=None,
+):
+    """Open a cursor for one forward page and fetch its first row"""
+    limit = clamp_page_size(limit)
+    projection = _page_projection(projection, sort_field)
+    query, _ = _page_query(after, None, filters, sort_field)
+    cursor = (
+        collection.find(query, projection)
+        .sort([(sort_field, -1), ("_id", -1)])
+        .limit(limit + 1)
+        .batch_size(batch_size or STREAM_BATCH_SIZE)
+    )
+    return await StreamingPage(cursor, limit, after=after, sort_field=sort_field).prime()
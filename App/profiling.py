@@ -0,0 +1,135 @@
+"""Opt-in sampling profiler for slow /videos requests
+
+With PROFILING_ENABLED=true, a request to a /videos or /api/videos route is
+profiled when it carries the PROFILING_HEADER header (whose value must equal
+PROFILING_TOKEN when one is set) or, at random, for PROFILING_SAMPLE_RATE of
+requests. pyinstrument samples the stack every PROFILING_INTERVAL seconds
+while the request runs, following it across awaits. Profiles of requests
+slower than PROFILING_SLOW_MS, and every header-triggered one, are written
+to PROFILING_DIR as speedscope flame graphs (or HTML).
+
+One request per process is profiled at a time, so the overhead stays
+bounded whatever the sample rate. pyinstrument is optional
+(pip install pyinstrument); without it the hook stays off.
+"""
+import os
+import re
+import time
+import random
+import logging
+import anyio
+from datetime import datetime
+from starlette.datastructures import Headers
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+except ImportError:  # optional profiler
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+
+# Profiling settings (overridable from the environment)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_HEADER = os.getenv("PROFILING_HEADER", "X-Profile").lower()
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILING_SLOW_MS = float(os.getenv("PROFILING_SLOW_MS", "250"))
+PROFILING_INTERVAL = float(os.getenv("PROFILING_INTERVAL", "0.001"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", "/tmp/profiles")
+PROFILING_FORMAT = os.getenv("PROFILING_FORMAT", "speedscope").lower()
+# Oldest profiles are deleted beyond this many
+PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", "200"))
+PROFILED_PREFIXES = ("/videos", "/api/videos")
+
+# Output format -> file extension
+PROFILE_EXTENSIONS = {"speedscope": "speedscope.json", "html": "html"}
+
+# Profiled requests by outcome, exported as http_profiles_total
+counts = {"saved": 0, "fast": 0}
+
+
+def _filename(scope, elapsed_ms):
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+    extension = PROFILE_EXTENSIONS[PROFILING_FORMAT]
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    return f"{stamp}-{scope['method']}-{slug}-{elapsed_ms:.0f}ms.{extension}"
+
+
+def _write(profiler, filename):
+    """Render and save one profile, then prune the oldest (runs on a worker thread)"""
+    os.makedirs(PROFILING_DIR, exist_ok=True)
+    renderer = SpeedscopeRenderer() if PROFILING_FORMAT == "speedscope" else HTMLRenderer()
+    path = os.path.join(PROFILING_DIR, filename)
+    with open(path, "w", encoding="utf-8") as output:
+        output.write(profiler.output(renderer))
+    saved = sorted(name for name in os.listdir(PROFILING_DIR) if not name.startswith("."))
+    for name in saved[:-PROFILING_MAX_FILES]:
+        try:
+            os.remove(os.path.join(PROFILING_DIR, name))
+        except OSError:
+            pass
+    return path
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling sampled or header-triggered /videos requests"""
+
+    def __init__(self, app):
+        self.app = app
+        self.enabled = PROFILING_ENABLED
+        if self.enabled and Profiler is None:
+            logger.warning("⚠️ PROFILING_ENABLED is set but pyinstrument is not installed; profiling is off")
+            self.enabled = False
+        if self.enabled and PROFILING_FORMAT not in PROFILE_EXTENSIONS:
+            logger.warning("⚠️ Unknown PROFILING_FORMAT %r; profiling is off", PROFILING_FORMAT)
+            self.enabled = False
+        self.busy = False
+
+    def _requested(self, scope):
+        value = Headers(scope=scope).get(PROFILING_HEADER)
+        if value is None:
+            return False
+        return not PROFILING_TOKEN or value == PROFILING_TOKEN
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not self.enabled
+            or self.busy
+            or scope["type"] != "http"
+            or not scope["path"].startswith(PROFILED_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+        forced = self._requested(scope)
+        if not forced and random.random() >= PROFILING_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        self.busy = True
+        profiler = Profiler(interval=PROFILING_INTERVAL, async_mode="enabled")
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            self.busy = False
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if forced or elapsed_ms >= PROFILING_SLOW_MS:
+                try:
+                    path = await anyio.to_thread.run_sync(_write, profiler, _filename(scope, elapsed_ms))
+                    counts["saved"] += 1
+                    logger.info("Profiled %s %s (%.0f ms): %s", scope["method"], scope["path"], elapsed_ms, path)
+                except OSError as e:
+                    logger.warning("⚠️ Failed to save profile: %s", e)
+            else:
+                counts["fast"] += 1
+
+
+def metrics_samples():
+    """Profiler counters for the /metrics endpoint"""
+    return [
+        ("http_profiles_total", "counter", "Profiled requests, by whether the profile was saved",
+         [({"outcome": outcome}, count) for outcome, count in counts.items()]),
+    ]
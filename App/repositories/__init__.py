@@ -0,0 +1,4 @@
+"""Storage backends for videos (selected by STORAGE_BACKEND in app.dbConnection)"""
+from app.repositories.base import StorageError, VideoRepository
+
+__all__ = ["StorageError", "VideoRepository"]
@@ -0,0 +1,73 @@
+class StorageError(Exception):
+    """A storage backend failed to read or write (wraps the driver's own error)"""
+
+
+class VideoRepository:
+    """Storage interface for videos, shared by every backend
+
+    Documents are plain dicts shaped like the MongoDB documents (``_id`` is an
+    ObjectId, timestamps are naive UTC datetimes). Filters use the small MongoDB
+    query subset produced by VideoSearch.filters() and BulkFilter.to_query().
+    ``expected`` is an optimistic concurrency check as returned by
+    parse_if_match()/parse_form_version(): None or "*" for unconditional writes.
+    Failures are raised as StorageError.
+    """
+
+    backend = None
+
+    async def ping(self):
+        """Round trip to the store; raises StorageError when it is unreachable"""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+    # ======= READS =======
+    async def get(self, video_id, projection=None):
+        """One video by _id, or None"""
+        raise NotImplementedError
+
+    async def list_page(self, search=None, after=None, before=None, limit=None, projection=None):
+        """One keyset-paginated Page for a VideoSearch (or the whole collection)"""
+        raise NotImplementedError
+
+    async def open_stream_page(self, search=None, after=None, limit=None, projection=None):
+        """A primed StreamingPage for one forward page (not used for text search)"""
+        raise NotImplementedError
+
+    def iter_batches(self, search=None, projection=None, batch_size=1000):
+        """Async iterator over every matching video in list order, in lists of up to batch_size"""
+        raise NotImplementedError
+
+    async def change_marker(self):
+        """(document count, newest updated_at) - moves on every insert, update and delete"""
+        raise NotImplementedError
+
+    async def stats(self, days=14, weeks=8):
+        """Collection statistics as returned by app.stats.format_stats"""
+        raise NotImplementedError
+
+    # ======= WRITES =======
+    async def insert(self, document):
+        """Insert a new video; sets and returns its _id"""
+        raise NotImplementedError
+
+    async def insert_many(self, documents):
+        """Unordered insert; returns (inserted count, [(index, error message)])"""
+        raise NotImplementedError
+
+    async def update(self, video_id, fields, expected=None, projection=None):
+        """Set ``fields`` and bump the version; returns the video as it was before, or None"""
+        raise NotImplementedError
+
+    async def delete(self, video_id, expected=None, projection=None):
+        """Delete one video; returns the deleted video, or None"""
+        raise NotImplementedError
+
+    async def bulk_update(self, fields, ids=None, query=None):
+        """Set ``fields`` on a list of ids or on everything matching ``query``"""
+        raise NotImplementedError
+
+    async def bulk_delete(self, ids=None, query=None):
+        """Delete a list of ids or everything matching ``query``"""
+        raise NotImplementedError
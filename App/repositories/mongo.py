@@ -0,0 +1,143 @@
+import asyncio
+import functools
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, PyMongoError
+from app.bulk import bulk_delete, bulk_update
+from app.pagination import open_stream_page
+from app.repositories.base import StorageError, VideoRepository
+from app.search import search_page
+from app.stats import get_stats
+from app.versioning import version_filter
+
+
+def _storage_errors(method):
+    """Re-raise driver errors as StorageError so handlers do not depend on the backend"""
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await method(*args, **kwargs)
+        except PyMongoError as e:
+            raise StorageError(str(e)) from e
+    return wrapper
+
+
+class MongoVideoRepository(VideoRepository):
+    """Videos in a MongoDB collection, through Motor"""
+
+    backend = "mongodb"
+
+    def __init__(self, collection, stats_collection=None):
+        self.collection = collection
+        self.stats_collection = stats_collection
+
+    @_storage_errors
+    async def ping(self):
+        await self.collection.database.command("ping")
+
+    @_storage_errors
+    async def get(self, video_id, projection=None):
+        return await self.collection.find_one({"_id": video_id}, projection)
+
+    @_storage_errors
+    async def list_page(self, search=None, after=None, before=None, limit=None, projection=None):
+        return await search_page(
+            self.collection, search, after=after, before=before, limit=limit, projection=projection
+        )
+
+    @_storage_errors
+    async def open_stream_page(self, search=None, after=None, limit=None, projection=None):
+        return await open_stream_page(
+            self.collection,
+            after=after,
+            limit=limit,
+            projection=projection,
+            filters=search.filters() if search is not None else None,
+            sort_field=search.sort_field if search is not None else "created_at",
+        )
+
+    async def iter_batches(self, search=None, projection=None, batch_size=1000):
+        filters = dict(search.filters()) if search is not None else {}
+        if search is not None and search.q:
+            filters["$text"] = {"$search": search.q}
+        sort_field = search.sort_field if search is not None else "created_at"
+        cursor = (
+            self.collection.find(filters, projection)
+            .sort([(sort_field, -1), ("_id", -1)])
+            .batch_size(batch_size)
+        )
+        try:
+            # to_list(n) hands over one server batch at a time instead of awaiting every document
+            while True:
+                batch = await cursor.to_list(batch_size)
+                if not batch:
+                    break
+                yield batch
+        except PyMongoError as e:
+            raise StorageError(str(e)) from e
+        finally:
+            await cursor.close()
+
+    @_storage_errors
+    async def change_marker(self):
+        # Any insert or update moves the newest updated_at and enrichment the newest fetched_at
+        # (both index backed); deletes change the count
+        newest, enriched, count = await asyncio.gather(
+            self.collection.find_one({}, {"updated_at": 1}, sort=[("updated_at", -1)]),
+            self.collection.find_one(
+                {"enrichment.fetched_at": {"$exists": True}}, {"enrichment.fetched_at": 1},
+                sort=[("enrichment.fetched_at", -1)]
+            ),
+            self.collection.estimated_document_count(),
+        )
+        stamps = [
+            newest.get("updated_at") if newest else None,
+            enriched["enrichment"]["fetched_at"] if enriched else None,
+        ]
+        stamps = [stamp for stamp in stamps if stamp is not None]
+        return count, max(stamps) if stamps else None
+
+    @_storage_errors
+    async def stats(self, days=14, weeks=8):
+        return await get_stats(self.collection, self.stats_collection, days=days, weeks=weeks)
+
+    @_storage_errors
+    async def insert(self, document):
+        result = await self.collection.insert_one(document)
+        return result.inserted_id
+
+    @_storage_errors
+    async def insert_many(self, documents):
+        try:
+            result = await self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            details = e.details
+            errors = [
+                (write_error["index"], write_error.get("errmsg", "Write failed"))
+                for write_error in details.get("writeErrors", [])
+            ]
+            return details.get("nInserted", 0), errors
+        return len(result.inserted_ids), []
+
+    @_storage_errors
+    async def update(self, video_id, fields, expected=None, projection=None):
+        return await self.collection.find_one_and_update(
+            {"_id": video_id, **version_filter(expected)},
+            {"$set": fields, "$inc": {"version": 1}},
+            projection=projection,
+            return_document=ReturnDocument.BEFORE
+        )
+
+    @_storage_errors
+    async def delete(self, video_id, expected=None, projection=None):
+        return await self.collection.find_one_and_delete(
+            {"_id": video_id, **version_filter(expected)},
+            projection=projection
+        )
+
+    @_storage_errors
+    async def bulk_update(self, fields, ids=None, query=None):
+        return await bulk_update(self.collection, fields, ids=ids, query=query)
+
+    @_storage_errors
+    async def bulk_delete(self, ids=None, query=None):
+        return await bulk_delete(self.collection, ids=ids, query=query)
@@ -0,0 +1,536 @@
+"""SQLite storage for single-node and edge deployments
+
+One database file in WAL mode: readers never block the writer or each other,
+so a read is a local B-tree lookup with no network round trip. sqlite3 is
+blocking, so calls run on threads: a small pool of read-only connections and
+one writer thread (SQLite allows one writer at a time anyway). Title and
+description search uses an FTS5 index ranked by bm25 with the title weighted
+3x, like the MongoDB text index. Triggers keep the statistics tables exact,
+so there is nothing to reconcile.
+"""
+import os
+import re
+import asyncio
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from bson import ObjectId
+from app.pagination import (
+    LIST_PROJECTION,
+    StreamingPage,
+    build_page,
+    clamp_page_size,
+    decode_cursor,
+    encode_cursor,
+)
+from app.repositories.base import StorageError, VideoRepository
+from app.stats import format_stats
+
+logger = logging.getLogger(__name__)
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", "data/videos.sqlite3")
+SQLITE_READ_THREADS = int(os.getenv("SQLITE_READ_THREADS", "4"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+COLUMNS = (
+    "_id", "title", "title_lower", "description", "time", "duration_seconds",
+    "url", "created_at", "updated_at", "version",
+)
+SELECT_COLUMNS = ", ".join(COLUMNS)
+# Fields a write may set (the version is bumped by the repository itself)
+WRITABLE = {"title", "title_lower", "description", "time", "duration_seconds", "url", "updated_at"}
+FILTERABLE = {"_id", "title", "title_lower", "created_at", "updated_at", "duration_seconds", "version"}
+TIMESTAMPS = ("created_at", "updated_at")
+COMPARISONS = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+# Ids per statement for bulk writes (stays under SQLite's bound-parameter limit)
+BULK_CHUNK_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    _id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    title_lower TEXT NOT NULL,
+    description TEXT NOT NULL,
+    time TEXT,
+    duration_seconds INTEGER,
+    url TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    updated_at INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS videos_created_at ON videos (created_at DESC, _id DESC);
+CREATE INDEX IF NOT EXISTS videos_title_lower ON videos (title_lower);
+CREATE INDEX IF NOT EXISTS videos_updated_at ON videos (updated_at DESC);
+CREATE INDEX IF NOT EXISTS videos_duration ON videos (duration_seconds DESC, _id DESC);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+    title, description, content='videos', content_rowid='rowid', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS videos_fts_insert AFTER INSERT ON videos BEGIN
+    INSERT INTO videos_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS videos_fts_delete AFTER DELETE ON videos BEGIN
+    INSERT INTO videos_fts (videos_fts, rowid, title, description)
+    VALUES ('delete', old.rowid, old.title, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS videos_fts_update AFTER UPDATE OF title, description ON videos BEGIN
+    INSERT INTO videos_fts (videos_fts, rowid, title, description)
+    VALUES ('delete', old.rowid, old.title, old.description);
+    INSERT INTO videos_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description);
+END;
+
+CREATE TABLE IF NOT EXISTS video_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    count INTEGER NOT NULL,
+    duration_total INTEGER NOT NULL,
+    duration_count INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO video_stats (id, count, duration_total, duration_count) VALUES (1, 0, 0, 0);
+CREATE TABLE IF NOT EXISTS video_added_per_day (
+    day TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS video_stats_insert AFTER INSERT ON videos BEGIN
+    UPDATE video_stats SET
+        count = count + 1,
+        duration_total = duration_total + coalesce(new.duration_seconds, 0),
+        duration_count = duration_count + (new.duration_seconds IS NOT NULL)
+    WHERE id = 1;
+    INSERT INTO video_added_per_day (day, count) VALUES (date(new.created_at / 1000000, 'unixepoch'), 1)
+    ON CONFLICT (day) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS video_stats_delete AFTER DELETE ON videos BEGIN
+    UPDATE video_stats SET
+        count = count - 1,
+        duration_total = duration_total - coalesce(old.duration_seconds, 0),
+        duration_count = duration_count - (old.duration_seconds IS NOT NULL)
+    WHERE id = 1;
+    UPDATE video_added_per_day SET count = count - 1 WHERE day = date(old.created_at / 1000000, 'unixepoch');
+END;
+CREATE TRIGGER IF NOT EXISTS video_stats_update AFTER UPDATE OF duration_seconds ON videos BEGIN
+    UPDATE video_stats SET
+        duration_total = duration_total - coalesce(old.duration_seconds, 0) + coalesce(new.duration_seconds, 0),
+        duration_count = duration_count - (old.duration_seconds IS NOT NULL) + (new.duration_seconds IS NOT NULL)
+    WHERE id = 1;
+END;
+"""
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_micros(value):
+    return (value - EPOCH) // MICROSECOND
+
+
+def _from_micros(value):
+    return EPOCH + timedelta(microseconds=value)
+
+
+def _param(value):
+    """Python/BSON value -> SQLite value (timestamps are stored as UTC microseconds)"""
+    if isinstance(value, datetime):
+        return _to_micros(value)
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
+
+
+def _document(row):
+    doc = dict(zip(COLUMNS, row))
+    doc["_id"] = ObjectId(doc["_id"])
+    for name in TIMESTAMPS:
+        doc[name] = _from_micros(doc[name])
+    return doc
+
+
+def _project(doc, projection, keep=None):
+    if not projection:
+        return doc
+    projected = {name: doc[name] for name in projection if name in doc}
+    projected["_id"] = doc["_id"]
+    if keep is not None and keep in doc:
+        projected[keep] = doc[keep]
+    return projected
+
+
+def _where(filters, table=""):
+    """Translate the MongoDB filter subset used by searches and bulk filters into SQL"""
+    clauses = []
+    params = []
+    for field, condition in (filters or {}).items():
+        if field == "$and":
+            for part in condition:
+                sql, part_params = _where(part, table)
+                if sql:
+                    clauses.append(sql)
+                    params.extend(part_params)
+            continue
+        if field not in FILTERABLE:
+            raise StorageError(f"Unsupported filter field for SQLite: {field}")
+        column = f"{table}{field}"
+        if not isinstance(condition, dict):
+            clauses.append(f"{column} = ?")
+            params.append(_param(condition))
+            continue
+        for operator, value in condition.items():
+            if operator in COMPARISONS:
+                clauses.append(f"{column} {COMPARISONS[operator]} ?")
+                params.append(_param(value))
+            elif operator == "$in":
+                values = [_param(item) for item in value if item is not None]
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})" if values else "0")
+                params.extend(values)
+            elif operator == "$type" and value == "number":
+                clauses.append(f"{column} IS NOT NULL")
+            elif operator == "$regex" and value.startswith("^"):
+                # Anchored prefix from re.escape(): an index range scan instead of a regex
+                prefix = re.sub(r"\\(.)", r"\1", value[1:])
+                clauses.append(f"{column} >= ? AND {column} < ?")
+                params.extend([prefix, prefix + "\U0010ffff"])
+            else:
+                raise StorageError(f"Unsupported filter operator for SQLite: {operator}")
+    return " AND ".join(clauses), params
+
+
+def _version_clause(expected):
+    if expected is None or expected == "*":
+        return "", []
+    versions = list(expected)
+    return f" AND version IN ({', '.join('?' * len(versions))})", versions
+
+
+def _match_expression(text):
+    """Any-term FTS5 query, like MongoDB $text (terms are quoted so input cannot inject syntax)"""
+    return " OR ".join(f'"{term}"' for term in re.findall(r"\w+", text))
+
+
+def _chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class _RowCursor:
+    """Already fetched rows behind the async cursor interface StreamingPage expects"""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+
+    async def next(self):
+        try:
+            return next(self._rows)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class SQLiteVideoRepository(VideoRepository):
+    """Videos in a local SQLite database (WAL mode, FTS5 search)"""
+
+    backend = "sqlite"
+
+    def __init__(self, path=None, read_threads=None):
+        self.path = path or SQLITE_PATH
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._readers = ThreadPoolExecutor(
+            max_workers=read_threads or SQLITE_READ_THREADS, thread_name_prefix="sqlite-read"
+        )
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-write")
+
+    @classmethod
+    async def open(cls, path=None, read_threads=None):
+        repository = cls(path, read_threads)
+        os.makedirs(os.path.dirname(os.path.abspath(repository.path)), exist_ok=True)
+        await repository._write(repository._create_schema)
+        logger.info("✅ SQLite storage ready at %s", repository.path)
+        return repository
+
+    # ======= CONNECTIONS =======
+    def _connection(self, readonly):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # check_same_thread=False only so close() can close every thread's connection
+            connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            connection.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+            if readonly:
+                connection.execute("PRAGMA query_only = ON")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _run(self, readonly, function, args):
+        try:
+            connection = self._connection(readonly)
+            if readonly:
+                return function(connection, *args)
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = function(connection, *args)
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+            return result
+        except sqlite3.Error as e:
+            raise StorageError(str(e)) from e
+
+    async def _read(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._run, True, function, args)
+
+    async def _write(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, self._run, False, function, args)
+
+    def _create_schema(self, connection):
+        # journal_mode cannot change inside a transaction
+        connection.execute("COMMIT")
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.executescript(SCHEMA)
+        connection.execute("BEGIN IMMEDIATE")
+
+    async def close(self):
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+
+    # ======= READS =======
+    async def ping(self):
+        await self._read(lambda connection: connection.execute("SELECT 1").fetchone())
+
+    async def get(self, video_id, projection=None):
+        def select(connection):
+            row = connection.execute(
+                f"SELECT {SELECT_COLUMNS} FROM videos WHERE _id = ?", (str(video_id),)
+            ).fetchone()
+            return _project(_document(row), projection) if row else None
+        return await self._read(select)
+
+    def _select_page(self, connection, search, after, before, limit, projection):
+        sort_field = search.sort_field if search is not None else "created_at"
+        forward = before is None
+        where, params = _where(search.filters() if search is not None else None)
+        clauses = [where] if where else []
+        if search is not None and search.q:
+            # Only exports get here with q (pages use the ranked query); match, keep the sort order
+            expression = _match_expression(search.q)
+            if expression:
+                clauses.append("rowid IN (SELECT rowid FROM videos_fts WHERE videos_fts MATCH ?)")
+                params.append(expression)
+            else:
+                clauses.append("0")
+        if after is not None or before is not None:
+            value, video_id = decode_cursor(after if forward else before)
+            op = "<" if forward else ">"
+            clauses.append(f"({sort_field} {op} ? OR ({sort_field} = ? AND _id {op} ?))")
+            params += [_param(value), _param(value), str(video_id)]
+        direction = "DESC" if forward else "ASC"
+        sql = f"SELECT {SELECT_COLUMNS} FROM videos"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {sort_field} {direction}, _id {direction} LIMIT ?"
+        rows = connection.execute(sql, params + [limit + 1]).fetchall()
+        items = [_project(_document(row), projection or LIST_PROJECTION, keep=sort_field) for row in rows]
+        return items, forward, sort_field
+
+    def _select_text_page(self, connection, search, after, before, limit, projection):
+        expression = _match_expression(search.q)
+        forward = before is None
+        if not expression:
+            return [], forward
+        where, params = _where(search.filters(), table="v.")
+        sql = (
+            f"SELECT * FROM (SELECT {', '.join('v.' + name for name in COLUMNS)}, "
+            "-bm25(videos_fts, 3.0, 1.0) AS score "
+            "FROM videos_fts JOIN videos v ON v.rowid = videos_fts.rowid WHERE videos_fts MATCH ?"
+        )
+        params = [expression] + params
+        if where:
+            sql += " AND " + where
+        sql += ")"
+        if after is not None or before is not None:
+            value, video_id = decode_cursor(after if forward else before)
+            op = "<" if forward else ">"
+            sql += f" WHERE (score {op} ? OR (score = ? AND _id {op} ?))"
+            params += [value, value, str(video_id)]
+        direction = "DESC" if forward else "ASC"
+        sql += f" ORDER BY score {direction}, _id {direction} LIMIT ?"
+        rows = connection.execute(sql, params + [limit + 1]).fetchall()
+        items = []
+        for row in rows:
+            doc = _project(_document(row[:-1]), projection or LIST_PROJECTION)
+            doc["score"] = row[-1]
+            items.append(doc)
+        return items, forward
+
+    async def list_page(self, search=None, after=None, before=None, limit=None, projection=None):
+        limit = clamp_page_size(limit)
+        if search is not None and search.q:
+            items, forward = await self._read(self._select_text_page, search, after, before, limit, projection)
+            return build_page(items, limit, forward, after, "score")
+        items, forward, sort_field = await self._read(self._select_page, search, after, before, limit, projection)
+        return build_page(items, limit, forward, after, sort_field)
+
+    async def open_stream_page(self, search=None, after=None, limit=None, projection=None):
+        # Local reads are fast enough to fetch the page up front and stream the rendering only
+        limit = clamp_page_size(limit)
+        items, _, sort_field = await self._read(self._select_page, search, after, None, limit, projection)
+        return await StreamingPage(_RowCursor(items), limit, after=after, sort_field=sort_field).prime()
+
+    async def iter_batches(self, search=None, projection=None, batch_size=1000):
+        # Keyset batches, each its own short read, so no read transaction stays open for the export
+        projection = projection or {name: 1 for name in COLUMNS if name != "title_lower"}
+        after = None
+        while True:
+            items, _, sort_field = await self._read(self._select_page, search, after, None, batch_size, projection)
+            if items[:batch_size]:
+                yield items[:batch_size]
+            if len(items) <= batch_size:
+                break
+            after = encode_cursor(items[batch_size - 1], sort_field)
+
+    async def change_marker(self):
+        def select(connection):
+            return connection.execute(
+                "SELECT (SELECT count FROM video_stats WHERE id = 1), (SELECT max(updated_at) FROM videos)"
+            ).fetchone()
+        count, newest = await self._read(select)
+        return count or 0, _from_micros(newest) if newest is not None else None
+
+    async def stats(self, days=14, weeks=8):
+        now = datetime.utcnow()
+        since = (now - timedelta(days=max(days, weeks * 7))).strftime("%Y-%m-%d")
+
+        def select(connection):
+            totals = connection.execute(
+                "SELECT count, duration_total, duration_count FROM video_stats WHERE id = 1"
+            ).fetchone() or (0, 0, 0)
+            per_day = connection.execute(
+                "SELECT day, count FROM video_added_per_day WHERE day >= ? AND count > 0", (since,)
+            ).fetchall()
+            return totals, per_day
+
+        (count, duration_total, duration_count), per_day = await self._read(select)
+        summary = {
+            "count": count,
+            "duration_total": duration_total,
+            "duration_count": duration_count,
+            "added_per_day": dict(per_day),
+            "updated_at": now,
+        }
+        return format_stats(summary, days=days, weeks=weeks, now=now)
+
+    # ======= WRITES =======
+    @staticmethod
+    def _insert_row(connection, document):
+        document.setdefault("_id", ObjectId())
+        values = [_param(document.get(name)) for name in COLUMNS]
+        connection.execute(
+            f"INSERT INTO videos ({SELECT_COLUMNS}) VALUES ({', '.join('?' * len(COLUMNS))})", values
+        )
+        return document["_id"]
+
+    async def insert(self, document):
+        return await self._write(self._insert_row, document)
+
+    async def insert_many(self, documents):
+        def insert_all(connection):
+            inserted = 0
+            errors = []
+            for index, document in enumerate(documents):
+                try:
+                    self._insert_row(connection, document)
+                    inserted += 1
+                except sqlite3.IntegrityError as e:
+                    # A failed statement is undone on its own; the rest of the batch still commits
+                    errors.append((index, str(e)))
+            return inserted, errors
+        return await self._write(insert_all)
+
+    @staticmethod
+    def _assignments(fields):
+        unknown = set(fields) - WRITABLE
+        if unknown:
+            raise StorageError(f"Unsupported update fields: {', '.join(sorted(unknown))}")
+        sql = ", ".join(f"{name} = ?" for name in fields) + ", version = version + 1"
+        return sql, [_param(value) for value in fields.values()]
+
+    async def update(self, video_id, fields, expected=None, projection=None):
+        assignments, values = self._assignments(fields)
+        version_sql, versions = _version_clause(expected)
+
+        def update_one(connection):
+            row = connection.execute(
+                f"SELECT {SELECT_COLUMNS} FROM videos WHERE _id = ?{version_sql}", [str(video_id)] + versions
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(f"UPDATE videos SET {assignments} WHERE _id = ?", values + [str(video_id)])
+            return _project(_document(row), projection)
+        return await self._write(update_one)
+
+    async def delete(self, video_id, expected=None, projection=None):
+        version_sql, versions = _version_clause(expected)
+
+        def delete_one(connection):
+            row = connection.execute(
+                f"SELECT {SELECT_COLUMNS} FROM videos WHERE _id = ?{version_sql}", [str(video_id)] + versions
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute("DELETE FROM videos WHERE _id = ?", (str(video_id),))
+            return _project(_document(row), projection)
+        return await self._write(delete_one)
+
+    async def bulk_update(self, fields, ids=None, query=None):
+        assignments, values = self._assignments({**fields, "updated_at": datetime.utcnow()})
+
+        def update_many(connection):
+            matched = chunks = 0
+            if ids is not None:
+                for chunk in _chunked([str(video_id) for video_id in ids], BULK_CHUNK_SIZE):
+                    cursor = connection.execute(
+                        f"UPDATE videos SET {assignments} WHERE _id IN ({', '.join('?' * len(chunk))})",
+                        values + chunk
+                    )
+                    matched += cursor.rowcount
+                    chunks += 1
+            else:
+                where, params = _where(query)
+                cursor = connection.execute(f"UPDATE videos SET {assignments} WHERE {where or '1'}", values + params)
+                matched, chunks = cursor.rowcount, 1
+            return {"matched": matched, "modified": matched, "chunks": chunks}
+
+        result = await self._write(update_many)
+        logger.info("Bulk update finished: %s matched in %s statements", result["matched"], result["chunks"])
+        return result
+
+    async def bulk_delete(self, ids=None, query=None):
+        def delete_many(connection):
+            deleted = chunks = 0
+            if ids is not None:
+                for chunk in _chunked([str(video_id) for video_id in ids], BULK_CHUNK_SIZE):
+                    cursor = connection.execute(
+                        f"DELETE FROM videos WHERE _id IN ({', '.join('?' * len(chunk))})", chunk
+                    )
+                    deleted += cursor.rowcount
+                    chunks += 1
+            else:
+                where, params = _where(query)
+                cursor = connection.execute(f"DELETE FROM videos WHERE {where or '1'}", params)
+                deleted, chunks = cursor.rowcount, 1
+            return {"deleted": deleted, "chunks": chunks}
+
+        result = await self._write(delete_many)
+        logger.info("Bulk delete finished: %s deleted in %s statements", result["deleted"], result["chunks"])
+        return result
@@ -0,0 +1,456 @@
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from bson import ObjectId
+from bson.errors import InvalidId
+from pydantic import BaseModel, validator
+from typing import List, Optional
+from datetime import datetime
+import logging
+from app.dbConnection import get_video_repository
+from app.pagination import DEFAULT_PAGE_SIZE, InvalidCursor
+from app.repositories import StorageError
+from app.cache import cached_page, cached_video, invalidate_videos
+from app.search import InvalidSearch, VideoSearch
+from app.serialization import VideoJSONResponse
+from app.conditional import collection_etag, is_not_modified, not_modified_response, validator_headers
+from app.versioning import document_version, etag_for, last_modified_for, parse_if_match
+from app.enrichment import enqueue_enrichment
+from app.stats import record_added, record_duration_change, record_removed, request_reconcile
+from app.exporter import EXPORT_FORMATS, clamp_batch_size, export_chunks, gzip_chunks
+from app.importer import (
+    ImportReport,
+    import_videos,
+    iter_csv_records,
+    iter_lines,
+    iter_ndjson_records,
+)
+from app.routes.video_routes import (
+    VideoCreate,
+    VideoUpdate,
+    build_video_document,
+    video_update_fields,
+)
+
+# Handlers return VideoJSONResponse directly so documents skip jsonable_encoder
+router = APIRouter(prefix="/api/videos", tags=["Videos API"], default_response_class=VideoJSONResponse)
+logger = logging.getLogger(__name__)
+
+# Fields clients may select with ?fields= (_id is always returned)
+API_FIELDS = (
+    "title", "description", "time", "duration_seconds", "url", "created_at", "updated_at", "version",
+    "enrichment",
+)
+
+
+# Upper bound on ids accepted by a single bulk request
+BULK_MAX_IDS = 100000
+
+
+# Pydantic models for bulk operations
+class BulkFilter(BaseModel):
+    title: Optional[str] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    updated_after: Optional[datetime] = None
+    updated_before: Optional[datetime] = None
+
+    def to_query(self):
+        query = {}
+        if self.title is not None:
+            query["title"] = self.title
+        for field in ("created", "updated"):
+            bounds = {}
+            if getattr(self, f"{field}_after") is not None:
+                bounds["$gte"] = getattr(self, f"{field}_after")
+            if getattr(self, f"{field}_before") is not None:
+                bounds["$lt"] = getattr(self, f"{field}_before")
+            if bounds:
+                query[f"{field}_at"] = bounds
+        return query
+
+
+class BulkSelection(BaseModel):
+    ids: Optional[List[str]] = None
+    filter: Optional[BulkFilter] = None
+
+    @validator('ids')
+    def validate_ids(cls, v):
+        if v is not None and len(v) > BULK_MAX_IDS:
+            raise ValueError(f'At most {BULK_MAX_IDS} ids per request')
+        return v
+
+
+class BulkUpdateRequest(BulkSelection):
+    set: VideoUpdate
+
+
+class BulkDeleteRequest(BulkSelection):
+    pass
+
+
+def parse_selection(selection: BulkSelection):
+    """Resolve a bulk request to either a list of ObjectIds or a filter query"""
+    if (selection.ids is None) == (selection.filter is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'ids' or 'filter'")
+    if selection.ids is not None:
+        object_ids = []
+        invalid = []
+        for video_id in selection.ids:
+            try:
+                object_ids.append(ObjectId(video_id))
+            except InvalidId:
+                invalid.append(video_id)
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Invalid video IDs: {', '.join(invalid[:20])}")
+        return object_ids, None
+    query = selection.filter.to_query()
+    if not query:
+        raise HTTPException(status_code=400, detail="Filter must contain at least one criterion")
+    return None, query
+
+
+def parse_fields(fields: str = None):
+    """Turn a comma-separated ?fields= value into a MongoDB projection"""
+    if not fields:
+        return {name: 1 for name in API_FIELDS}
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in API_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(API_FIELDS)}"
+        )
+    return {name: 1 for name in requested}
+
+
+def parse_object_id(video_id: str):
+    try:
+        return ObjectId(video_id)
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid video ID format")
+
+
+def require_repository():
+    videos = get_video_repository()
+    if videos is None:
+        raise HTTPException(status_code=503, detail="Database connection unavailable")
+    return videos
+
+
+def with_validators(projection):
+    """Projection that also returns the fields needed for ETag and Last-Modified"""
+    return {**projection, "version": 1, "updated_at": 1, "enrichment": 1}
+
+
+def versioned_response(video, projection, headers=None, status_code=200):
+    """JSON response carrying the document's ETag, with validator fields dropped unless requested"""
+    headers = headers or {"ETag": etag_for(video)}
+    for name in ("version", "updated_at", "enrichment"):
+        if name not in projection:
+            video.pop(name, None)
+    return VideoJSONResponse(video, status_code=status_code, headers=headers)
+
+
+def applied_update(before, update_data, projection):
+    """The projected document after an update, built from its pre-update state"""
+    video = {"_id": before["_id"]}
+    for name in projection:
+        if name in update_data:
+            video[name] = update_data[name]
+        elif name in before:
+            video[name] = before[name]
+    video["version"] = document_version(before) + 1
+    return video
+
+
+async def precondition_failure(videos, object_id):
+    """A conditional write matched nothing: 404 if the video is gone, 412 if it moved on"""
+    try:
+        exists = await videos.get(object_id, {"_id": 1})
+    except StorageError as e:
+        logger.error("Database error checking video %s: %s", object_id, e)
+        raise HTTPException(status_code=500, detail="Failed to load video")
+    if exists is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    raise HTTPException(status_code=412, detail="Video was modified; reload it and retry")
+
+
+# ======= LIST VIDEOS =======
+@router.get("")
+async def api_list_videos(
+    request: Request,
+    after: str = None,
+    before: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    fields: str = None,
+    q: str = None,
+    prefix: str = None,
+    created_from: str = None,
+    created_to: str = None,
+    updated_from: str = None,
+    updated_to: str = None,
+    min_duration: str = None,
+    max_duration: str = None,
+    sort: str = None,
+):
+    projection = parse_fields(fields)
+    try:
+        search = VideoSearch(
+            q, prefix, created_from, created_to, updated_from, updated_to, min_duration, max_duration, sort
+        )
+    except InvalidSearch as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    videos = require_repository()
+    try:
+        etag = await collection_etag(videos)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        page = await cached_page(
+            videos, after=after, before=before, limit=limit, projection=projection, search=search, etag=etag
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except StorageError as e:
+        logger.error("Database error in api_list_videos: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to load videos")
+
+    return VideoJSONResponse({
+        "items": page.items,
+        "limit": page.limit,
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+    }, headers=validator_headers(etag))
+
+
+# ======= BULK IMPORT =======
+@router.post("/import")
+async def api_import_videos(request: Request, format: str = None, batch_size: int = None):
+    """Stream an NDJSON or CSV body into storage in unordered batches"""
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson"
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+
+    videos = require_repository()
+    lines = iter_lines(request.stream())
+    records = iter_csv_records(lines) if format == "csv" else iter_ndjson_records(lines)
+    report = ImportReport()
+    try:
+        await import_videos(videos, records, batch_size=batch_size, report=report)
+    except StorageError as e:
+        logger.error("Database error in api_import_videos: %s", e)
+        return VideoJSONResponse(
+            {"detail": "Import aborted by a database error", **report.as_dict()},
+            status_code=500
+        )
+    finally:
+        if report.inserted:
+            invalidate_videos()
+            request_reconcile()
+
+    return VideoJSONResponse(report.as_dict())
+
+
+# ======= BULK UPDATE / DELETE =======
+@router.post("/bulk/update")
+async def api_bulk_update(payload: BulkUpdateRequest):
+    ids, query = parse_selection(payload)
+    update_data = video_update_fields(payload.set)
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No fields to update")
+
+    videos = require_repository()
+    try:
+        result = await videos.bulk_update(update_data, ids=ids, query=query)
+    except StorageError as e:
+        logger.error("Database error in api_bulk_update: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to update videos in database")
+    finally:
+        invalidate_videos()
+        request_reconcile()
+    return VideoJSONResponse(result)
+
+
+@router.post("/bulk/delete")
+async def api_bulk_delete(payload: BulkDeleteRequest):
+    ids, query = parse_selection(payload)
+    videos = require_repository()
+    try:
+        result = await videos.bulk_delete(ids=ids, query=query)
+    except StorageError as e:
+        logger.error("Database error in api_bulk_delete: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to delete videos from database")
+    finally:
+        invalidate_videos()
+        request_reconcile()
+    return VideoJSONResponse(result)
+
+
+# ======= STATISTICS =======
+@router.get("/stats")
+async def api_video_stats(days: int = 14, weeks: int = 8):
+    """Collection totals and recent additions, read from the maintained summary"""
+    if not 1 <= days <= 366 or not 1 <= weeks <= 52:
+        raise HTTPException(status_code=400, detail="days must be 1-366 and weeks 1-52")
+    videos = require_repository()
+    try:
+        stats = await videos.stats(days=days, weeks=weeks)
+    except StorageError as e:
+        logger.error("Database error in api_video_stats: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to load video statistics")
+    return VideoJSONResponse(stats)
+
+
+# ======= EXPORT =======
+@router.get("/export")
+async def api_export_videos(
+    format: str = "ndjson",
+    fields: str = None,
+    gzip: bool = False,
+    batch_size: int = None,
+    q: str = None,
+    prefix: str = None,
+    created_from: str = None,
+    created_to: str = None,
+    updated_from: str = None,
+    updated_to: str = None,
+    min_duration: str = None,
+    max_duration: str = None,
+    sort: str = None,
+):
+    """Stream every video (or a filtered subset) as NDJSON or CSV, one batch in memory at a time"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    projection = parse_fields(fields)
+    try:
+        search = VideoSearch(
+            q, prefix, created_from, created_to, updated_from, updated_to, min_duration, max_duration, sort
+        )
+    except InvalidSearch as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    videos = require_repository()
+
+    fields = list(projection)
+    batches = videos.iter_batches(search, dict(projection), batch_size=clamp_batch_size(batch_size))
+    try:
+        # Read the first batch before the status line, so an unavailable database is still a 500
+        first_batch = await anext(batches, None)
+    except StorageError as e:
+        logger.error("Database error in api_export_videos: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to export videos")
+
+    chunks = export_chunks(first_batch, batches, format, fields)
+    media_type = EXPORT_FORMATS[format]
+    filename = f"videos.{format}"
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        media_type = "application/gzip"
+        filename += ".gz"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+# ======= GET VIDEO =======
+@router.get("/{video_id}")
+async def api_get_video(request: Request, video_id: str, fields: str = None):
+    object_id = parse_object_id(video_id)
+    projection = parse_fields(fields)
+    videos = require_repository()
+    try:
+        video = await cached_video(videos, object_id, with_validators(projection))
+    except StorageError as e:
+        logger.error("Database error in api_get_video: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to load video")
+
+    if video is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    etag, last_modified = etag_for(video), last_modified_for(video)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    return versioned_response(video, projection, headers=validator_headers(etag, last_modified))
+
+
+# ======= CREATE VIDEO =======
+@router.post("", status_code=201)
+async def api_create_video(video_data: VideoCreate, fields: str = None):
+    projection = parse_fields(fields)
+    videos = require_repository()
+    new_video = build_video_document(video_data)
+    try:
+        inserted_id = await videos.insert(new_video)
+    except StorageError as e:
+        logger.error("Database error in api_create_video: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to save video to database")
+    invalidate_videos(inserted_id)
+    record_added(new_video)
+    await enqueue_enrichment(inserted_id, new_video.get("url"))
+
+    logger.info("Video added successfully with ID: %s", inserted_id)
+    # Only public fields, like a GET of the new video (no internal title_lower)
+    created = {name: new_video[name] for name in with_validators(projection) if name in new_video}
+    created["_id"] = inserted_id
+    return versioned_response(created, projection, status_code=201)
+
+
+# ======= UPDATE VIDEO =======
+@router.patch("/{video_id}")
+async def api_update_video(
+    video_id: str,
+    video_update: VideoUpdate,
+    fields: str = None,
+    if_match: Optional[str] = Header(None),
+):
+    object_id = parse_object_id(video_id)
+    expected = parse_if_match(if_match)
+    projection = parse_fields(fields)
+    update_data = video_update_fields(video_update)
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No fields to update")
+
+    videos = require_repository()
+    update_data["updated_at"] = datetime.utcnow()
+    try:
+        # The pre-update document carries the old duration for the statistics delta
+        before = await videos.update(
+            object_id, update_data, expected,
+            projection={**with_validators(projection), "duration_seconds": 1, "url": 1}
+        )
+    except StorageError as e:
+        logger.error("Database error in api_update_video: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to update video in database")
+    invalidate_videos(object_id)
+
+    if before is None:
+        await precondition_failure(videos, object_id)
+    if "duration_seconds" in update_data:
+        record_duration_change(before.get("duration_seconds"), update_data["duration_seconds"])
+    if "url" in update_data and update_data["url"] != before.get("url"):
+        await enqueue_enrichment(object_id, update_data["url"])
+    logger.info("Video updated successfully: %s", object_id)
+    return versioned_response(applied_update(before, update_data, with_validators(projection)), projection)
+
+
+# ======= DELETE VIDEO =======
+@router.delete("/{video_id}", status_code=204)
+async def api_delete_video(video_id: str, if_match: Optional[str] = Header(None)):
+    object_id = parse_object_id(video_id)
+    expected = parse_if_match(if_match)
+    videos = require_repository()
+    try:
+        deleted = await videos.delete(
+            object_id, expected, projection={"_id": 1, "created_at": 1, "duration_seconds": 1}
+        )
+    except StorageError as e:
+        logger.error("Database error in api_delete_video: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to delete video from database")
+    invalidate_videos(object_id)
+
+    if deleted is None:
+        await precondition_failure(videos, object_id)
+    record_removed(deleted)
+    logger.info("Video deleted successfully: %s", object_id)
+    return Response(status_code=204)
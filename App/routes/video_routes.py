@@ -1,18 +1,46 @@
 from fastapi import APIRouter, Request, Form, HTTPException
-from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import RedirectResponse, StreamingResponse
 from pydantic import BaseModel, HttpUrl, validator
 from bson import ObjectId
 from bson.errors import InvalidId
-from pymongo.errors import PyMongoError
 from datetime import datetime
 import logging
-from app.dbConnection import get_video_collection
+import os
+from app.dbConnection import get_video_repository
+from app.pagination import DEFAULT_PAGE_SIZE, InvalidCursor
+from app.repositories import StorageError
+from app.cache import cached_page, cached_video, invalidate_videos
+from app.conditional import collection_etag, is_not_modified, not_modified_response, validator_headers
+from app.durations import parse_duration
+from app.versioning import INITIAL_VERSION, document_version, parse_form_version
+from app.search import InvalidSearch, VideoSearch
+from app.enrichment import enqueue_enrichment
+from app.stats import dashboard_stats, record_added, record_duration_change, record_removed
+from app.templating import stream_environment, templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 logger = logging.getLogger(__name__)
 
+# Render /videos as a chunked stream by default (can be toggled per request with ?stream=)
+STREAM_VIDEO_LIST = os.getenv("VIDEOS_STREAM_RENDER", "false").lower() in ("1", "true", "yes")
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
+async def render_stream(template_name, context):
+    """Render a template incrementally, yielding ~16KB chunks as rows arrive"""
+    template = stream_environment.get_template(template_name)
+    buffer = []
+    size = 0
+    async for part in template.generate_async(context):
+        buffer.append(part)
+        size += len(part)
+        if size >= STREAM_CHUNK_SIZE:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
 # Pydantic models for validation
 class VideoCreate(BaseModel):
     title: str
@@ -76,36 +104,137 @@ class VideoUpdate(BaseModel):
             return v.strip()
         return v
 
+def build_video_document(video_data: VideoCreate):
+    """Turn validated input into a new video document"""
+    now = datetime.utcnow()
+    return {
+        "title": video_data.title,
+        "description": video_data.description,
+        "time": video_data.time,
+        "duration_seconds": parse_duration(video_data.time),
+        "url": str(video_data.url),
+        "title_lower": video_data.title.lower(),
+        "created_at": now,
+        "updated_at": now,
+        "version": INITIAL_VERSION
+    }
+
+
+def video_update_fields(video_update: VideoUpdate):
+    """Collect the fields set on a validated update, ready for $set"""
+    update_data = {k: v for k, v in video_update.dict().items() if v is not None}
+    if "url" in update_data:
+        update_data["url"] = str(update_data["url"])
+    if "title" in update_data:
+        update_data["title_lower"] = update_data["title"].lower()
+    if "time" in update_data:
+        update_data["duration_seconds"] = parse_duration(update_data["time"])
+    return update_data
+
+async def current_version(id):
+    """Current revision of a video, used to make edit forms conditional"""
+    videos = get_video_repository()
+    if not id or videos is None:
+        return None
+    try:
+        video = await cached_video(videos, ObjectId(id), None)
+    except (InvalidId, StorageError):
+        return None
+    return document_version(video) if video is not None else None
+
+
+async def write_failure_reason(videos, video_id):
+    """Tell a missing video from a stale version after a conditional write matched nothing"""
+    video = await videos.get(video_id, {"version": 1})
+    if video is None:
+        return "Video not found", None
+    return (
+        "This video was changed by someone else since you opened it. "
+        "Submit again to overwrite their changes.",
+        document_version(video)
+    )
+
 # ======= DASHBOARD =======
 @router.get("/")
 async def dashboard(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return templates.TemplateResponse("index.html", {"request": request, "stats": await dashboard_stats()})
 
 
 # ======= LIST VIDEOS =======
 @router.get("/videos")
-async def list_videos(request: Request):
+async def list_videos(
+    request: Request,
+    after: str = None,
+    before: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    stream: bool = STREAM_VIDEO_LIST,
+    q: str = None,
+    prefix: str = None,
+    created_from: str = None,
+    created_to: str = None,
+    updated_from: str = None,
+    updated_to: str = None,
+    min_duration: str = None,
+    max_duration: str = None,
+    sort: str = None,
+):
     try:
-        video_collection = get_video_collection()
-        if video_collection is None:
+        search = VideoSearch(
+            q, prefix, created_from, created_to, updated_from, updated_to, min_duration, max_duration, sort
+        )
+        videos = get_video_repository()
+        if videos is None:
             return templates.TemplateResponse(
                 "list_videos.html",
-                {"request": request, "videos": [], "error": "Database connection unavailable"}
+                {"request": request, "videos": [], "search": search, "error": "Database connection unavailable"}
             )
         
-        videos = await video_collection.find().to_list(100)
+        # Dashboards poll this page; answer unchanged polls before querying or rendering
+        etag = await collection_etag(videos)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        
+        context = {"request": request, "search": search, "search_query": search.query_string()}
+        if stream:
+            # Backward pages and relevance-ranked pages are fetched in full, so they are buffered
+            if before is not None or search.q:
+                page = await cached_page(videos, before=before, after=after, limit=limit, search=search, etag=etag)
+            else:
+                page = await videos.open_stream_page(search, after=after, limit=limit)
+            return StreamingResponse(
+                render_stream(
+                    "list_videos.html",
+                    {**context, "videos": page, "page": page, "stream": True}
+                ),
+                media_type="text/html; charset=utf-8",
+                headers=validator_headers(etag)
+            )
+        
+        page = await cached_page(videos, after=after, before=before, limit=limit, search=search, etag=etag)
+        return templates.TemplateResponse(
+            "list_videos.html",
+            {**context, "videos": page.items, "page": page},
+            headers=validator_headers(etag)
+        )
+    except InvalidSearch as e:
+        return templates.TemplateResponse(
+            "list_videos.html",
+            {"request": request, "videos": [], "error": str(e)}
+        )
+    except InvalidCursor as e:
+        logger.warning("Invalid cursor in list_videos: %s", e)
         return templates.TemplateResponse(
             "list_videos.html",
-            {"request": request, "videos": videos}
+            {"request": request, "videos": [], "error": "Invalid page link, please start from the first page"}
         )
-    except PyMongoError as e:
-        logger.error(f"Database error in list_videos: {e}")
+    except StorageError as e:
+        logger.error("Database error in list_videos: %s", e)
         return templates.TemplateResponse(
             "list_videos.html",
             {"request": request, "videos": [], "error": "Failed to load videos"}
         )
     except Exception as e:
-        logger.error(f"Unexpected error in list_videos: {e}")
+        logger.error("Unexpected error in list_videos: %s", e)
         return templates.TemplateResponse(
             "list_videos.html",
             {"request": request, "videos": [], "error": "An unexpected error occurred"}
@@ -135,8 +264,8 @@ async def add_video(
             url=url
         )
         
-        video_collection = get_video_collection()
-        if video_collection is None:
+        videos = get_video_repository()
+        if videos is None:
             return templates.TemplateResponse(
                 "add_video.html",
                 {
@@ -150,24 +279,20 @@ async def add_video(
             )
         
         # Create new video document
-        new_video = {
-            "title": video_data.title,
-            "description": video_data.description,
-            "time": video_data.time,
-            "url": str(video_data.url),
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
+        new_video = build_video_document(video_data)
         
-        result = await video_collection.insert_one(new_video)
-        if result.inserted_id:
-            logger.info(f"Video added successfully with ID: {result.inserted_id}")
+        video_id = await videos.insert(new_video)
+        if video_id:
+            invalidate_videos(video_id)
+            record_added(new_video)
+            await enqueue_enrichment(video_id, new_video.get("url"))
+            logger.info("Video added successfully with ID: %s", video_id)
             return RedirectResponse(url="/videos", status_code=303)
         else:
             raise Exception("Failed to insert video")
             
     except ValueError as e:
-        logger.warning(f"Validation error in add_video: {e}")
+        logger.warning("Validation error in add_video: %s", e)
         return templates.TemplateResponse(
             "add_video.html",
             {
@@ -179,8 +304,8 @@ async def add_video(
                 "url": url
             }
         )
-    except PyMongoError as e:
-        logger.error(f"Database error in add_video: {e}")
+    except StorageError as e:
+        logger.error("Database error in add_video: %s", e)
         return templates.TemplateResponse(
             "add_video.html",
             {
@@ -193,7 +318,7 @@ async def add_video(
             }
         )
     except Exception as e:
-        logger.error(f"Unexpected error in add_video: {e}")
+        logger.error("Unexpected error in add_video: %s", e)
         return templates.TemplateResponse(
             "add_video.html",
             {
@@ -209,8 +334,11 @@ async def add_video(
 
 # ======= UPDATE VIDEO =======
 @router.get("/videos/update")
-async def update_video_form(request: Request):
-    return templates.TemplateResponse("update_video.html", {"request": request})
+async def update_video_form(request: Request, id: str = None):
+    return templates.TemplateResponse(
+        "update_video.html",
+        {"request": request, "id": id, "version": await current_version(id)}
+    )
 
 
 @router.post("/videos/update")
@@ -221,6 +349,7 @@ async def update_video(
     description: str = Form(None),
     time: str = Form(None),
     url: str = Form(None),
+    version: str = Form(None),
 ):
     try:
         # Validate ObjectId
@@ -240,13 +369,15 @@ async def update_video(
                 }
             )
         
-        video_collection = get_video_collection()
-        if video_collection is None:
+        # Validate the version the form was loaded with
+        try:
+            expected_versions = parse_form_version(version)
+        except ValueError:
             return templates.TemplateResponse(
                 "update_video.html",
                 {
                     "request": request,
-                    "error": "Database connection unavailable",
+                    "error": "Invalid version; reload the video and try again",
                     "id": id,
                     "title": title,
                     "description": description,
@@ -255,14 +386,13 @@ async def update_video(
                 }
             )
         
-        # Check if video exists
-        existing_video = await video_collection.find_one({"_id": video_id})
-        if not existing_video:
+        videos = get_video_repository()
+        if videos is None:
             return templates.TemplateResponse(
                 "update_video.html",
                 {
                     "request": request,
-                    "error": "Video not found",
+                    "error": "Database connection unavailable",
                     "id": id,
                     "title": title,
                     "description": description,
@@ -313,36 +443,40 @@ async def update_video(
                 }
             )
         
-        # Update video
-        update_data = {k: v for k, v in video_update.dict().items() if v is not None}
-        if update_data:
-            update_data["updated_at"] = datetime.utcnow()
-            result = await video_collection.update_one(
-                {"_id": video_id},
-                {"$set": update_data}
+        # Update video in a single round trip; the version check makes it conditional
+        update_data = video_update_fields(video_update)
+        update_data["updated_at"] = datetime.utcnow()
+        updated = await videos.update(
+            video_id, update_data, expected_versions,
+            projection={"_id": 1, "duration_seconds": 1, "url": 1}
+        )
+        invalidate_videos(video_id)
+        if updated is not None and "duration_seconds" in update_data:
+            record_duration_change(updated.get("duration_seconds"), update_data["duration_seconds"])
+        if updated is not None and "url" in update_data and update_data["url"] != updated.get("url"):
+            await enqueue_enrichment(video_id, update_data["url"])
+        
+        if updated is None:
+            error, current = await write_failure_reason(videos, video_id)
+            return templates.TemplateResponse(
+                "update_video.html",
+                {
+                    "request": request,
+                    "error": error,
+                    "id": id,
+                    "title": title,
+                    "description": description,
+                    "time": time,
+                    "url": url,
+                    "version": current
+                }
             )
-            
-            if result.modified_count > 0:
-                logger.info(f"Video updated successfully: {video_id}")
-                return RedirectResponse(url="/videos", status_code=303)
-            else:
-                return templates.TemplateResponse(
-                    "update_video.html",
-                    {
-                        "request": request,
-                        "error": "No changes were made",
-                        "id": id,
-                        "title": title,
-                        "description": description,
-                        "time": time,
-                        "url": url
-                    }
-                )
         
+        logger.info("Video updated successfully: %s", video_id)
         return RedirectResponse(url="/videos", status_code=303)
         
-    except PyMongoError as e:
-        logger.error(f"Database error in update_video: {e}")
+    except StorageError as e:
+        logger.error("Database error in update_video: %s", e)
         return templates.TemplateResponse(
             "update_video.html",
             {
@@ -356,7 +490,7 @@ async def update_video(
             }
         )
     except Exception as e:
-        logger.error(f"Unexpected error in update_video: {e}")
+        logger.error("Unexpected error in update_video: %s", e)
         return templates.TemplateResponse(
             "update_video.html",
             {
@@ -373,12 +507,15 @@ async def update_video(
 
 # ======= DELETE VIDEO =======
 @router.get("/videos/delete")
-async def delete_video_form(request: Request):
-    return templates.TemplateResponse("delete_video.html", {"request": request})
+async def delete_video_form(request: Request, id: str = None):
+    return templates.TemplateResponse(
+        "delete_video.html",
+        {"request": request, "id": id, "version": await current_version(id)}
+    )
 
 
 @router.post("/videos/delete")
-async def delete_video(request: Request, id: str = Form(...)):
+async def delete_video(request: Request, id: str = Form(...), version: str = Form(None)):
     try:
         # Validate ObjectId
         try:
@@ -393,47 +530,55 @@ async def delete_video(request: Request, id: str = Form(...)):
                 }
             )
         
-        video_collection = get_video_collection()
-        if video_collection is None:
+        # Validate the version the form was loaded with
+        try:
+            expected_versions = parse_form_version(version)
+        except ValueError:
             return templates.TemplateResponse(
                 "delete_video.html",
                 {
                     "request": request,
-                    "error": "Database connection unavailable",
+                    "error": "Invalid version; reload the video and try again",
                     "id": id
                 }
             )
         
-        # Check if video exists before deleting
-        existing_video = await video_collection.find_one({"_id": video_id})
-        if not existing_video:
+        videos = get_video_repository()
+        if videos is None:
             return templates.TemplateResponse(
                 "delete_video.html",
                 {
                     "request": request,
-                    "error": "Video not found",
+                    "error": "Database connection unavailable",
                     "id": id
                 }
             )
         
-        # Delete video
-        result = await video_collection.delete_one({"_id": video_id})
+        # Delete video in a single round trip; the version check makes it conditional
+        deleted = await videos.delete(
+            video_id, expected_versions, projection={"_id": 1, "created_at": 1, "duration_seconds": 1}
+        )
+        invalidate_videos(video_id)
+        if deleted is not None:
+            record_removed(deleted)
         
-        if result.deleted_count > 0:
-            logger.info(f"Video deleted successfully: {video_id}")
-            return RedirectResponse(url="/videos", status_code=303)
-        else:
+        if deleted is None:
+            error, current = await write_failure_reason(videos, video_id)
             return templates.TemplateResponse(
                 "delete_video.html",
                 {
                     "request": request,
-                    "error": "Failed to delete video",
-                    "id": id
+                    "error": error,
+                    "id": id,
+                    "version": current
                 }
             )
+        
+        logger.info("Video deleted successfully: %s", video_id)
+        return RedirectResponse(url="/videos", status_code=303)
             
-    except PyMongoError as e:
-        logger.error(f"Database error in delete_video: {e}")
+    except StorageError as e:
+        logger.error("Database error in delete_video: %s", e)
         return templates.TemplateResponse(
             "delete_video.html",
             {
@@ -443,7 +588,7 @@ async def delete_video(request: Request, id: str = Form(...)):
             }
         )
     except Exception as e:
-        logger.error(f"Unexpected error in delete_video: {e}")
+        logger.error("Unexpected error in delete_video: %s", e)
         return templates.TemplateResponse(
             "delete_video.html",
             {
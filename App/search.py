@@ -0,0 +1,139 @@
+import re
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+from app.durations import parse_duration
+from app.pagination import fetch_page, fetch_text_page
+
+MAX_QUERY_LENGTH = 200
+
+# ?sort= values and the field each one orders by (descending)
+SORT_FIELDS = {"newest": "created_at", "longest": "duration_seconds"}
+
+
+class InvalidSearch(ValueError):
+    """Raised when a search parameter cannot be parsed"""
+
+
+def parse_duration_param(value):
+    """Parse a duration filter such as "10m", "1:30:00" or "45" (minutes)"""
+    if not value:
+        return None
+    seconds = parse_duration(value)
+    if seconds is None:
+        raise InvalidSearch(f"Invalid duration: {value}")
+    return seconds
+
+
+def parse_date_param(value, end=False):
+    """Parse YYYY-MM-DD or an ISO datetime; a bare end date covers that whole day"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise InvalidSearch(f"Invalid date: {value}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.replace(tzinfo=None) - parsed.utcoffset()
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+class VideoSearch:
+    """Search and filter parameters shared by /videos and /api/videos"""
+
+    PARAMS = (
+        "q", "prefix", "created_from", "created_to", "updated_from", "updated_to",
+        "min_duration", "max_duration", "sort",
+    )
+
+    def __init__(
+        self,
+        q=None,
+        prefix=None,
+        created_from=None,
+        created_to=None,
+        updated_from=None,
+        updated_to=None,
+        min_duration=None,
+        max_duration=None,
+        sort=None,
+    ):
+        self.q = (q or "").strip()[:MAX_QUERY_LENGTH] or None
+        self.prefix = (prefix or "").strip()[:MAX_QUERY_LENGTH] or None
+        self.created_from = created_from or None
+        self.created_to = created_to or None
+        self.updated_from = updated_from or None
+        self.updated_to = updated_to or None
+        self.min_duration = (min_duration or "").strip() or None
+        self.max_duration = (max_duration or "").strip() or None
+        if sort and sort not in SORT_FIELDS:
+            raise InvalidSearch(f"Invalid sort: {sort}. Allowed: {', '.join(SORT_FIELDS)}")
+        # The default order is left out of links and cache keys
+        self.sort = sort if sort and sort != "newest" else None
+        self._filters = self._build_filters()
+
+    def _build_filters(self):
+        query = {}
+        if self.prefix:
+            query["title_lower"] = {"$regex": "^" + re.escape(self.prefix.lower())}
+        for field in ("created", "updated"):
+            bounds = {}
+            start = parse_date_param(getattr(self, f"{field}_from"))
+            end = parse_date_param(getattr(self, f"{field}_to"), end=True)
+            if start is not None:
+                bounds["$gte"] = start
+            if end is not None:
+                bounds["$lt"] = end
+            if bounds:
+                query[f"{field}_at"] = bounds
+        duration = {}
+        shortest = parse_duration_param(self.min_duration)
+        longest = parse_duration_param(self.max_duration)
+        if shortest is not None:
+            duration["$gte"] = shortest
+        if longest is not None:
+            duration["$lte"] = longest
+        if self.sort_field == "duration_seconds":
+            # Keyset cursors need a value to compare, so unparsed durations are left out
+            duration["$type"] = "number"
+        if duration:
+            query["duration_seconds"] = duration
+        return query
+
+    @property
+    def sort_field(self):
+        """Field the results are ordered by; relevance ranking takes over when q is set"""
+        if self.q:
+            return "created_at"
+        return SORT_FIELDS[self.sort or "newest"]
+
+    @property
+    def active(self):
+        return bool(self.q or self._filters)
+
+    def filters(self):
+        """MongoDB filter for everything except the $text clause"""
+        return self._filters
+
+    def key(self):
+        return tuple(getattr(self, name) for name in self.PARAMS)
+
+    def query_string(self):
+        """URL-encoded parameters to carry across pagination links"""
+        return urlencode({name: getattr(self, name) for name in self.PARAMS if getattr(self, name)})
+
+
+async def search_page(collection, search=None, after=None, before=None, limit=None, projection=None):
+    """Fetch one page for a search: relevance-ranked when q is set, by the chosen sort otherwise"""
+    if search is not None and search.q:
+        return await fetch_text_page(
+            collection, search.q, after=after, before=before, limit=limit,
+            projection=projection, filters=search.filters()
+        )
+    filters = search.filters() if search is not None else None
+    sort_field = search.sort_field if search is not None else "created_at"
+    return await fetch_page(
+        collection, after=after, before=before, limit=limit, projection=projection,
+        filters=filters, sort_field=sort_field
+    )
@@ -0,0 +1,28 @@
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+
+def _default(value):
+    """Encode the BSON types orjson does not know about"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content):
+    """Serialize API payloads; datetimes from MongoDB are naive UTC"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NAIVE_UTC)
+
+
+def dumps_lines(documents):
+    """NDJSON: one serialized document per line"""
+    option = orjson.OPT_NAIVE_UTC | orjson.OPT_APPEND_NEWLINE
+    return b"".join(orjson.dumps(document, default=_default, option=option) for document in documents)
+
+
+class VideoJSONResponse(JSONResponse):
+    """JSON response encoded with orjson, handling ObjectId and datetime natively"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,116 @@
+"""Production entry point: python -m app.server
+
+Runs uvicorn with one worker process per available CPU, where "available"
+honours the container's cgroup CPU quota (a pod limited to 200m still gets
+one worker, not one per host core), using the uvloop event loop and the
+httptools parser when installed. The pod's MongoDB connection budget is
+split between the workers so adding workers does not multiply the
+connections each replica opens, and logging goes through the non-blocking
+queue handler in every process.
+
+WEB_CONCURRENCY overrides the worker count; MONGO_MAX_POOL_SIZE, when set,
+is used as the per-worker pool size as is.
+"""
+import os
+import math
+import logging
+import importlib.util
+import uvicorn
+from app.logconfig import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# Server settings (overridable from the environment)
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_MAX_WORKERS = int(os.getenv("SERVER_MAX_WORKERS", "8"))
+SERVER_KEEPALIVE_SECONDS = int(os.getenv("SERVER_KEEPALIVE_SECONDS", "5"))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+SERVER_ACCESS_LOG = os.getenv("SERVER_ACCESS_LOG", "true").lower() in ("1", "true", "yes")
+# MongoDB connections per pod, shared by all workers (100 is the driver's per-client default)
+SERVER_MONGO_POOL_BUDGET = int(os.getenv("SERVER_MONGO_POOL_BUDGET", "100"))
+MIN_POOL_PER_WORKER = 5
+
+CGROUP_V2_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+CGROUP_V1_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+CGROUP_V1_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read().strip()
+
+
+def cgroup_cpu_limit():
+    """CPUs allowed by the container's CFS quota, or None when unlimited"""
+    try:
+        quota, period = _read(CGROUP_V2_CPU_MAX).split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int(_read(CGROUP_V1_QUOTA))
+        return quota / int(_read(CGROUP_V1_PERIOD)) if quota > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus():
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    return min(cpus, limit) if limit else cpus
+
+
+def worker_count(cpus=None):
+    """One event loop per whole CPU (at least one, at most SERVER_MAX_WORKERS)"""
+    explicit = os.getenv("WEB_CONCURRENCY")
+    if explicit:
+        return max(1, int(explicit))
+    if cpus is None:
+        cpus = available_cpus()
+    # Workers beyond the quota would only be throttled
+    return max(1, min(math.floor(cpus), SERVER_MAX_WORKERS))
+
+
+def pool_settings(workers):
+    """Environment for the workers: their share of the pod's MongoDB connection budget"""
+    if os.getenv("MONGO_MAX_POOL_SIZE"):
+        return {}
+    return {"MONGO_MAX_POOL_SIZE": str(max(MIN_POOL_PER_WORKER, SERVER_MONGO_POOL_BUDGET // workers))}
+
+
+def server_options(workers):
+    return {
+        "host": SERVER_HOST,
+        "port": SERVER_PORT,
+        "workers": workers,
+        "loop": "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "http": "httptools" if importlib.util.find_spec("httptools") else "h11",
+        # Leave uvicorn's loggers propagating to the root logger, which is queue-backed
+        "log_config": None,
+        "access_log": SERVER_ACCESS_LOG,
+        "timeout_keep_alive": SERVER_KEEPALIVE_SECONDS,
+        "backlog": SERVER_BACKLOG,
+        "server_header": False,
+    }
+
+
+def main():
+    configure_logging()
+    workers = worker_count()
+    # Worker processes inherit the environment, so they size their pools from it
+    os.environ.update(pool_settings(workers))
+    options = server_options(workers)
+    logger.info(
+        "🚀 Starting %s workers on %s:%s (%.2f CPUs available, loop=%s, http=%s, MongoDB pool %s per worker)",
+        workers, options["host"], options["port"], available_cpus(), options["loop"], options["http"],
+        os.getenv("MONGO_MAX_POOL_SIZE"),
+    )
+    uvicorn.run("app.main:app", **options)
+
+
+if __name__ == "__main__":
+    main()
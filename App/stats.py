@@ -0,0 +1,265 @@
+"""Collection statistics kept in a single summary document
+
+Write handlers apply small $inc deltas to the summary as they go, so reading
+the stats is one document fetch however large the collection grows. Bulk
+operations and imports schedule a reconcile instead, and a periodic
+aggregation recomputes the summary from scratch to repair any drift.
+(The SQLite backend keeps the same totals exact with triggers instead.)
+"""
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from app.repositories import StorageError
+
+logger = logging.getLogger(__name__)
+
+STATS_RECONCILE_INTERVAL = float(os.getenv("STATS_RECONCILE_INTERVAL", "3600"))
+# Days of per-day history kept (12 weeks, so weekly totals can be derived)
+STATS_HISTORY_DAYS = int(os.getenv("STATS_HISTORY_DAYS", "84"))
+# Bulk writes wait this long so a burst of them triggers one reconcile
+STATS_RECONCILE_DELAY = float(os.getenv("STATS_RECONCILE_DELAY", "2"))
+# A recompute that keeps racing with deltas gives up after this many tries
+STATS_RECONCILE_ATTEMPTS = int(os.getenv("STATS_RECONCILE_ATTEMPTS", "3"))
+
+SUMMARY_ID = "videos"
+
+# Fire-and-forget summary updates (kept referenced so they are not garbage collected)
+_pending = set()
+# The subset of them applying $inc deltas, which a reconcile waits for
+_deltas = set()
+_reconcile_task = None
+
+
+def _day(value):
+    return value.strftime("%Y-%m-%d") if isinstance(value, datetime) else None
+
+
+def _delta(video, sign):
+    inc = {"count": sign}
+    duration = video.get("duration_seconds")
+    if isinstance(duration, (int, float)):
+        inc["duration_total"] = sign * duration
+        inc["duration_count"] = sign
+    day = _day(video.get("created_at"))
+    if day is not None:
+        inc[f"added_per_day.{day}"] = sign
+    return inc
+
+
+def _schedule(coroutine):
+    task = asyncio.create_task(coroutine)
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+    return task
+
+
+def _schedule_delta(summary, inc):
+    task = _schedule(_apply(summary, inc))
+    _deltas.add(task)
+    task.add_done_callback(_deltas.discard)
+
+
+async def _apply(summary, inc):
+    try:
+        # seq counts deltas, so a reconcile can tell whether one landed while it aggregated
+        await summary.update_one(
+            {"_id": SUMMARY_ID},
+            {"$inc": {**inc, "seq": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+    except PyMongoError as e:
+        # The periodic reconcile repairs whatever a failed delta leaves behind
+        logger.warning("⚠️ Failed to update video stats: %s", e)
+
+
+def _summary():
+    from app.dbConnection import get_stats_collection
+    return get_stats_collection()
+
+
+def record_added(video):
+    """A video was inserted (called after the write, never blocks the request)"""
+    summary = _summary()
+    if summary is not None:
+        _schedule_delta(summary, _delta(video, 1))
+
+
+def record_removed(video):
+    """A video was deleted; needs its created_at and duration_seconds"""
+    summary = _summary()
+    if summary is not None:
+        _schedule_delta(summary, _delta(video, -1))
+
+
+def record_duration_change(old_seconds, new_seconds):
+    """A video's duration_seconds changed from old_seconds to new_seconds"""
+    summary = _summary()
+    if summary is None or old_seconds == new_seconds:
+        return
+    inc = {}
+    for seconds, sign in ((old_seconds, -1), (new_seconds, 1)):
+        if isinstance(seconds, (int, float)):
+            inc["duration_total"] = inc.get("duration_total", 0) + sign * seconds
+            inc["duration_count"] = inc.get("duration_count", 0) + sign
+    if inc:
+        _schedule_delta(summary, inc)
+
+
+async def compute_summary(collection, now=None):
+    """Recompute the summary with one aggregation over the collection"""
+    now = now or datetime.utcnow()
+    since = datetime(now.year, now.month, now.day) - timedelta(days=STATS_HISTORY_DAYS - 1)
+    pipeline = [
+        {"$facet": {
+            "totals": [{"$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "duration_total": {"$sum": {"$cond": [{"$isNumber": "$duration_seconds"}, "$duration_seconds", 0]}},
+                "duration_count": {"$sum": {"$cond": [{"$isNumber": "$duration_seconds"}, 1, 0]}},
+            }}],
+            "per_day": [
+                {"$match": {"created_at": {"$gte": since}}},
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                    "count": {"$sum": 1},
+                }},
+            ],
+        }},
+    ]
+    result = await collection.aggregate(pipeline).to_list(length=1)
+    facets = result[0] if result else {"totals": [], "per_day": []}
+    totals = facets["totals"][0] if facets["totals"] else {}
+    return {
+        "_id": SUMMARY_ID,
+        "count": totals.get("count", 0),
+        "duration_total": totals.get("duration_total", 0),
+        "duration_count": totals.get("duration_count", 0),
+        "added_per_day": {row["_id"]: row["count"] for row in facets["per_day"]},
+        "updated_at": now,
+        "reconciled_at": now,
+    }
+
+
+async def reconcile_stats(collection, summary, report_drift=True):
+    """Replace the summary with freshly aggregated values, logging any drift
+
+    The replacement is conditional on the summary's seq being unchanged since
+    before the aggregation: a delta applied meanwhile may or may not be in the
+    aggregate, so rather than lose or double-count it the recompute is retried
+    (up to STATS_RECONCILE_ATTEMPTS times, after which the summary is left to
+    its deltas until the next run).
+    """
+    for _ in range(STATS_RECONCILE_ATTEMPTS):
+        # Deltas already scheduled by this process land before the snapshot, not during it
+        if _deltas:
+            await asyncio.gather(*_deltas, return_exceptions=True)
+        current = await summary.find_one({"_id": SUMMARY_ID}) or {}
+        seq = current.get("seq")
+        fresh = await compute_summary(collection)
+        fresh["seq"] = seq or 0
+        try:
+            # A summary created or bumped meanwhile no longer matches; the upsert then hits its _id
+            await summary.replace_one({"_id": SUMMARY_ID, "seq": seq}, fresh, upsert=True)
+        except DuplicateKeyError:
+            continue
+        drift = {
+            field: {"summary": current.get(field, 0), "actual": fresh[field]}
+            for field in ("count", "duration_total", "duration_count")
+            if current and current.get(field, 0) != fresh[field]
+        }
+        if drift and report_drift:
+            logger.warning("⚠️ Video stats drifted, reconciled: %s", drift)
+        return fresh
+    logger.warning("⚠️ Video stats changed during %s reconcile attempts; kept the summary as is", STATS_RECONCILE_ATTEMPTS)
+    return fresh
+
+
+def request_reconcile(collection=None):
+    """Reconcile soon (after bulk writes); concurrent requests collapse into one run"""
+    global _reconcile_task
+    summary = _summary()
+    if summary is None:
+        # Not on MongoDB (or not connected yet): nothing to reconcile
+        return None
+    from app.dbConnection import get_video_collection
+    collection = collection if collection is not None else get_video_collection()
+    if collection is None:
+        return None
+    if _reconcile_task is None or _reconcile_task.done():
+        async def delayed():
+            await asyncio.sleep(STATS_RECONCILE_DELAY)
+            try:
+                # Bulk writes are expected to move the totals, so this is not drift
+                await reconcile_stats(collection, summary, report_drift=False)
+            except PyMongoError as e:
+                logger.warning("⚠️ Failed to reconcile video stats: %s", e)
+        _reconcile_task = _schedule(delayed())
+    return _reconcile_task
+
+
+async def reconcile_periodically(collection, summary):
+    """Background job: reconcile on start, then every STATS_RECONCILE_INTERVAL seconds"""
+    while True:
+        try:
+            await reconcile_stats(collection, summary)
+        except PyMongoError as e:
+            logger.warning("⚠️ Failed to reconcile video stats: %s", e)
+        await asyncio.sleep(STATS_RECONCILE_INTERVAL)
+
+
+def _iso_week(day):
+    year, week, _ = datetime.strptime(day, "%Y-%m-%d").isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+async def get_stats(collection, summary, days=14, weeks=8, now=None):
+    """Dashboard statistics from the summary document (one indexed fetch)"""
+    doc = await summary.find_one({"_id": SUMMARY_ID})
+    if doc is None:
+        # First read on a fresh deployment; later reads are single-document fetches
+        doc = await reconcile_stats(collection, summary)
+    return format_stats(doc, days=days, weeks=weeks, now=now)
+
+
+def format_stats(doc, days=14, weeks=8, now=None):
+    """API shape of a summary: count, duration totals, per_day ("YYYY-MM-DD" -> count)"""
+    now = now or datetime.utcnow()
+    today = datetime(now.year, now.month, now.day)
+    per_day_all = doc.get("added_per_day") or {}
+    per_day = [
+        {"date": _day(today - timedelta(days=offset)), "count": per_day_all.get(_day(today - timedelta(days=offset)), 0)}
+        for offset in range(min(days, STATS_HISTORY_DAYS) - 1, -1, -1)
+    ]
+    per_week = {}
+    for offset in range(min(weeks * 7, STATS_HISTORY_DAYS)):
+        day = _day(today - timedelta(days=offset))
+        week = _iso_week(day)
+        per_week[week] = per_week.get(week, 0) + per_day_all.get(day, 0)
+
+    duration_count = doc.get("duration_count", 0)
+    duration_total = doc.get("duration_total", 0)
+    return {
+        "count": doc.get("count", 0),
+        "total_duration_seconds": duration_total,
+        "average_duration_seconds": round(duration_total / duration_count, 1) if duration_count else None,
+        "videos_with_duration": duration_count,
+        "added_per_day": per_day,
+        "added_per_week": [{"week": week, "count": count} for week, count in sorted(per_week.items())][-weeks:],
+        "updated_at": doc.get("updated_at"),
+        "reconciled_at": doc.get("reconciled_at"),
+    }
+
+
+async def dashboard_stats():
+    """Stats for the dashboard page, or None when the database is unavailable"""
+    from app.dbConnection import get_video_repository
+    videos = get_video_repository()
+    if videos is None:
+        return None
+    try:
+        return await videos.stats(days=7, weeks=4)
+    except StorageError as e:
+        logger.warning("⚠️ Failed to load video stats for the dashboard: %s", e)
+        return None
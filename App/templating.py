@@ -0,0 +1,76 @@
+"""Shared Jinja environment for every page
+
+One environment (with a persistent bytecode cache) backs both the regular
+TemplateResponse rendering and, through an async overlay, the streamed list
+page. Templates can be precompiled ahead of time so a cold worker does not
+compile them on its first request:
+
+    python -m app.templating
+"""
+import os
+import logging
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+from app.assets import asset_url
+from app.cache import CACHE_ENABLED, fragment_cache
+from app.metrics import instrument_templates
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = os.getenv("TEMPLATE_DIR", "app/templates")
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", "app/.template_cache")
+VIDEO_ROW_TEMPLATE = "_video_row.html"
+
+
+def _bytecode_cache(pattern):
+    try:
+        os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+    except OSError as e:
+        logger.warning("⚠️ Template bytecode cache disabled (%s): %s", TEMPLATE_CACHE_DIR, e)
+        return None
+    return FileSystemBytecodeCache(TEMPLATE_CACHE_DIR, pattern)
+
+
+environment = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(),
+    bytecode_cache=_bytecode_cache("__jinja2_%s.cache"),
+)
+templates = instrument_templates(Jinja2Templates(env=environment))
+
+# Async overlay for chunked rendering; shares the loader and globals. Async templates
+# compile to different code, so their bytecode is cached under a separate name.
+stream_environment = environment.overlay(
+    enable_async=True,
+    bytecode_cache=_bytecode_cache("__jinja2_async_%s.cache"),
+)
+
+
+def video_row(video):
+    """Rendered <tr> for one video, cached until the video's updated_at changes"""
+    key = (video["_id"], video.get("updated_at"))
+    row = fragment_cache.get(key) if CACHE_ENABLED else None
+    if row is None:
+        row = Markup(environment.get_template(VIDEO_ROW_TEMPLATE).render(video=video))
+        if CACHE_ENABLED:
+            fragment_cache.set(key, row)
+    return row
+
+
+environment.globals["video_row"] = video_row
+environment.globals["asset_url"] = asset_url
+
+
+def precompile_templates():
+    """Compile every template into the bytecode cache and the in-memory template cache"""
+    names = environment.list_templates(extensions=["html"])
+    for name in names:
+        environment.get_template(name)
+        stream_environment.get_template(name)
+    return names
+
+
+if __name__ == "__main__":
+    compiled = precompile_templates()
+    print(f"Compiled {len(compiled)} templates into {TEMPLATE_CACHE_DIR}")
@@ -0,0 +1,78 @@
+from datetime import timezone
+from fastapi import HTTPException
+
+# Documents written before revision tracking have no version field and count as 0
+INITIAL_VERSION = 1
+
+
+def document_version(doc):
+    return int(doc.get("version") or 0)
+
+
+def _enriched_at(doc):
+    enrichment = doc.get("enrichment")
+    return enrichment.get("fetched_at") if isinstance(enrichment, dict) else None
+
+
+def etag_for(doc):
+    """Weak ETag: the version, plus when enrichment last changed the representation
+
+    Enrichment does not bump the version, so "<version>-<fetched ms>" still
+    carries the user's concurrency token and parse_if_match reads it back.
+    Weak because the body may be compressed or not; a strong tag would be
+    weakened on compressed 200s only and no longer match the one sent on 304s.
+    """
+    fetched_at = _enriched_at(doc)
+    if fetched_at is None:
+        return f'W/"{document_version(doc)}"'
+    stamp = int(fetched_at.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    return f'W/"{document_version(doc)}-{stamp}"'
+
+
+def last_modified_for(doc):
+    """Last-Modified of the representation: the later of the user's last edit and the last enrichment"""
+    updated_at, fetched_at = doc.get("updated_at"), _enriched_at(doc)
+    if updated_at is None or fetched_at is None:
+        return updated_at or fetched_at
+    return max(updated_at, fetched_at)
+
+
+def parse_if_match(header):
+    """Parse an If-Match header into a list of versions, "*" or None (header absent)"""
+    if header is None:
+        return None
+    header = header.strip()
+    if header == "*":
+        return "*"
+    versions = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        # Only the version part of "<version>-<enriched>" takes part in the precondition
+        tag = tag.strip('"').split("-", 1)[0]
+        if not tag.isdigit():
+            raise HTTPException(status_code=400, detail=f"Invalid If-Match value: {header}")
+        versions.append(int(tag))
+    return versions
+
+
+def parse_form_version(value):
+    """Version posted by an edit form; blank means unconditional, anything else non-numeric is a ValueError"""
+    if value is None or not str(value).strip():
+        return None
+    value = str(value).strip()
+    if not value.isdigit():
+        raise ValueError(f"Invalid version: {value}")
+    return [int(value)]
+
+
+def version_filter(versions):
+    """Query clause matching any of the expected versions (or nothing for None/"*")"""
+    if versions is None or versions == "*":
+        return {}
+    values = list(versions)
+    if 0 in values:
+        # Unversioned legacy documents match version 0
+        values.append(None)
+    return {"version": {"$in": values}}
@@ -0,0 +1,8 @@
+"""Load and micro benchmarks for the Video Manager app
+
+Run from the repository root (where the ``app`` package is importable):
+
+    python -m benchmarks.run --sizes 1000,10000 --concurrency 1,16 --output before.json
+    python -m benchmarks.micro --output micro.json
+    python -m benchmarks.compare before.json after.json
+"""
@@ -0,0 +1,167 @@
+"""Database stand-ins the benchmarks run against
+
+- ``fake``: in-memory Motor-compatible fake (mongomock-motor). No server needed;
+  numbers measure the app's own overhead, not MongoDB's.
+- ``mongod``: a throwaway ``mongod`` on a free local port with a temporary data
+  directory, removed afterwards (needs ``mongod`` on PATH).
+- ``uri``: an existing server from ``--mongo-uri``. Only the benchmark database
+  is touched, and it is dropped before and after the run.
+- ``sqlite``: the embedded SQLite backend in a temporary directory.
+"""
+import os
+import time
+import shutil
+import socket
+import asyncio
+import tempfile
+import subprocess
+
+BENCHMARK_DATABASE = "ytmanager_benchmark"
+BACKENDS = ("fake", "mongod", "uri", "sqlite")
+MONGOD_START_TIMEOUT = 30
+
+
+class Backend:
+    """An open client plus the database the benchmark may freely drop"""
+
+    def __init__(self, kind, client, supports_text_search, cleanup=None):
+        self.kind = kind
+        self.client = client
+        self.db = client[BENCHMARK_DATABASE]
+        # mongomock has no $text operator, so text search scenarios are skipped on the fake
+        self.supports_text_search = supports_text_search
+        self._cleanup = cleanup
+
+    async def reset(self):
+        for name in await self.db.list_collection_names():
+            await self.db.drop_collection(name)
+
+    async def open_repository(self):
+        from app.repositories.mongo import MongoVideoRepository
+        return MongoVideoRepository(self.db["videos"], self.db["video_stats"])
+
+    async def close(self):
+        if self.kind != "fake":
+            await self.reset()
+        self.client.close()
+        if self._cleanup is not None:
+            self._cleanup()
+
+
+class SQLiteBackend:
+    """A fresh SQLite database file per collection size"""
+
+    kind = "sqlite"
+    client = None
+    db = None
+    supports_text_search = True
+
+    def __init__(self):
+        self.directory = tempfile.mkdtemp(prefix="videomanager-bench-")
+        self.path = os.path.join(self.directory, "videos.sqlite3")
+        self.repository = None
+
+    async def reset(self):
+        if self.repository is not None:
+            await self.repository.close()
+            self.repository = None
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+
+    async def open_repository(self):
+        from app.repositories.sqlite import SQLiteVideoRepository
+        self.repository = await SQLiteVideoRepository.open(self.path)
+        return self.repository
+
+    async def close(self):
+        await self.reset()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _motor_client(uri):
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from app.dbConnection import get_client_options
+    # Same pool/compression options as the app, so MONGO_* settings can be compared
+    return AsyncIOMotorClient(uri, **get_client_options())
+
+
+async def _wait_for_ping(client, process=None):
+    deadline = time.monotonic() + MONGOD_START_TIMEOUT
+    while True:
+        try:
+            await client.admin.command("ping")
+            return
+        except Exception:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f"mongod exited with code {process.returncode}")
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def open_backend(kind, mongo_uri=None):
+    if kind == "sqlite":
+        return SQLiteBackend()
+
+    if kind == "fake":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("The fake backend needs mongomock-motor: pip install -r benchmarks/requirements.txt")
+        return Backend("fake", AsyncMongoMockClient(), supports_text_search=False)
+
+    if kind == "uri":
+        if not mongo_uri:
+            raise SystemExit("--backend uri needs --mongo-uri")
+        client = _motor_client(mongo_uri)
+        await _wait_for_ping(client)
+        backend = Backend("uri", client, supports_text_search=True)
+        await backend.reset()
+        return backend
+
+    mongod = shutil.which("mongod")
+    if mongod is None:
+        raise SystemExit("mongod is not on PATH; use --backend fake or --backend uri")
+    data_dir = tempfile.mkdtemp(prefix="videomanager-bench-")
+    port = _free_port()
+    process = subprocess.Popen(
+        [mongod, "--dbpath", data_dir, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    def cleanup():
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    client = _motor_client(f"mongodb://127.0.0.1:{port}/")
+    try:
+        await _wait_for_ping(client, process)
+    except Exception:
+        client.close()
+        cleanup()
+        raise
+    return Backend("mongod", client, supports_text_search=True, cleanup=cleanup)
+
+
+async def install(backend):
+    """Point the app's storage globals at the benchmark database and return its repository"""
+    from app import dbConnection
+    repository = await backend.open_repository()
+    dbConnection.client = backend.client
+    dbConnection.db = backend.db
+    dbConnection.video_collection = backend.db["videos"] if backend.db is not None else None
+    dbConnection.video_repository = repository
+    dbConnection.db_state.update(status="connected", ready=True, consecutive_failures=0, last_error=None)
+    return repository
+
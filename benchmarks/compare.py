@@ -0,0 +1,88 @@
+"""Compare two benchmark reports (from benchmarks.run or benchmarks.micro)
+
+    python -m benchmarks.compare before.json after.json
+    python -m benchmarks.compare before.json after.json --fail-above 10   # exit 1 on >10% regressions
+
+Rows are matched by scenario/size/concurrency (or micro benchmark name).
+Latency increases and throughput drops count as regressions.
+"""
+import sys
+import json
+import argparse
+
+# metric -> (path in a result row, True when larger is better)
+LOAD_METRICS = {
+    "p50_ms": (("latency_ms", "p50"), False),
+    "p95_ms": (("latency_ms", "p95"), False),
+    "p99_ms": (("latency_ms", "p99"), False),
+    "rps": (("rps",), True),
+    "peak_rss_mb": (("peak_rss_mb",), False),
+}
+MICRO_METRICS = {
+    "mean_us": (("mean_us",), False),
+    "p95_us": (("p95_us",), False),
+    "ops_per_sec": (("ops_per_sec",), True),
+}
+
+
+def _key(row):
+    if "benchmark" in row:
+        return (row["benchmark"],)
+    return (row["scenario"], row["size"], row["concurrency"])
+
+
+def _value(row, path):
+    for part in path:
+        row = row.get(part) if isinstance(row, dict) else None
+    return row
+
+
+def compare(before, after):
+    """Yield (key, metric, old, new, change %, regression %) for rows present in both reports"""
+    metrics = MICRO_METRICS if before["meta"].get("kind") == "micro" else LOAD_METRICS
+    old_rows = {_key(row): row for row in before["results"]}
+    for row in after["results"]:
+        old = old_rows.get(_key(row))
+        if old is None:
+            continue
+        for metric, (path, higher_is_better) in metrics.items():
+            old_value, new_value = _value(old, path), _value(row, path)
+            if not old_value or new_value is None:
+                continue
+            change = (new_value - old_value) / old_value * 100
+            yield _key(row), metric, old_value, new_value, change, -change if higher_is_better else change
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--fail-above", type=float, default=None, help="exit 1 if any metric regresses by more than this %%")
+    parser.add_argument("--metrics", default=None, help="comma-separated subset of metrics to show")
+    args = parser.parse_args(argv if argv is not None else sys.argv[1:])
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    wanted = set(args.metrics.split(",")) if args.metrics else None
+
+    print(f"before: {before['meta'].get('commit')}  after: {after['meta'].get('commit')}")
+    regressions = []
+    for key, metric, old, new, change, regression in compare(before, after):
+        if wanted and metric not in wanted:
+            continue
+        marker = ""
+        if args.fail_above is not None and regression > args.fail_above:
+            marker = "  ❌"
+            regressions.append((key, metric))
+        print(f"{' '.join(str(part) for part in key):<36} {metric:<12} {old:>12} -> {new:<12} {change:+7.1f}%{marker}")
+
+    if regressions:
+        print(f"❌ {len(regressions)} metrics regressed by more than {args.fail_above}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Deterministic synthetic videos for seeding benchmark collections"""
+import random
+from datetime import datetime, timedelta
+
+WORDS = (
+    "python", "fastapi", "mongodb", "docker", "kubernetes", "async", "tutorial", "deep", "dive",
+    "intro", "advanced", "guide", "performance", "caching", "indexes", "testing", "deploy",
+    "streaming", "design", "patterns", "review", "live", "coding", "session", "tips", "tricks",
+)
+TIME_FORMATS = (
+    lambda seconds: f"{seconds // 60}:{seconds % 60:02d}",
+    lambda seconds: f"{seconds // 3600}h {seconds % 3600 // 60}m",
+    lambda seconds: f"{seconds // 60} min",
+    lambda seconds: f"PT{seconds // 60}M{seconds % 60}S",
+)
+INSERT_BATCH_SIZE = 1000
+# Seeded videos are spread over this many days (exercises pagination and per-day stats)
+CREATED_SPAN_DAYS = 90
+
+
+def video_fields(rng):
+    """Form/API fields for one random video"""
+    title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))).title()
+    return {
+        "title": title,
+        "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 30))),
+        "time": rng.choice(TIME_FORMATS)(rng.randint(30, 3 * 3600)),
+        "url": f"https://videos.example.com/watch/{rng.getrandbits(48):012x}",
+    }
+
+
+def build_documents(count, rng, now=None):
+    from app.routes.video_routes import VideoCreate, build_video_document
+
+    now = now or datetime.utcnow()
+    for _ in range(count):
+        document = build_video_document(VideoCreate(**video_fields(rng)))
+        created = now - timedelta(seconds=rng.randint(0, CREATED_SPAN_DAYS * 86400))
+        document["created_at"] = document["updated_at"] = created
+        yield document
+
+
+async def seed(repository, count, rng=None):
+    """Insert ``count`` videos in batches through a VideoRepository and return their ids"""
+    rng = rng or random.Random(0)
+    ids = []
+    batch = []
+    for document in build_documents(count, rng):
+        batch.append(document)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            await repository.insert_many(batch)
+            ids.extend(document["_id"] for document in batch)
+            batch = []
+    if batch:
+        await repository.insert_many(batch)
+        ids.extend(document["_id"] for document in batch)
+    return ids
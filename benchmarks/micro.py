@@ -0,0 +1,122 @@
+"""Micro benchmarks for hot helpers on the request path
+
+Times duration parsing, cursor encoding, JSON serialization, list page
+rendering and response compression in isolation, so a change to one of them
+shows up without the noise of a full request. Output matches benchmarks.run.
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --only render --min-time 2 --output micro.json
+"""
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+from bson import ObjectId
+from benchmarks.dataset import build_documents
+from benchmarks.run import PERCENTILES, _git_commit, percentile
+from benchmarks.source_tree import use_source_tree
+
+PAGE_SIZE = 25
+DURATION_SAMPLES = ("12:30", "1:05:30", "1h 5m", "90s", "2 hours 10 mins", "PT1H5M", "45", "whenever")
+
+
+def page_documents(rng):
+    documents = list(build_documents(PAGE_SIZE, rng))
+    for document in documents:
+        document["_id"] = ObjectId()
+    return documents
+
+
+def benchmarks(rng):
+    """name -> zero-argument callable"""
+    from app import cache
+    from app.compression import available_encodings, compress_body
+    from app.durations import parse_duration
+    from app.pagination import decode_cursor, encode_cursor
+    from app.serialization import dumps
+    from app.templating import environment
+
+    documents = page_documents(rng)
+    template = environment.get_template("list_videos.html")
+
+    def render_warm():
+        return template.render(videos=documents)
+
+    def render_cold():
+        cache.fragment_cache.clear()
+        return template.render(videos=documents)
+
+    html = render_warm().encode("utf-8")
+    suite = {
+        "parse_duration": lambda: [parse_duration(text) for text in DURATION_SAMPLES],
+        "cursor_roundtrip": lambda: decode_cursor(encode_cursor(documents[0])),
+        "serialize_page": lambda: dumps({"items": documents, "limit": PAGE_SIZE}),
+        "render_list_page": render_warm,
+        "render_list_page_cold": render_cold,
+    }
+    for encoding in available_encodings():
+        suite[f"compress_page_{encoding}"] = lambda encoding=encoding: compress_body(encoding, html)
+    return suite
+
+
+def measure(function, min_time):
+    """Call ``function`` repeatedly for at least ``min_time`` seconds"""
+    for _ in range(10):
+        function()
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while time.perf_counter() < deadline or len(timings) < 100:
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    mean = sum(timings) / len(timings)
+    result = {"iterations": len(timings), "ops_per_sec": round(1 / mean, 1), "mean_us": round(mean * 1e6, 2)}
+    for p in PERCENTILES:
+        result[f"p{p}_us"] = round(percentile(timings, p) * 1e6, 2)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.micro")
+    parser.add_argument("--only", default=None, help="run benchmarks whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv if argv is not None else sys.argv[1:])
+
+    use_source_tree()
+    suite = benchmarks(random.Random(args.seed))
+    logging.getLogger().setLevel(logging.WARNING)
+    results = []
+    for name, function in suite.items():
+        if args.only and args.only not in name:
+            continue
+        result = {"benchmark": name, **measure(function, args.min_time)}
+        results.append(result)
+        print(f"{name:<24} {result['ops_per_sec']:>12} ops/s  mean={result['mean_us']}us  p95={result['p95_us']}us", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "kind": "micro",
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "min_time": args.min_time,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
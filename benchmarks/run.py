@@ -0,0 +1,236 @@
+"""In-process load benchmark for the FastAPI app
+
+Drives the app through httpx's ASGI transport (no sockets, no server process)
+against a seeded benchmark database, and reports per scenario, collection
+size and concurrency: p50/p95/p99 latency, requests per second and RSS.
+Output is JSON so two runs can be diffed with ``python -m benchmarks.compare``.
+
+    python -m benchmarks.run                                   # all scenarios, fake backend
+    python -m benchmarks.run --scenarios list,add,update,delete --sizes 1000,50000 --concurrency 1,32
+    python -m benchmarks.run --backend mongod --output results.json
+    python -m benchmarks.run --backend sqlite --output sqlite.json   # embedded backend, same scenarios
+    python -m benchmarks.run --env CACHE_ENABLED=false           # settings applied before the app is imported
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import logging
+import argparse
+import platform
+import subprocess
+import collections
+from datetime import datetime
+from benchmarks.backends import BACKENDS, install, open_backend
+from benchmarks.dataset import seed
+from benchmarks.source_tree import use_source_tree
+from benchmarks.scenarios import SCENARIOS, Workload
+
+PERCENTILES = (50, 95, 99)
+
+
+def _int_list(value):
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n")[0])
+    parser.add_argument("--backend", choices=BACKENDS, default="fake")
+    parser.add_argument("--mongo-uri", default=os.getenv("BENCHMARK_MONGO_URI"), help="server for --backend uri")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated, default: all")
+    parser.add_argument("--sizes", type=_int_list, default=[1000], help="collection sizes to seed, e.g. 1000,10000")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 16], help="concurrent clients, e.g. 1,16,64")
+    parser.add_argument("--requests", type=int, default=300, help="measured requests per scenario and concurrency")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests sent first")
+    parser.add_argument("--accept-encoding", default=None, help="override the client's Accept-Encoding (e.g. identity)")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="app setting, repeatable")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for data and request parameters")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)} (available: {', '.join(SCENARIOS)})")
+    for item in args.env:
+        if "=" not in item:
+            parser.error(f"--env expects KEY=VALUE, got {item!r}")
+    return args
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def process_rss_mb():
+    """(current, peak) resident set size of this process in MB; None where unsupported"""
+    current = peak = None
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2**20 if sys.platform == "darwin" else 2**10)
+    except ImportError:
+        pass
+    return (
+        round(current, 1) if current is not None else None,
+        round(peak, 1) if peak is not None else None,
+    )
+
+
+async def drive(scenario, client, workload, total, concurrency):
+    """Send ``total`` requests from ``concurrency`` workers; returns (latencies, errors, elapsed)"""
+    latencies = []
+    errors = collections.Counter()
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                status = (await scenario.send(client, workload)).status_code
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            if status != scenario.expect:
+                errors[str(status)] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total) or 1)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def summarize(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    latency_ms = {f"p{p}": round(percentile(ordered, p) * 1000, 3) for p in PERCENTILES}
+    latency_ms["mean"] = round(sum(ordered) / len(ordered) * 1000, 3)
+    latency_ms["max"] = round(ordered[-1] * 1000, 3)
+    current, peak = process_rss_mb()
+    return {
+        "requests": len(ordered),
+        "errors": dict(errors),
+        "rps": round(len(ordered) / elapsed, 1) if elapsed else None,
+        "latency_ms": latency_ms,
+        "rss_mb": current,
+        "peak_rss_mb": peak,
+    }
+
+
+async def run(args):
+    import httpx
+    from app import cache
+    from app.main import app
+    from app.indexes import reconcile_indexes
+    from app.templating import precompile_templates
+
+    # The app configures INFO logging on import; per-request logs would dominate the timings
+    logging.getLogger().setLevel(args.log_level)
+    precompile_templates()
+    rng = random.Random(args.seed)
+    results = []
+    backend = await open_backend(args.backend, args.mongo_uri)
+    try:
+        for size in args.sizes:
+            await backend.reset()
+            cache.invalidate_videos()
+            cache.fragment_cache.clear()
+            videos = await install(backend)
+            if backend.kind in ("mongod", "uri"):
+                await reconcile_indexes(videos.collection)
+            started = time.perf_counter()
+            ids = await seed(videos, size, rng)
+            print(f"🔄 Seeded {size} videos in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+            workload = Workload(videos, ids, rng, backend.supports_text_search)
+
+            headers = {"Accept-Encoding": args.accept_encoding} if args.accept_encoding else None
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", headers=headers) as client:
+                for name in args.scenarios:
+                    scenario = SCENARIOS[name]
+                    if scenario.text_search and not backend.supports_text_search:
+                        print(f"⚠️ Skipping {name}: the {backend.kind} backend has no text search", file=sys.stderr)
+                        continue
+                    for concurrency in args.concurrency:
+                        documents, _ = await videos.change_marker()
+                        if scenario.prepare is not None:
+                            await scenario.prepare(client, workload, args.requests + args.warmup)
+                        if args.warmup:
+                            await drive(scenario, client, workload, args.warmup, concurrency)
+                        result = {
+                            "scenario": name,
+                            "size": size,
+                            "documents": documents,
+                            "concurrency": concurrency,
+                            **summarize(*await drive(scenario, client, workload, args.requests, concurrency)),
+                        }
+                        results.append(result)
+                        latency = result["latency_ms"]
+                        print(
+                            f"{name:<16} size={size:<7} c={concurrency:<4} {result['rps']:>9} rps  "
+                            f"p50={latency['p50']}ms p95={latency['p95']}ms p99={latency['p99']}ms  "
+                            f"errors={sum(result['errors'].values())}  rss={result['rss_mb']}MB",
+                            file=sys.stderr,
+                        )
+    finally:
+        await backend.close()
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    # Settings are read at import time, so they must be in place before the app loads
+    overrides = dict(item.split("=", 1) for item in args.env)
+    os.environ.update(overrides)
+    use_source_tree()
+    results = asyncio.run(run(args))
+
+    report = {
+        "meta": {
+            "kind": "load",
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "accept_encoding": args.accept_encoding,
+            "env": overrides,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"✅ Wrote {len(results)} results to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Request scenarios driven by the load benchmark
+
+Each scenario sends one request per call and names the status it expects.
+New endpoints get a scenario here so their cost shows up in benchmark diffs.
+"""
+import collections
+from benchmarks.dataset import WORDS, build_documents, video_fields
+
+BULK_IDS_PER_REQUEST = 100
+
+
+class Workload:
+    """Shared state for one seeded collection"""
+
+    def __init__(self, videos, ids, rng, supports_text_search):
+        self.videos = videos
+        self.ids = list(ids)
+        self.rng = rng
+        self.supports_text_search = supports_text_search
+        # Ids reserved for delete scenarios, refilled by their prepare step
+        self.disposable = collections.deque()
+        self.next_cursor = None
+
+    def pick_id(self):
+        return str(self.rng.choice(self.ids))
+
+    def word(self):
+        return self.rng.choice(WORDS)
+
+
+class Scenario:
+    def __init__(self, name, send, expect, prepare=None, text_search=False):
+        self.name = name
+        self.send = send
+        self.expect = expect
+        self.prepare = prepare
+        self.text_search = text_search
+
+
+SCENARIOS = {}
+
+
+def scenario(name, expect=200, prepare=None, text_search=False):
+    def register(send):
+        SCENARIOS[name] = Scenario(name, send, expect, prepare, text_search)
+        return send
+    return register
+
+
+async def reserve_disposable(client, workload, count):
+    """Insert ``count`` extra videos for delete scenarios to consume"""
+    documents = list(build_documents(count, workload.rng))
+    await workload.videos.insert_many(documents)
+    workload.disposable.extend(str(document["_id"]) for document in documents)
+
+
+async def load_second_page(client, workload, count):
+    response = await client.get("/api/videos", params={"fields": "title"})
+    workload.next_cursor = response.json()["next_cursor"]
+
+
+# ======= HTML ROUTES =======
+@scenario("list")
+async def list_videos(client, workload):
+    return await client.get("/videos")
+
+
+@scenario("list_page", prepare=load_second_page)
+async def list_next_page(client, workload):
+    return await client.get("/videos", params={"after": workload.next_cursor})
+
+
+@scenario("list_stream")
+async def list_videos_streamed(client, workload):
+    return await client.get("/videos", params={"stream": "1"})
+
+
+@scenario("add", expect=303)
+async def add_video(client, workload):
+    return await client.post("/videos/add", data=video_fields(workload.rng))
+
+
+@scenario("update", expect=303)
+async def update_video(client, workload):
+    return await client.post("/videos/update", data={"id": workload.pick_id(), **video_fields(workload.rng)})
+
+
+@scenario("delete", expect=303, prepare=reserve_disposable)
+async def delete_video(client, workload):
+    return await client.post("/videos/delete", data={"id": workload.disposable.popleft()})
+
+
+@scenario("dashboard")
+async def dashboard(client, workload):
+    return await client.get("/")
+
+
+# ======= JSON API =======
+@scenario("api_list")
+async def api_list_videos(client, workload):
+    return await client.get("/api/videos")
+
+
+@scenario("api_get")
+async def api_get_video(client, workload):
+    return await client.get(f"/api/videos/{workload.pick_id()}")
+
+
+@scenario("api_create", expect=201)
+async def api_create_video(client, workload):
+    return await client.post("/api/videos", json=video_fields(workload.rng))
+
+
+@scenario("api_patch")
+async def api_update_video(client, workload):
+    return await client.patch(f"/api/videos/{workload.pick_id()}", json={"time": video_fields(workload.rng)["time"]})
+
+
+@scenario("api_delete", expect=204, prepare=reserve_disposable)
+async def api_delete_video(client, workload):
+    return await client.delete(f"/api/videos/{workload.disposable.popleft()}")
+
+
+@scenario("stats")
+async def video_stats(client, workload):
+    return await client.get("/api/videos/stats")
+
+
+# ======= SEARCH =======
+@scenario("search_prefix")
+async def search_prefix(client, workload):
+    return await client.get("/api/videos", params={"prefix": workload.word()[:3]})
+
+
+@scenario("search_text", text_search=True)
+async def search_text(client, workload):
+    return await client.get("/api/videos", params={"q": workload.word()})
+
+
+@scenario("filter_duration")
+async def filter_duration(client, workload):
+    return await client.get("/api/videos", params={"min_duration": "10m", "max_duration": "1h", "sort": "longest"})
+
+
+# ======= BULK =======
+@scenario("bulk_update")
+async def bulk_update(client, workload):
+    ids = [str(video_id) for video_id in workload.rng.sample(workload.ids, min(BULK_IDS_PER_REQUEST, len(workload.ids)))]
+    return await client.post("/api/videos/bulk/update", json={"ids": ids, "set": {"description": workload.word()}})
+
+
+# ======= EXPORT =======
+@scenario("export_ndjson")
+async def export_ndjson(client, workload):
+    return await client.get("/api/videos/export")
+
+
+@scenario("export_csv")
+async def export_csv(client, workload):
+    return await client.get("/api/videos/export", params={"format": "csv"})
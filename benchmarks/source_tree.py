@@ -0,0 +1,33 @@
+"""Import the app from a repository checkout
+
+The package directory is ``App`` (templates in ``App/Templates``) in the
+repository and ``app`` in the image, and the code imports ``app`` and reads
+app/static and app/templates relative to the working directory.
+Case-insensitive file systems resolve either spelling, Linux does not, so the
+tests and benchmarks call ``use_source_tree()`` before anything imports the app.
+"""
+import os
+import sys
+import importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def use_source_tree(root=ROOT):
+    """Alias App/ as the ``app`` package and point it at App/static and App/Templates"""
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    if getattr(sys.modules.get("app"), "__file__", None):
+        return
+    # find_spec() is not enough: a stray app/ directory (e.g. the template cache) is a namespace package
+    if os.path.isfile(os.path.join(root, "app", "__init__.py")):
+        return
+    package_dir = os.path.join(root, "App")
+    os.environ.setdefault("STATIC_DIR", os.path.join(package_dir, "static"))
+    os.environ.setdefault("TEMPLATE_DIR", os.path.join(package_dir, "Templates"))
+    spec = importlib.util.spec_from_file_location(
+        "app", os.path.join(package_dir, "__init__.py"), submodule_search_locations=[package_dir]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["app"] = module
+    spec.loader.exec_module(module)
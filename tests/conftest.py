@@ -0,0 +1,17 @@
+"""Make the application importable as ``app`` when running pytest from the repository root
+
+The package directory is ``App`` in the repository and ``app`` in the image;
+case-insensitive file systems resolve either, Linux does not.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Keep the Jinja bytecode cache out of the working tree
+os.environ.setdefault("TEMPLATE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "videomanager-template-cache"))
+
+from benchmarks.source_tree import use_source_tree  # noqa: E402
+
+use_source_tree(ROOT)
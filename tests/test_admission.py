@@ -0,0 +1,93 @@
+import asyncio
+from app.admission import AdmissionController
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_admits_up_to_the_limit_then_rejects_when_queue_full():
+    async def scenario():
+        controller = AdmissionController(limit=2, queue_size=0, timeout=1)
+        assert await controller.acquire()
+        assert await controller.acquire()
+        assert not await controller.acquire()
+        return controller.stats()
+
+    stats = _run(scenario())
+    assert stats["active"] == 2
+    assert stats["admitted"] == 2
+    assert stats["rejected"] == {"queue_full": 1, "timeout": 0}
+
+
+def test_queued_requests_time_out():
+    async def scenario():
+        controller = AdmissionController(limit=1, queue_size=1, timeout=0.01)
+        await controller.acquire()
+        admitted = await controller.acquire()
+        return admitted, controller
+
+    admitted, controller = _run(scenario())
+    assert not admitted
+    assert controller.queued == 0
+    assert controller.rejected["timeout"] == 1
+
+
+def test_released_slot_goes_to_waiters_in_order():
+    async def scenario():
+        controller = AdmissionController(limit=1, queue_size=2, timeout=1)
+        await controller.acquire()
+        order = []
+
+        async def waiter(name):
+            if await controller.acquire():
+                order.append(name)
+
+        tasks = [asyncio.create_task(waiter(name)) for name in ("first", "second")]
+        await asyncio.sleep(0)
+        assert controller.queued == 2
+        controller.release()
+        await asyncio.sleep(0)
+        controller.release()
+        await asyncio.gather(*tasks)
+        return order, controller
+
+    order, controller = _run(scenario())
+    assert order == ["first", "second"]
+    assert controller.active == 1
+    assert controller.queued == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        controller = AdmissionController(limit=1, queue_size=1, timeout=1)
+        await controller.acquire()
+        task = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        controller.release()
+        return controller
+
+    controller = _run(scenario())
+    assert controller.queued == 0
+    assert controller.active == 0
+
+
+def test_slot_granted_to_a_cancelled_waiter_is_not_leaked():
+    async def scenario():
+        controller = AdmissionController(limit=1, queue_size=1, timeout=1)
+        await controller.acquire()
+        task = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        # The slot is handed over, then the client goes away before the waiter runs
+        controller.release()
+        task.cancel()
+        (outcome,) = await asyncio.gather(task, return_exceptions=True)
+        if outcome is True:
+            # The grant won the race (wait_for returns it), so the caller holds the slot
+            controller.release()
+        return controller
+
+    controller = _run(scenario())
+    assert controller.active == 0
@@ -0,0 +1,61 @@
+import asyncio
+import httpx
+from app import dbConnection
+from app.cache import invalidate_videos
+from app.main import app
+from app.repositories.sqlite import SQLiteVideoRepository
+
+NEW_VIDEO = {"title": "Knife Skills", "description": "Dicing onions", "time": "12:30", "url": "https://example.com/v"}
+
+
+def _run(tmp_path, monkeypatch, scenario):
+    async def run():
+        repository = await SQLiteVideoRepository.open(str(tmp_path / "videos.sqlite3"))
+        monkeypatch.setattr(dbConnection, "video_repository", repository)
+        invalidate_videos()
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                await scenario(client)
+        finally:
+            await repository.close()
+
+    asyncio.run(run())
+
+
+def test_create_returns_the_public_representation(tmp_path, monkeypatch):
+    async def scenario(client):
+        created = await client.post("/api/videos", json=NEW_VIDEO)
+        assert created.status_code == 201
+        body = created.json()
+        assert "title_lower" not in body
+        fetched = await client.get(f"/api/videos/{body['_id']}")
+        assert body == fetched.json()
+        assert created.headers["etag"] == fetched.headers["etag"] == 'W/"1"'
+
+    _run(tmp_path, monkeypatch, scenario)
+
+
+def test_create_applies_fields(tmp_path, monkeypatch):
+    async def scenario(client):
+        created = await client.post("/api/videos?fields=title,duration_seconds", json=NEW_VIDEO)
+        assert created.status_code == 201
+        assert set(created.json()) == {"_id", "title", "duration_seconds"}
+        assert created.json()["duration_seconds"] == 750
+        assert (await client.post("/api/videos?fields=title_lower", json=NEW_VIDEO)).status_code == 400
+
+    _run(tmp_path, monkeypatch, scenario)
+
+
+def test_not_modified_repeats_the_etag_of_a_compressed_read(tmp_path, monkeypatch):
+    async def scenario(client):
+        video = dict(NEW_VIDEO, description="Dicing onions, then shallots. " * 32)
+        video_id = (await client.post("/api/videos", json=video)).json()["_id"]
+        fetched = await client.get(f"/api/videos/{video_id}", headers={"Accept-Encoding": "gzip"})
+        assert fetched.headers["content-encoding"] == "gzip"
+        revalidated = await client.get(
+            f"/api/videos/{video_id}", headers={"Accept-Encoding": "gzip", "If-None-Match": fetched.headers["etag"]}
+        )
+        assert revalidated.status_code == 304
+        assert revalidated.headers["etag"] == fetched.headers["etag"]
+
+    _run(tmp_path, monkeypatch, scenario)
@@ -0,0 +1,32 @@
+import pytest
+from app.durations import is_bare_number, parse_duration
+
+
+@pytest.mark.parametrize("text, seconds", [
+    ("12:30", 750),
+    ("1:05:30", 3930),
+    ("0:59", 59),
+    ("1h 5m", 3900),
+    ("90s", 90),
+    ("2 hours 10 mins", 7800),
+    ("1 hour, 2 minutes and 3 seconds", 3723),
+    ("1.5h", 5400),
+    ("PT1H5M", 3900),
+    ("pt4m13s", 253),
+    ("PT0.5S", 0),
+    ("45", 2700),
+    ("1.5", 90),
+    ("  10m  ", 600),
+])
+def test_parses(text, seconds):
+    assert parse_duration(text) == seconds
+
+
+@pytest.mark.parametrize("text", [None, 45, "", "   ", "soon", "12:60", "1:60:00", "PT", "5 parsecs", "1h soon", "-5"])
+def test_rejects(text):
+    assert parse_duration(text) is None
+
+
+@pytest.mark.parametrize("text, expected", [("45", True), (" 2.5 ", True), ("45m", False), ("1:00", False), (None, False)])
+def test_is_bare_number(text, expected):
+    assert is_bare_number(text) is expected
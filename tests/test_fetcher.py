@@ -0,0 +1,83 @@
+import asyncio
+import httpcore
+import httpx
+import pytest
+from app import fetcher
+from app.fetcher import FetchError, HttpFetcher, _is_public, _PublicOnlyTransport
+
+PUBLIC = "93.184.216.34"
+
+
+@pytest.mark.parametrize("address, public", [
+    (PUBLIC, True),
+    ("2606:2800:220:1:248:1893:25c8:1946", True),
+    ("::ffff:93.184.216.34", True),
+    ("10.1.2.3", False),
+    ("172.16.0.1", False),
+    ("192.168.1.1", False),
+    ("127.0.0.1", False),
+    ("169.254.169.254", False),
+    ("100.64.0.1", False),
+    ("100.127.255.254", False),
+    ("0.0.0.0", False),
+    ("224.0.0.1", False),
+    ("::1", False),
+    ("fd00::1", False),
+    ("fe80::1", False),
+    ("::ffff:10.0.0.1", False),
+    ("::ffff:127.0.0.1", False),
+])
+def test_is_public(address, public):
+    assert _is_public(address) is public
+
+
+class _RecordingBackend(httpcore.AsyncMockBackend):
+    """Mock network that answers with one HTML page and records where it connected"""
+
+    def __init__(self):
+        super().__init__([
+            b"HTTP/1.1 200 OK\r\n",
+            b"Content-Type: text/html\r\n",
+            b"Content-Length: 34\r\n\r\n",
+            b"<html><head><title>Hi</title></head>",
+        ])
+        self.connected = []
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        self.connected.append((host, port))
+        return await super().connect_tcp(host, port, timeout, local_address, socket_options)
+
+
+def _fetch(url, resolved, monkeypatch):
+    lookups = []
+
+    async def resolve(host, port):
+        lookups.append(host)
+        return resolved
+
+    monkeypatch.setattr(fetcher, "_resolve", resolve)
+    backend = _RecordingBackend()
+
+    async def scenario():
+        limits = httpx.Limits(max_connections=2)
+        client = httpx.AsyncClient(transport=_PublicOnlyTransport(limits, network_backend=backend))
+        try:
+            return await HttpFetcher(client=client).fetch(url)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(scenario()), backend.connected, lookups
+
+
+def test_connects_to_the_checked_address(monkeypatch):
+    metadata, connected, lookups = _fetch("http://videos.example/watch", [PUBLIC], monkeypatch)
+    assert metadata["title"] == "Hi"
+    assert lookups == ["videos.example"]
+    assert connected == [(PUBLIC, 80)]
+
+
+@pytest.mark.parametrize("resolved", [["10.0.0.7"], [PUBLIC, "100.64.3.2"], ["::ffff:127.0.0.1"], []])
+def test_refuses_hosts_with_non_public_addresses(resolved, monkeypatch):
+    with pytest.raises(FetchError) as error:
+        _fetch("http://rebind.example/", resolved, monkeypatch)
+    assert not error.value.retryable
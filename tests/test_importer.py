@@ -0,0 +1,84 @@
+import asyncio
+from app import importer
+from app.importer import (
+    LINE_TOO_LONG,
+    MAX_CSV_RECORD_CHARS,
+    MAX_LINE_BYTES,
+    iter_csv_records,
+    iter_lines,
+    iter_ndjson_records,
+)
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def _collect(iterator):
+    async def collect():
+        return [item async for item in iterator]
+    return asyncio.run(collect())
+
+
+def _csv(*chunks):
+    return _collect(iter_csv_records(iter_lines(_chunks(*chunks))))
+
+
+def test_lines_split_across_chunks():
+    lines = _collect(iter_lines(_chunks(b"\xef\xbb\xbffirst\r\nsec", b"ond\n", b"", b"third")))
+    assert lines == ["first", "second", "third"]
+
+
+def test_multibyte_character_split_across_chunks():
+    text = "café\n".encode()
+    assert _collect(iter_lines(_chunks(text[:4], text[4:]))) == ["café"]
+
+
+def test_csv_records():
+    records = _csv(b"title,time\r\n", b"Intro,1:00\r\n\r\nOutro,2:00\r\n")
+    assert records == [(2, {"title": "Intro", "time": "1:00"}), (4, {"title": "Outro", "time": "2:00"})]
+
+
+def test_quoted_field_spanning_lines_and_chunks():
+    records = _csv(b'title,description\nA,"line one\nline ', b'two, ""quoted""\nend"\nB,plain\n')
+    assert records == [
+        (2, {"title": "A", "description": 'line one\nline two, "quoted"\nend'}),
+        (5, {"title": "B", "description": "plain"}),
+    ]
+
+
+def test_column_count_mismatch():
+    assert _csv(b"title,time\nA\nB,1:00\n") == [
+        (2, "Expected 2 columns, got 1"),
+        (3, {"title": "B", "time": "1:00"}),
+    ]
+
+
+def test_unterminated_quote():
+    assert _csv(b'title,time\nA,"1:00\n') == [(2, "Unterminated quoted field")]
+
+
+def test_oversized_quoted_record_is_dropped():
+    body = b'title,time\nA,"' + b"x\n" * (MAX_CSV_RECORD_CHARS // 2 + 1)
+    # The rest of the body is parsed as new records once the buffer is dropped
+    assert _csv(body)[0] == (2, "Record too large or unterminated quoted field")
+
+
+def test_overlong_line_is_reported_not_buffered(monkeypatch):
+    monkeypatch.setattr(importer, "MAX_LINE_BYTES", 1024)
+    chunks = [b"title,time\nA,1:00\n"] + [b"x" * 4096] * 256 + [b"\nB,2:00\n"]
+    lines = _collect(iter_lines(_chunks(*chunks)))
+    assert lines == ["title,time", "A,1:00", LINE_TOO_LONG, "B,2:00"]
+    assert _csv(*chunks) == [
+        (2, {"title": "A", "time": "1:00"}),
+        (3, "Line longer than 1024 bytes"),
+        (4, {"title": "B", "time": "2:00"}),
+    ]
+
+
+def test_overlong_ndjson_line_without_newline():
+    body = b'{"title": "' + b"x" * (MAX_LINE_BYTES + 1) + b'"}'
+    records = _collect(iter_ndjson_records(iter_lines(_chunks(*[body[i:i + 65536] for i in range(0, len(body), 65536)]))))
+    assert records == [(1, f"Line longer than {MAX_LINE_BYTES} bytes")]
+
@@ -0,0 +1,54 @@
+"""List ETags and cached pages must follow writes made through another handle (another replica)"""
+import asyncio
+from datetime import datetime, timedelta
+import httpx
+from app import dbConnection
+from app.cache import invalidate_videos
+from app.main import app
+from app.repositories.sqlite import SQLiteVideoRepository
+from app.routes.video_routes import VideoCreate, build_video_document
+
+
+def test_write_by_another_replica_changes_list_etag_and_body(tmp_path, monkeypatch):
+    async def scenario():
+        path = str(tmp_path / "videos.sqlite3")
+        serving = await SQLiteVideoRepository.open(path)
+        other = await SQLiteVideoRepository.open(path)
+        monkeypatch.setattr(dbConnection, "video_repository", serving)
+        invalidate_videos()
+        document = build_video_document(
+            VideoCreate(title="Old title", description="A video", time="5m", url="https://example.com/v")
+        )
+        video_id = await other.insert(document)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await client.get("/api/videos")
+            assert first.status_code == 200
+            assert first.json()["items"][0]["title"] == "Old title"
+            old_etag = first.headers["etag"]
+            html = await client.get("/videos")
+            assert "Old title" in html.text
+
+            # No invalidation reaches this process, as with a write on another pod
+            await other.update(video_id, {
+                "title": "New title",
+                "title_lower": "new title",
+                "updated_at": document["updated_at"] + timedelta(seconds=1),
+            })
+
+            second = await client.get("/api/videos", headers={"If-None-Match": old_etag})
+            assert second.status_code == 200
+            assert second.headers["etag"] != old_etag
+            assert second.json()["items"][0]["title"] == "New title"
+            repeat = await client.get("/api/videos", headers={"If-None-Match": second.headers["etag"]})
+            assert repeat.status_code == 304
+
+            html = await client.get("/videos", headers={"If-None-Match": html.headers["etag"]})
+            assert html.status_code == 200
+            assert "New title" in html.text and "Old title" not in html.text
+
+        await serving.close()
+        await other.close()
+
+    asyncio.run(scenario())
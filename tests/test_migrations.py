@@ -0,0 +1,28 @@
+import asyncio
+from datetime import datetime
+import pytest
+from app.migrations import backfill_durations
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+EDITED = datetime(2024, 1, 1)
+
+
+def test_backfill_bumps_version_and_updated_at_of_changed_rows():
+    async def run():
+        database = mongomock_motor.AsyncMongoMockClient()["videos"]
+        collection = database["videos"]
+        await collection.insert_many([
+            {"_id": 1, "time": "12:30", "updated_at": EDITED, "version": 3},
+            {"_id": 2, "time": "1:00", "duration_seconds": 60, "updated_at": EDITED, "version": 3},
+            {"_id": 3, "time": "5:00", "updated_at": EDITED},
+        ])
+        state = await backfill_durations(collection, database["migrations"], batch_size=2)
+        assert state["updated"] == 2
+        changed, unchanged, legacy = await collection.find().sort("_id", 1).to_list(length=None)
+        assert (changed["duration_seconds"], changed["version"]) == (750, 4)
+        assert changed["updated_at"] > EDITED
+        assert (unchanged["version"], unchanged["updated_at"]) == (3, EDITED)
+        assert (legacy["duration_seconds"], legacy["version"]) == (300, 1)
+
+    asyncio.run(run())
@@ -0,0 +1,49 @@
+import base64
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from app.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_filter
+
+
+def test_round_trip_datetime():
+    doc = {"_id": ObjectId(), "created_at": datetime(2024, 5, 17, 8, 30, 15, 123456)}
+    assert decode_cursor(encode_cursor(doc)) == (doc["created_at"], doc["_id"])
+
+
+@pytest.mark.parametrize("sort_field, value", [("score", 1.25), ("duration_seconds", 3600), ("duration_seconds", None)])
+def test_round_trip_raw_values(sort_field, value):
+    doc = {"_id": ObjectId(), sort_field: value}
+    assert decode_cursor(encode_cursor(doc, sort_field)) == (value, doc["_id"])
+
+
+def test_token_is_url_safe_without_padding():
+    token = encode_cursor({"_id": ObjectId(), "created_at": datetime(2024, 1, 1)})
+    assert "=" not in token
+    assert set(token) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+def _token(payload):
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("token", [
+    "",
+    "not a cursor",
+    _token(b"[1, 2]"),
+    _token(b'{"k": {"t": "raw", "v": 1}}'),
+    _token(b'{"k": {"t": "raw", "v": 1}, "id": "nope"}'),
+    _token(b'{"k": {"t": "dt", "v": "yesterday"}, "id": "' + str(ObjectId()).encode() + b'"}'),
+])
+def test_invalid_tokens(token):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token)
+
+
+def test_keyset_filter_directions():
+    video_id = ObjectId()
+    assert keyset_filter(5, video_id, "score") == {
+        "$or": [{"score": {"$lt": 5}}, {"score": 5, "_id": {"$lt": video_id}}]
+    }
+    assert keyset_filter(5, video_id, "score", forward=False) == {
+        "$or": [{"score": {"$gt": 5}}, {"score": 5, "_id": {"$gt": video_id}}]
+    }
@@ -0,0 +1,72 @@
+import re
+import sqlite3
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from app.repositories import StorageError
+from app.repositories.sqlite import _to_micros, _where
+
+
+def test_empty_filter():
+    assert _where(None) == ("", [])
+    assert _where({}) == ("", [])
+
+
+def test_equality_converts_values():
+    video_id = ObjectId()
+    assert _where({"_id": video_id}) == ("_id = ?", [str(video_id)])
+    assert _where({"title": "Intro"}) == ("title = ?", ["Intro"])
+
+
+def test_comparisons_on_timestamps():
+    start, end = datetime(2024, 1, 1), datetime(2024, 2, 1)
+    sql, params = _where({"created_at": {"$gte": start, "$lt": end}})
+    assert sql == "created_at >= ? AND created_at < ?"
+    assert params == [_to_micros(start), _to_micros(end)]
+
+
+def test_table_prefix():
+    assert _where({"duration_seconds": {"$gt": 60}}, table="v.") == ("v.duration_seconds > ?", [60])
+
+
+def test_in_skips_none_and_handles_empty():
+    assert _where({"version": {"$in": [1, 2, None]}}) == ("version IN (?, ?)", [1, 2])
+    assert _where({"version": {"$in": [None]}}) == ("0", [])
+
+
+def test_type_number():
+    assert _where({"duration_seconds": {"$type": "number"}}) == ("duration_seconds IS NOT NULL", [])
+
+
+def test_anchored_regex_becomes_a_range():
+    sql, params = _where({"title_lower": {"$regex": "^" + re.escape("c++ (part 1)")}})
+    assert sql == "title_lower >= ? AND title_lower < ?"
+    assert params == ["c++ (part 1)", "c++ (part 1)\U0010ffff"]
+
+
+def test_nested_and():
+    sql, params = _where({"$and": [{"title": "a"}, {}, {"duration_seconds": {"$lte": 10}}]})
+    assert sql == "title = ? AND duration_seconds <= ?"
+    assert params == ["a", 10]
+
+
+@pytest.mark.parametrize("filters", [
+    {"description": "x"},
+    {"title": {"$regex": "middle"}},
+    {"title": {"$ne": "x"}},
+    {"$or": [{"title": "a"}]},
+])
+def test_unsupported_filters_raise(filters):
+    with pytest.raises(StorageError):
+        _where(filters)
+
+
+def test_prefix_range_matches_like_the_regex():
+    titles = ["c++ (part 1)", "c++ (part 10)", "c++ (part 2)", "c+", "c++ (part 1", "d"]
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE videos (title_lower TEXT)")
+    connection.executemany("INSERT INTO videos VALUES (?)", [(title,) for title in titles])
+    pattern = "^" + re.escape("c++ (part 1")
+    sql, params = _where({"title_lower": {"$regex": pattern}})
+    rows = connection.execute(f"SELECT title_lower FROM videos WHERE {sql}", params).fetchall()
+    assert sorted(row[0] for row in rows) == sorted(title for title in titles if re.match(pattern, title))